@@ -13,6 +13,16 @@ from bot.middlewares.i18n import I18nMiddleware, get_i18n_instance, JsonI18n
 from bot.middlewares.ban_check_middleware import BanCheckMiddleware
 from bot.middlewares.action_logger_middleware import ActionLoggerMiddleware
 from bot.middlewares.profile_sync import ProfileSyncMiddleware
+from bot.middlewares.user_context import UserContextMiddleware
+from bot.middlewares.update_dedup import UpdateDeduplicationMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.utils.metrics import get_metrics
+from bot.middlewares.metrics_middleware import (
+    UpdateMetricsMiddleware,
+    TimedMiddleware,
+    HandlerMetricsMiddleware,
+    BotApiMetricsMiddleware,
+)
 
 
 def build_dispatcher(settings: Settings, async_session_factory: sessionmaker) -> tuple[Dispatcher, Bot, Dict]:
@@ -27,11 +37,37 @@ def build_dispatcher(settings: Settings, async_session_factory: sessionmaker) ->
     dp["i18n_instance"] = i18n_instance
     dp["async_session_factory"] = async_session_factory
 
-    dp.update.outer_middleware(DBSessionMiddleware(async_session_factory))
-    dp.update.outer_middleware(I18nMiddleware(i18n=i18n_instance, settings=settings))
-    dp.update.outer_middleware(ProfileSyncMiddleware())
-    dp.update.outer_middleware(BanCheckMiddleware(settings=settings, i18n_instance=i18n_instance))
-    dp.update.outer_middleware(ActionLoggerMiddleware(settings=settings))
+    # Retried webhook deliveries are dropped before any other work is done
+    update_dedup = UpdateDeduplicationMiddleware(window_size=settings.UPDATE_DEDUP_WINDOW_SIZE)
+    dp.update.outer_middleware(update_dedup)
+    get_metrics().register_provider("update_dedup", update_dedup.get_stats)
+
+    # Timing wraps the rest of the middleware chain
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    throttling = ThrottlingMiddleware(settings=settings, i18n=i18n_instance)
+    get_metrics().register_provider("throttling", throttling.get_stats)
+    for middleware in (
+        throttling,
+        DBSessionMiddleware(async_session_factory),
+        UserContextMiddleware(),
+        I18nMiddleware(i18n=i18n_instance, settings=settings),
+        ProfileSyncMiddleware(fingerprint_cache_size=settings.PROFILE_SYNC_CACHE_SIZE),
+        BanCheckMiddleware(settings=settings, i18n_instance=i18n_instance),
+        ActionLoggerMiddleware(settings=settings),
+    ):
+        dp.update.outer_middleware(TimedMiddleware(middleware))
+
+    # Inner middlewares on the dispatcher apply to handlers of all nested routers
+    handler_metrics = HandlerMetricsMiddleware()
+    for observer in (
+        dp.message,
+        dp.callback_query,
+        dp.inline_query,
+        dp.pre_checkout_query,
+    ):
+        observer.middleware(handler_metrics)
+
+    bot.session.middleware(BotApiMetricsMiddleware())
 
     return dp, bot, {"i18n_instance": i18n_instance}
 
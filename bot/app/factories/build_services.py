@@ -12,6 +12,9 @@ from bot.services.stars_service import StarsService
 from bot.services.tribute_service import TributeService
 from bot.services.crypto_pay_service import CryptoPayService
 from bot.services.panel_webhook_service import PanelWebhookService
+from bot.services.message_log_writer import MessageLogWriter
+from bot.services.panel_profile_sync_service import PanelProfileSyncService
+from bot.services.broadcast_service import BroadcastService
 
 
 def build_core_services(
@@ -53,6 +56,9 @@ def build_core_services(
         bot_username_for_default_return=bot_username_for_default_return,
         settings_obj=settings,
     )
+    message_log_writer = MessageLogWriter(settings, async_session_factory)
+    panel_profile_sync_service = PanelProfileSyncService(settings, panel_service)
+    broadcast_service = BroadcastService(settings, async_session_factory)
 
     return {
         "panel_service": panel_service,
@@ -64,6 +70,9 @@ def build_core_services(
         "tribute_service": tribute_service,
         "panel_webhook_service": panel_webhook_service,
         "yookassa_service": yookassa_service,
+        "message_log_writer": message_log_writer,
+        "panel_profile_sync_service": panel_profile_sync_service,
+        "broadcast_service": broadcast_service,
     }
 
 
@@ -1,4 +1,5 @@
 import asyncio
+import hmac
 import logging
 from aiohttp import web
 from aiogram import Bot, Dispatcher
@@ -6,6 +7,15 @@ from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_applicati
 from sqlalchemy.orm import sessionmaker
 
 from config.settings import Settings
+from bot.utils.metrics import get_metrics
+
+
+async def metrics_route(request: web.Request) -> web.Response:
+    settings: Settings = request.app["settings"]
+    provided = request.headers.get("X-Metrics-Token") or request.query.get("token") or ""
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(provided, settings.METRICS_TOKEN):
+        return web.Response(status=403, text="forbidden")
+    return web.json_response(get_metrics().snapshot())
 
 
 async def build_and_start_web_app(
@@ -72,6 +82,12 @@ async def build_and_start_web_app(
         app.router.add_post(panel_path, panel_webhook_route)
         logging.info(f"Panel webhook route configured at: [POST] {panel_path}")
 
+    if settings.METRICS_ENABLED and not settings.METRICS_TOKEN:
+        logging.warning("METRICS_ENABLED is set but METRICS_TOKEN is empty; metrics route not registered.")
+    elif settings.METRICS_ENABLED:
+        app.router.add_get(settings.metrics_path, metrics_route)
+        logging.info(f"Metrics route configured at: [GET] {settings.metrics_path}")
+
     web_app_runner = web.AppRunner(app)
     await web_app_runner.setup()
     site = web.TCPSite(
@@ -1,28 +1,135 @@
 import logging
 import asyncio
+from datetime import timedelta
 from aiogram import Router, F, types, Bot
 from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest
 
 from aiogram.fsm.context import FSMContext
-from typing import Optional
+from typing import Optional, Set
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
 
-from db.dal import user_dal, message_log_dal
+from db.dal import message_log_dal
 
 from bot.states.admin_states import AdminStates
 from bot.keyboards.inline.admin_keyboards import (
     get_broadcast_confirmation_keyboard,
+    get_broadcast_variant_keyboard,
     get_back_to_admin_panel_keyboard,
     get_admin_panel_keyboard,
+    get_broadcast_job_controls_keyboard,
+    get_broadcast_jobs_keyboard,
 )
 from bot.middlewares.i18n import JsonI18n
+from bot.services.broadcast_service import BroadcastService
 from bot.utils.message_queue import get_queue_manager
-from bot.utils import get_message_content, send_message_by_type, send_message_via_queue, MessageContent
+from bot.utils import get_message_content, send_message_by_type, MessageContent
 
 router = Router(name="admin_broadcast_router")
 
+# Recent jobs shown in the admin job list
+BROADCAST_JOBS_LIST_LIMIT = 10
+
+# Running progress reporters; the loop only keeps weak references to tasks
+_report_tasks: Set[asyncio.Task] = set()
+
+
+def _serialize_entities(entities) -> list:
+    return [
+        e.model_dump(mode="json", exclude_none=True) if hasattr(e, "model_dump") else e
+        for e in entities or []
+    ]
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "—"
+    return str(timedelta(seconds=int(seconds)))
+
+
+def _on_report_done(task: asyncio.Task) -> None:
+    _report_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logging.error(f"Broadcast progress reporter failed: {task.exception()}",
+                      exc_info=task.exception())
+
+
+async def _report_broadcast_job(
+    bot: Bot,
+    chat_id: int,
+    message_id: int,
+    header_text: str,
+    broadcast_service: BroadcastService,
+    job_id: int,
+    interval_seconds: float,
+    i18n: JsonI18n,
+    lang: str,
+) -> None:
+    """Edit the broadcast report with live delivery counts while the job runs."""
+    _ = lambda key, **kwargs: i18n.gettext(lang, key, **kwargs)
+    last_text = None
+    last_run = None
+    while True:
+        run = broadcast_service.get_run(job_id)
+        if run is None:
+            job = await broadcast_service.get_job(job_id)
+            if job is None:
+                return
+            lines = [
+                header_text,
+                _("broadcast_progress",
+                  done=job.delivered + job.blocked + job.failed,
+                  total=job.total_queued,
+                  delivered=job.delivered,
+                  blocked=job.blocked,
+                  failed=job.failed,
+                  eta="—"),
+                _("broadcast_job_status_line",
+                  status=_(f"broadcast_job_status_{job.status}")),
+            ]
+            if job.status == "completed" and last_run is not None:
+                lines.append(_("broadcast_progress_finished",
+                               duration=_format_duration(last_run.progress.elapsed_seconds())))
+            text = "\n\n".join(lines)
+            markup = (get_broadcast_job_controls_keyboard(i18n, lang, job_id, paused=True)
+                      if job.status == "paused" else get_back_to_admin_panel_keyboard(lang, i18n))
+        else:
+            last_run = run
+            progress = run.progress
+            paused = run.control == "pause"
+            lines = [
+                header_text,
+                _("broadcast_progress",
+                  done=progress.completed,
+                  total=progress.total or f"{run.total_queued}+",
+                  delivered=progress.counts["delivered"],
+                  blocked=progress.counts["blocked"],
+                  failed=progress.counts["failed"],
+                  eta=_format_duration(progress.eta_seconds()) if run.exhausted else "—"),
+            ]
+            if paused:
+                lines.append(_("broadcast_job_status_line",
+                               status=_("broadcast_job_status_paused")))
+            text = "\n\n".join(lines)
+            markup = get_broadcast_job_controls_keyboard(i18n, lang, job_id, paused=paused)
+
+        if text != last_text:
+            try:
+                await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id,
+                                            reply_markup=markup)
+                last_text = text
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                logging.debug(f"Broadcast progress edit skipped: {e}")
+        if run is None:
+            return
+        await run.progress.wait_finished(timeout=interval_seconds)
+        if run.task and run.progress.is_finished:
+            # Let the job store its final state before the last edit
+            await asyncio.wait([run.task], timeout=interval_seconds)
+
 
 async def broadcast_message_prompt_handler(
     callback: types.CallbackQuery,
@@ -60,6 +167,7 @@ async def broadcast_message_prompt_handler(
 
 
 @router.message(AdminStates.waiting_for_broadcast_message)
+@router.message(AdminStates.waiting_for_broadcast_variant)
 async def process_broadcast_message_handler(
     message: types.Message,
     state: FSMContext,
@@ -86,14 +194,21 @@ async def process_broadcast_message_handler(
         await message.answer(_("admin_broadcast_error_no_message"))
         return
 
-    # Сохраняем данные для рассылки
-    await state.update_data(
-        broadcast_text=content.text,
-        broadcast_entities=entities,
-        broadcast_content_type=content.content_type,
-        broadcast_file_id=content.file_id,
-        broadcast_target="all",
-    )
+    # A language variant replaces the main message for users with that language
+    user_fsm_data = await state.get_data()
+    variant_language = None
+    if await state.get_state() == AdminStates.waiting_for_broadcast_variant.state:
+        variant_language = user_fsm_data.get("broadcast_variant_language")
+    if variant_language is None:
+        # Сохраняем данные для рассылки
+        await state.update_data(
+            broadcast_text=content.text,
+            broadcast_entities=entities,
+            broadcast_content_type=content.content_type,
+            broadcast_file_id=content.file_id,
+            broadcast_target="all",
+            broadcast_variants={},
+        )
 
     # Отправляем превью-копию того, что будет разослано
     try:
@@ -128,16 +243,104 @@ async def process_broadcast_message_handler(
         )
         return
 
+    target = "all"
+    variants = {}
+    if variant_language is not None:
+        target = user_fsm_data.get("broadcast_target", "all")
+        variants = dict(user_fsm_data.get("broadcast_variants") or {})
+        variants[variant_language] = {
+            "content_type": content.content_type,
+            "text": content.text,
+            "file_id": content.file_id,
+            "entities": _serialize_entities(entities),
+        }
+        await state.update_data(broadcast_variants=variants, broadcast_variant_language=None)
+
     # Показываем короткое подтверждение без дублирования текста — сообщение выше служит превью
     confirmation_prompt = _("admin_broadcast_confirm_prompt_short")
 
     await message.answer(
         confirmation_prompt,
-        reply_markup=get_broadcast_confirmation_keyboard(current_lang, i18n, target="all"),
+        reply_markup=get_broadcast_confirmation_keyboard(
+            current_lang, i18n, target=target, variant_languages=list(variants)
+        ),
     )
     await state.set_state(AdminStates.confirming_broadcast)
 
 
+@router.callback_query(
+    F.data.startswith("broadcast_variant:"),
+    AdminStates.confirming_broadcast,
+)
+async def broadcast_variant_prompt_handler(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    i18n_data: dict,
+    settings: Settings,
+):
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    if not i18n or not callback.message:
+        await callback.answer("Error updating selection.", show_alert=True)
+        return
+
+    language = callback.data.split(":")[1]
+    if language not in i18n.locales_data:
+        await callback.answer("Unknown language.", show_alert=True)
+        return
+
+    user_fsm_data = await state.get_data()
+    has_variant = language in (user_fsm_data.get("broadcast_variants") or {})
+    await state.update_data(broadcast_variant_language=language)
+    await state.set_state(AdminStates.waiting_for_broadcast_variant)
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+    try:
+        await callback.message.edit_text(
+            _("admin_broadcast_variant_prompt", language=language.upper()),
+            reply_markup=get_broadcast_variant_keyboard(current_lang, i18n, language, has_variant),
+        )
+    except Exception:
+        pass
+    await callback.answer()
+
+
+@router.callback_query(
+    F.data.startswith("broadcast_variant_action:"),
+    AdminStates.waiting_for_broadcast_variant,
+)
+async def broadcast_variant_action_handler(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    i18n_data: dict,
+    settings: Settings,
+):
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    if not i18n or not callback.message:
+        await callback.answer("Error updating selection.", show_alert=True)
+        return
+
+    user_fsm_data = await state.get_data()
+    variants = dict(user_fsm_data.get("broadcast_variants") or {})
+    if callback.data.split(":")[1] == "remove":
+        variants.pop(user_fsm_data.get("broadcast_variant_language"), None)
+    await state.update_data(broadcast_variants=variants, broadcast_variant_language=None)
+    await state.set_state(AdminStates.confirming_broadcast)
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+    try:
+        await callback.message.edit_text(
+            _("admin_broadcast_confirm_prompt_short"),
+            reply_markup=get_broadcast_confirmation_keyboard(
+                current_lang, i18n,
+                target=user_fsm_data.get("broadcast_target", "all"),
+                variant_languages=list(variants),
+            ),
+        )
+    except Exception:
+        pass
+    await callback.answer()
+
+
 @router.callback_query(
     F.data.startswith("broadcast_target:"),
     AdminStates.confirming_broadcast,
@@ -169,7 +372,8 @@ async def change_broadcast_target_handler(
         await callback.message.edit_text(
             confirmation_prompt,
             reply_markup=get_broadcast_confirmation_keyboard(
-                current_lang, i18n, target=new_target
+                current_lang, i18n, target=new_target,
+                variant_languages=list(user_fsm_data.get("broadcast_variants") or {}),
             ),
         )
     except Exception:
@@ -221,6 +425,7 @@ async def confirm_broadcast_callback_handler(
     bot: Bot,
     settings: Settings,
     session: AsyncSession,
+    broadcast_service: BroadcastService,
 ):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -253,112 +458,63 @@ async def confirm_broadcast_callback_handler(
         await callback.answer()
 
         target = user_fsm_data.get("broadcast_target", "all")
-        if target == "active":
-            user_ids = await user_dal.get_user_ids_with_active_subscription(session)
-        elif target == "inactive":
-            user_ids = await user_dal.get_user_ids_without_active_subscription(session)
-        else:
-            user_ids = await user_dal.get_all_active_user_ids_for_broadcast(session)
-
-        sent_count = 0
-        failed_count = 0
         admin_user = callback.from_user
         logging.info(
-            f"Admin {admin_user.id} broadcasting '{(content.text or '')[:50]}...' to {len(user_ids)} users."
+            f"Admin {admin_user.id} broadcasting '{(content.text or '')[:50]}...' to '{target}' users."
         )
 
-        # Get message queue manager
-        queue_manager = get_queue_manager()
-        if not queue_manager:
+        if not get_queue_manager():
             await callback.message.edit_text("❌ Ошибка: система очередей не инициализирована", reply_markup=None)
             return
 
-        # Queue all messages for sending
-        for uid in user_ids:
-            try:
-                # Для медиа-сообщений используем caption_entities, для текста - entities
-                if content.content_type == "text":
-                    await send_message_via_queue(
-                        queue_manager, 
-                        uid, 
-                        content,
-                        parse_mode="HTML",
-                        entities=entities,
-                        disable_web_page_preview=True,
-                    )
-                else:
-                    await send_message_via_queue(
-                        queue_manager, 
-                        uid, 
-                        content,
-                        parse_mode="HTML",
-                        caption_entities=entities,
-                        disable_web_page_preview=True,
-                    )
-                sent_count += 1
-                
-                # Log successful queuing
-                await message_log_dal.create_message_log(
-                    session,
-                    {
-                        "user_id": admin_user.id,
-                        "telegram_username": admin_user.username,
-                        "telegram_first_name": admin_user.first_name,
-                        "event_type": "admin_broadcast_queued",
-                        "content": f"To user {uid}: [{content.content_type}] {(content.text or '')[:70]}...",
-                        "is_admin_event": True,
-                        "target_user_id": uid,
-                    },
-                )
-            except Exception as e:
-                failed_count += 1
-                logging.warning(
-                    f"Failed to queue broadcast to {uid}: {type(e).__name__} – {e}"
-                )
-                await message_log_dal.create_message_log(
-                    session,
-                    {
-                        "user_id": admin_user.id,
-                        "telegram_username": admin_user.username,
-                        "telegram_first_name": admin_user.first_name,
-                        "event_type": "admin_broadcast_failed",
-                        "content": f"For user {uid}: {type(e).__name__} – {str(e)[:70]}...",
-                        "is_admin_event": True,
-                        "target_user_id": uid,
-                    },
-                )
-
+        # The job runs in the background; per-recipient outcomes are stored
+        # against it in batches instead of one audit log per user
+        job = await broadcast_service.start_job(
+            {
+                "admin_id": admin_user.id,
+                "target": target,
+                "content_type": content.content_type,
+                "text": content.text,
+                "file_id": content.file_id,
+                "entities": _serialize_entities(entities),
+                "variants": user_fsm_data.get("broadcast_variants") or None,
+            }
+        )
+        await message_log_dal.create_message_log(
+            session,
+            {
+                "user_id": admin_user.id,
+                "telegram_username": admin_user.username,
+                "telegram_first_name": admin_user.first_name,
+                "event_type": "admin_broadcast_started",
+                "content": f"Job #{job.job_id} to '{target}': [{content.content_type}] {(content.text or '')[:70]}...",
+                "is_admin_event": True,
+            },
+        )
         try:
             await session.commit()
         except Exception as e_commit:
             await session.rollback()
-            logging.error(f"Error committing broadcast logs: {e_commit}")
+            logging.error(f"Error committing broadcast log: {e_commit}")
 
-        # Get queue stats for detailed report
-        queue_stats = queue_manager.get_queue_stats()
-        
-        result_message = (
-            _(
-                "broadcast_queue_result",
-                default=(
-                    "🚀 Рассылка поставлена в очередь!\n"
-                    "📤 В очередь добавлено: {sent_count}\n"
-                    "❌ Ошибок: {failed_count}\n\n"
-                    "📊 Статус очередей:\n"
-                    "👥 Очередь пользователей: {user_queue_size} сообщений\n"
-                    "📢 Очередь групп: {group_queue_size} сообщений\n\n"
-                    "ℹ️ Сообщения будут отправлены автоматически с соблюдением лимитов Telegram."
-                ),
-                sent_count=sent_count,
-                failed_count=failed_count,
-                user_queue_size=queue_stats["user_queue_size"],
-                group_queue_size=queue_stats["group_queue_size"],
-            )
-        )
-        await callback.message.answer(
-            result_message,
-            reply_markup=get_back_to_admin_panel_keyboard(current_lang, i18n),
+        header_text = _("broadcast_job_started", job_id=job.job_id, target=target)
+        report_message = await callback.message.answer(
+            header_text,
+            reply_markup=get_broadcast_job_controls_keyboard(i18n, current_lang, job.job_id),
         )
+        report_task = asyncio.create_task(_report_broadcast_job(
+            bot,
+            report_message.chat.id,
+            report_message.message_id,
+            header_text,
+            broadcast_service,
+            job.job_id,
+            settings.BROADCAST_PROGRESS_INTERVAL_SECONDS,
+            i18n,
+            current_lang,
+        ))
+        _report_tasks.add(report_task)
+        report_task.add_done_callback(_on_report_done)
 
     elif action == "cancel":
         await callback.message.edit_text(
@@ -368,3 +524,74 @@ async def confirm_broadcast_callback_handler(
         await callback.answer()
 
     await state.clear()
+
+
+def _format_broadcast_job(job, broadcast_service: BroadcastService, _) -> str:
+    run = broadcast_service.get_run(job.job_id)
+    rate = f"{run.progress.send_rate():.1f}" if run else "—"
+    return _(
+        "broadcast_job_line",
+        job_id=job.job_id,
+        status=_(f"broadcast_job_status_{job.status}"),
+        target=job.target,
+        queued=job.total_queued,
+        delivered=job.delivered,
+        blocked=job.blocked,
+        failed=job.failed,
+        rate=rate,
+        created_at=job.created_at.strftime("%Y-%m-%d %H:%M") if job.created_at else "—",
+    )
+
+
+@router.callback_query(F.data.startswith("broadcast_job:"))
+async def broadcast_job_callback_handler(
+    callback: types.CallbackQuery,
+    i18n_data: dict,
+    settings: Settings,
+    broadcast_service: BroadcastService,
+):
+    current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
+    i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
+    if not i18n or not callback.message:
+        await callback.answer("Error processing request.", show_alert=True)
+        return
+    _ = lambda key, **kwargs: i18n.gettext(current_lang, key, **kwargs)
+
+    parts = callback.data.split(":")
+    action = parts[1]
+    if action in ("pause", "resume", "cancel"):
+        try:
+            job_id = int(parts[2])
+        except (IndexError, ValueError):
+            await callback.answer(_("admin_unknown_action"), show_alert=True)
+            return
+        handlers = {
+            "pause": broadcast_service.pause_job,
+            "resume": broadcast_service.resume_job,
+            "cancel": broadcast_service.cancel_job,
+        }
+        if not await handlers[action](job_id):
+            await callback.answer(_("broadcast_job_action_failed", job_id=job_id), show_alert=True)
+            return
+        logging.info(f"Admin {callback.from_user.id} requested {action} of broadcast job {job_id}")
+        await callback.answer(_(f"broadcast_job_{action}_requested", job_id=job_id))
+        # The live report updates itself; only the job list is redrawn here
+        if parts[-1] != "list":
+            return
+
+    jobs = await broadcast_service.get_recent_jobs(BROADCAST_JOBS_LIST_LIMIT)
+    if jobs:
+        text = "\n\n".join(
+            [_("broadcast_jobs_title")]
+            + [_format_broadcast_job(job, broadcast_service, _) for job in jobs]
+        )
+    else:
+        text = _("broadcast_jobs_empty")
+    try:
+        await callback.message.edit_text(
+            text, reply_markup=get_broadcast_jobs_keyboard(i18n, current_lang, jobs)
+        )
+    except TelegramBadRequest as e:
+        logging.debug(f"Broadcast job list not redrawn: {e}")
+    if action == "list":
+        await callback.answer()
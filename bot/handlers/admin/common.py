@@ -75,7 +75,7 @@ async def admin_panel_actions_callback_handler(
 
     if action == "stats":
         await admin_stats_handlers.show_statistics_handler(
-            callback, i18n_data, settings, session)
+            callback, i18n_data, settings, session, panel_service)
     elif action == "broadcast":
         await admin_broadcast_handlers.broadcast_message_prompt_handler(
             callback, state, i18n_data, settings, session)
@@ -229,6 +229,7 @@ async def show_queue_status_handler(callback: types.CallbackQuery, i18n_data: di
         message_text = _(
             "admin_queue_status_info",
             user_queue_size=stats['user_queue_size'],
+            user_rate=f"{stats['user_rate_limit']:g}",
             user_processing="✅ Да" if stats['user_queue_processing'] else "❌ Нет",
             user_recent=stats['user_recent_sends'],
             group_queue_size=stats['group_queue_size'],
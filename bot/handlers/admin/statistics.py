@@ -18,7 +18,8 @@ router = Router(name="admin_statistics_router")
 
 async def show_statistics_handler(callback: types.CallbackQuery,
                                   i18n_data: dict, settings: Settings,
-                                  session: AsyncSession):
+                                  session: AsyncSession,
+                                  panel_service: PanelApiService):
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
     if not i18n or not callback.message:
@@ -60,77 +61,76 @@ async def show_statistics_handler(callback: types.CallbackQuery,
     stats_text_parts.append(f"\n<b>🖥 {_('admin_panel_stats_header', default='Статистика панели')}</b>")
     
     try:
-        async with PanelApiService(settings) as panel_service:
-            # Get system stats
-            system_stats = await panel_service.get_system_stats()
-            bandwidth_stats = await panel_service.get_bandwidth_stats()
-            nodes_stats = await panel_service.get_nodes_statistics()
+        # Get system stats
+        system_stats = await panel_service.get_system_stats()
+        bandwidth_stats = await panel_service.get_bandwidth_stats()
+        nodes_stats = await panel_service.get_nodes_statistics()
+        
+        logging.info(f"Panel stats response: system={system_stats}, bandwidth={bandwidth_stats}, nodes={nodes_stats}")
+        
+        if system_stats:
+            users = system_stats.get('users', {})
+            status_counts = users.get('statusCounts', {})
+            online_stats = system_stats.get('onlineStats', {})
             
-            logging.info(f"Panel stats response: system={system_stats}, bandwidth={bandwidth_stats}, nodes={nodes_stats}")
+            active_users = status_counts.get('ACTIVE', 0)
+            disabled_users = status_counts.get('DISABLED', 0) 
+            expired_users = status_counts.get('EXPIRED', 0)
+            limited_users = status_counts.get('LIMITED', 0)
+            total_users = users.get('totalUsers', 0)
+            online_now = online_stats.get('onlineNow', 0)
             
-            if system_stats:
-                users = system_stats.get('users', {})
-                status_counts = users.get('statusCounts', {})
-                online_stats = system_stats.get('onlineStats', {})
-                
-                active_users = status_counts.get('ACTIVE', 0)
-                disabled_users = status_counts.get('DISABLED', 0) 
-                expired_users = status_counts.get('EXPIRED', 0)
-                limited_users = status_counts.get('LIMITED', 0)
-                total_users = users.get('totalUsers', 0)
-                online_now = online_stats.get('onlineNow', 0)
-                
-                stats_text_parts.append(f"🟢 {_('admin_panel_online_label', default='Онлайн')}: <b>{online_now}</b>")
-                stats_text_parts.append(f"📊 {_('admin_panel_active_label', default='Активных')}: <b>{active_users}</b>")
-                stats_text_parts.append(f"🔴 {_('admin_panel_disabled_label', default='Отключенных')}: <b>{disabled_users}</b>")
-                stats_text_parts.append(f"⏰ {_('admin_panel_expired_label', default='Истекшие')}: <b>{expired_users}</b>")
-                stats_text_parts.append(f"⚠️ {_('admin_panel_limited_label', default='Ограниченные')}: <b>{limited_users}</b>")
-                stats_text_parts.append(f"👥 {_('admin_panel_total_users_label', default='Всего пользователей')}: <b>{total_users}</b>")
-                
-                # System resources
-                memory = system_stats.get('memory', {})
-                if memory:
-                    memory_total = memory.get('total', 1)
-                    memory_used = memory.get('used', 0)
-                    memory_usage = (memory_used / memory_total) * 100 if memory_total > 0 else 0
-                    stats_text_parts.append(f"💾 {_('admin_panel_memory_usage_label', default='Использование RAM')}: <b>{memory_usage:.1f}%</b>")
-            else:
-                stats_text_parts.append(f"⚠️ {_('admin_panel_system_stats_error', default='Ошибка получения системной статистики')}")
+            stats_text_parts.append(f"🟢 {_('admin_panel_online_label', default='Онлайн')}: <b>{online_now}</b>")
+            stats_text_parts.append(f"📊 {_('admin_panel_active_label', default='Активных')}: <b>{active_users}</b>")
+            stats_text_parts.append(f"🔴 {_('admin_panel_disabled_label', default='Отключенных')}: <b>{disabled_users}</b>")
+            stats_text_parts.append(f"⏰ {_('admin_panel_expired_label', default='Истекшие')}: <b>{expired_users}</b>")
+            stats_text_parts.append(f"⚠️ {_('admin_panel_limited_label', default='Ограниченные')}: <b>{limited_users}</b>")
+            stats_text_parts.append(f"👥 {_('admin_panel_total_users_label', default='Всего пользователей')}: <b>{total_users}</b>")
             
-            # Bandwidth stats
-            if bandwidth_stats:
-                week_traffic = bandwidth_stats.get('bandwidthLastSevenDays', {})
-                month_traffic = bandwidth_stats.get('bandwidthLast30Days', {})
-                # Fallback to the actual key name from API if the above doesn't exist
-                if not month_traffic:
-                    month_traffic = bandwidth_stats.get('bandwidthLastThirtyDays', {})
-                
-                if week_traffic:
-                    week_total = week_traffic.get('current', '0 B')
-                    stats_text_parts.append(f"📊 {_('admin_panel_traffic_week_label', default='Трафик за неделю')}: <b>{week_total}</b>")
-                    
-                if month_traffic:
-                    month_total = month_traffic.get('current', '0 B')
-                    stats_text_parts.append(f"📊 {_('admin_panel_traffic_month_label', default='Трафик за месяц')}: <b>{month_total}</b>")
-            else:
-                stats_text_parts.append(f"⚠️ {_('admin_panel_bandwidth_stats_error', default='Ошибка получения статистики трафика')}")
+            # System resources
+            memory = system_stats.get('memory', {})
+            if memory:
+                memory_total = memory.get('total', 1)
+                memory_used = memory.get('used', 0)
+                memory_usage = (memory_used / memory_total) * 100 if memory_total > 0 else 0
+                stats_text_parts.append(f"💾 {_('admin_panel_memory_usage_label', default='Использование RAM')}: <b>{memory_usage:.1f}%</b>")
+        else:
+            stats_text_parts.append(f"⚠️ {_('admin_panel_system_stats_error', default='Ошибка получения системной статистики')}")
+        
+        # Bandwidth stats
+        if bandwidth_stats:
+            week_traffic = bandwidth_stats.get('bandwidthLastSevenDays', {})
+            month_traffic = bandwidth_stats.get('bandwidthLast30Days', {})
+            # Fallback to the actual key name from API if the above doesn't exist
+            if not month_traffic:
+                month_traffic = bandwidth_stats.get('bandwidthLastThirtyDays', {})
             
-            # Nodes stats  
-            if nodes_stats and 'lastSevenDays' in nodes_stats:
-                last_seven_days = nodes_stats.get('lastSevenDays', [])
-                # Get unique node names from the data
-                unique_nodes = set()
-                for node_data in last_seven_days:
-                    unique_nodes.add(node_data.get('nodeName', ''))
-                total_nodes_count = len(unique_nodes)
-                # Assume all nodes are active since we don't have status info
-                stats_text_parts.append(f"🔗 {_('admin_panel_nodes_label', default='Активных нод')}: <b>{total_nodes_count}/{total_nodes_count}</b>")
-            else:
-                # Use nodes total from system stats as fallback
-                nodes_info = system_stats.get('nodes', {}) if system_stats else {}
-                total_online = nodes_info.get('totalOnline', 0)
-                stats_text_parts.append(f"🔗 {_('admin_panel_nodes_label', default='Активных нод')}: <b>{total_online}</b>")
+            if week_traffic:
+                week_total = week_traffic.get('current', '0 B')
+                stats_text_parts.append(f"📊 {_('admin_panel_traffic_week_label', default='Трафик за неделю')}: <b>{week_total}</b>")
                 
+            if month_traffic:
+                month_total = month_traffic.get('current', '0 B')
+                stats_text_parts.append(f"📊 {_('admin_panel_traffic_month_label', default='Трафик за месяц')}: <b>{month_total}</b>")
+        else:
+            stats_text_parts.append(f"⚠️ {_('admin_panel_bandwidth_stats_error', default='Ошибка получения статистики трафика')}")
+        
+        # Nodes stats  
+        if nodes_stats and 'lastSevenDays' in nodes_stats:
+            last_seven_days = nodes_stats.get('lastSevenDays', [])
+            # Get unique node names from the data
+            unique_nodes = set()
+            for node_data in last_seven_days:
+                unique_nodes.add(node_data.get('nodeName', ''))
+            total_nodes_count = len(unique_nodes)
+            # Assume all nodes are active since we don't have status info
+            stats_text_parts.append(f"🔗 {_('admin_panel_nodes_label', default='Активных нод')}: <b>{total_nodes_count}/{total_nodes_count}</b>")
+        else:
+            # Use nodes total from system stats as fallback
+            nodes_info = system_stats.get('nodes', {}) if system_stats else {}
+            total_online = nodes_info.get('totalOnline', 0)
+            stats_text_parts.append(f"🔗 {_('admin_panel_nodes_label', default='Активных нод')}: <b>{total_online}</b>")
+            
     except Exception as e:
         logging.error(f"Failed to fetch panel statistics: {e}", exc_info=True)
         stats_text_parts.append(f"❌ {_('admin_panel_stats_fetch_error', default='Ошибка получения данных с панели')}")
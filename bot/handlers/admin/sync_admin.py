@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
 from config.settings import Settings
-from bot.services.panel_api_service import PanelApiService
+from bot.services.panel_api_service import PanelApiService, PanelApiError
 from bot.services.notification_service import NotificationService
 
 from db.dal import user_dal, subscription_dal, panel_sync_dal
@@ -37,225 +37,220 @@ async def perform_sync(panel_service: PanelApiService, session: AsyncSession,
     subscriptions_updated = 0
 
     try:
-        panel_users_data = await panel_service.get_all_panel_users()
+        logging.info("Starting sync of panel users.")
 
-        if panel_users_data is None:
-            error_msg = "Failed to fetch users from panel or panel API issue."
-            sync_errors.append(error_msg)
-            await panel_sync_dal.update_panel_sync_status(session, "failed", error_msg)
-            await session.commit()
-            return {"status": "failed", "details": error_msg, "errors": sync_errors}
-
-        if not panel_users_data:
-            status_msg = "No users found in the panel to sync."
-            await panel_sync_dal.update_panel_sync_status(
-                session, "success", status_msg, 0, 0
-            )
-            await session.commit()
-            return {"status": "success", "details": status_msg, "users_synced": 0, "subs_synced": 0}
-
-        total_panel_users = len(panel_users_data)
-        logging.info(f"Starting sync for {total_panel_users} panel users.")
-
-        for panel_user_dict in panel_users_data:
-            try:
-                panel_records_checked += 1
-                panel_uuid = panel_user_dict.get("uuid")
-                panel_subscription_uuid = panel_user_dict.get("subscriptionUuid") or panel_user_dict.get("shortUuid")
-                telegram_id_from_panel = panel_user_dict.get("telegramId")
-
-                if not panel_uuid:
-                    sync_errors.append(f"Panel user missing UUID: {panel_user_dict}")
-                    logging.warning(f"Skipping panel user without UUID: {panel_user_dict}")
-                    continue
+        # Pages of panel users arrive while the previous page is being processed
+        async for panel_users_batch in panel_service.iter_panel_user_batches():
+            for panel_user_dict in panel_users_batch:
+                try:
+                    panel_records_checked += 1
+                    panel_uuid = panel_user_dict.get("uuid")
+                    panel_subscription_uuid = panel_user_dict.get("subscriptionUuid") or panel_user_dict.get("shortUuid")
+                    telegram_id_from_panel = panel_user_dict.get("telegramId")
+
+                    if not panel_uuid:
+                        sync_errors.append(f"Panel user missing UUID: {panel_user_dict}")
+                        logging.warning(f"Skipping panel user without UUID: {panel_user_dict}")
+                        continue
 
-                # Track users without telegram ID
-                if not telegram_id_from_panel:
-                    users_without_telegram_id += 1
+                    # Track users without telegram ID
+                    if not telegram_id_from_panel:
+                        users_without_telegram_id += 1
 
-                # Try to find existing user in local DB
-                existing_user = None
+                    # Try to find existing user in local DB
+                    existing_user = None
                 
-                # First, try to find by telegram ID if available
-                if telegram_id_from_panel:
-                    existing_user = await user_dal.get_user_by_id(session, telegram_id_from_panel)
-                    if existing_user:
-                        logging.debug(f"Found user by telegramId {telegram_id_from_panel}")
+                    # First, try to find by telegram ID if available
+                    if telegram_id_from_panel:
+                        existing_user = await user_dal.get_user_by_id(session, telegram_id_from_panel)
+                        if existing_user:
+                            logging.debug(f"Found user by telegramId {telegram_id_from_panel}")
                 
-                # If not found by telegram ID, try to find by panel UUID
-                if not existing_user:
-                    existing_user = await user_dal.get_user_by_panel_uuid(session, panel_uuid)
-                    if existing_user:
-                        logging.info(f"Found user by panel UUID {panel_uuid}, telegramId: {existing_user.user_id}")
-                        # Update telegram ID if it was missing in panel data but we have local user
-                        if telegram_id_from_panel and existing_user.user_id != telegram_id_from_panel:
-                            logging.warning(f"TelegramId mismatch: panel={telegram_id_from_panel}, local={existing_user.user_id}")
+                    # If not found by telegram ID, try to find by panel UUID
+                    if not existing_user:
+                        existing_user = await user_dal.get_user_by_panel_uuid(session, panel_uuid)
+                        if existing_user:
+                            logging.info(f"Found user by panel UUID {panel_uuid}, telegramId: {existing_user.user_id}")
+                            # Update telegram ID if it was missing in panel data but we have local user
+                            if telegram_id_from_panel and existing_user.user_id != telegram_id_from_panel:
+                                logging.warning(f"TelegramId mismatch: panel={telegram_id_from_panel}, local={existing_user.user_id}")
                 
-                if not existing_user:
-                    users_not_found_in_db += 1
-                    if telegram_id_from_panel:
-                        # Create new user if they have telegram_id
-                        try:
-                            user_data = {
-                                "user_id": telegram_id_from_panel,
-                                "username": None,  # Username will be updated when user interacts with bot
-                                "first_name": None,  # Panel doesn't provide this info
-                                "last_name": None,   # Panel doesn't provide this info
-                                "language_code": "ru",  # Default language
-                                "panel_user_uuid": panel_uuid,
-                                "is_banned": False,
-                                "referred_by_id": None
-                            }
+                    if not existing_user:
+                        users_not_found_in_db += 1
+                        if telegram_id_from_panel:
+                            # Create new user if they have telegram_id
+                            try:
+                                user_data = {
+                                    "user_id": telegram_id_from_panel,
+                                    "username": None,  # Username will be updated when user interacts with bot
+                                    "first_name": None,  # Panel doesn't provide this info
+                                    "last_name": None,   # Panel doesn't provide this info
+                                    "language_code": "ru",  # Default language
+                                    "panel_user_uuid": panel_uuid,
+                                    "is_banned": False,
+                                    "referred_by_id": None
+                                }
                             
-                            new_user, was_created = await user_dal.create_user(session, user_data)
-                            if was_created:
-                                users_created += 1
-                                logging.info(f"Created new user {telegram_id_from_panel} from panel sync with UUID {panel_uuid}")
+                                new_user, was_created = await user_dal.create_user(session, user_data)
+                                if was_created:
+                                    users_created += 1
+                                    logging.info(f"Created new user {telegram_id_from_panel} from panel sync with UUID {panel_uuid}")
                             
-                            existing_user = new_user
+                                existing_user = new_user
                             
-                        except Exception as e_create:
-                            sync_errors.append(f"Error creating user {telegram_id_from_panel}: {str(e_create)}")
-                            logging.error(f"Error creating user {telegram_id_from_panel}: {e_create}")
+                            except Exception as e_create:
+                                sync_errors.append(f"Error creating user {telegram_id_from_panel}: {str(e_create)}")
+                                logging.error(f"Error creating user {telegram_id_from_panel}: {e_create}")
+                                continue
+                        else:
+                            logging.debug(f"Panel user with UUID {panel_uuid} (no telegramId) not found in local DB - skipping")
                             continue
-                    else:
-                        logging.debug(f"Panel user with UUID {panel_uuid} (no telegramId) not found in local DB - skipping")
-                        continue
 
-                # User found in local DB
-                users_found_in_db += 1
-                user_was_updated = False
+                    # User found in local DB
+                    users_found_in_db += 1
+                    user_was_updated = False
 
-                # Get the actual user_id for subscription operations
-                actual_user_id = existing_user.user_id
+                    # Get the actual user_id for subscription operations
+                    actual_user_id = existing_user.user_id
 
-                # Update panel UUID if different
-                if existing_user.panel_user_uuid != panel_uuid:
-                    existing_user.panel_user_uuid = panel_uuid
-                    user_was_updated = True
-                    users_uuid_updated += 1
-                    logging.info(f"Updated panel UUID for user {actual_user_id}: {panel_uuid}")
+                    # Update panel UUID if different
+                    if existing_user.panel_user_uuid != panel_uuid:
+                        existing_user.panel_user_uuid = panel_uuid
+                        user_was_updated = True
+                        users_uuid_updated += 1
+                        logging.info(f"Updated panel UUID for user {actual_user_id}: {panel_uuid}")
 
-                # Ensure panel description contains Telegram fields
-                try:
-                    if panel_uuid and existing_user:
-                        description_text = "\n".join([
-                            existing_user.username or "",
-                            existing_user.first_name or "",
-                            existing_user.last_name or "",
-                        ])
-                        if description_text.strip():
-                            await panel_service.update_user_details_on_panel(
-                                panel_uuid, {"description": description_text}
-                            )
-                except Exception as e_desc:
-                    logging.warning(
-                        f"Sync: Failed to update description for panel user {panel_uuid} (tg {actual_user_id}): {e_desc}"
-                    )
-
-                # Sync subscription data
-                panel_expire_at_iso = panel_user_dict.get("expireAt")
-                panel_status = panel_user_dict.get("status", "UNKNOWN")
-                
-                if panel_expire_at_iso:
+                    # Ensure panel description contains Telegram fields
                     try:
-                        panel_expire_at = datetime.fromisoformat(
-                            panel_expire_at_iso.replace("Z", "+00:00")
+                        if panel_uuid and existing_user:
+                            description_text = "\n".join([
+                                existing_user.username or "",
+                                existing_user.first_name or "",
+                                existing_user.last_name or "",
+                            ])
+                            if description_text.strip():
+                                await panel_service.update_user_details_on_panel(
+                                    panel_uuid, {"description": description_text}
+                                )
+                    except Exception as e_desc:
+                        logging.warning(
+                            f"Sync: Failed to update description for panel user {panel_uuid} (tg {actual_user_id}): {e_desc}"
                         )
+
+                    # Sync subscription data
+                    panel_expire_at_iso = panel_user_dict.get("expireAt")
+                    panel_status = panel_user_dict.get("status", "UNKNOWN")
+                
+                    if panel_expire_at_iso:
+                        try:
+                            panel_expire_at = datetime.fromisoformat(
+                                panel_expire_at_iso.replace("Z", "+00:00")
+                            )
                         
-                        # Prefer syncing by concrete subscription UUID (shortUuid/subscriptionUuid)
-                        subscription_uuid_from_panel = (
-                            panel_user_dict.get("subscriptionUuid")
-                            or panel_user_dict.get("shortUuid")
-                        )
+                            # Prefer syncing by concrete subscription UUID (shortUuid/subscriptionUuid)
+                            subscription_uuid_from_panel = (
+                                panel_user_dict.get("subscriptionUuid")
+                                or panel_user_dict.get("shortUuid")
+                            )
 
-                        if subscription_uuid_from_panel:
-                            # Try to find subscription by its panel_subscription_uuid first (idempotent)
-                            existing_sub_by_uuid = (
-                                await subscription_dal.get_subscription_by_panel_subscription_uuid(
-                                    session, subscription_uuid_from_panel
+                            if subscription_uuid_from_panel:
+                                # Try to find subscription by its panel_subscription_uuid first (idempotent)
+                                existing_sub_by_uuid = (
+                                    await subscription_dal.get_subscription_by_panel_subscription_uuid(
+                                        session, subscription_uuid_from_panel
+                                    )
                                 )
-                            )
 
-                            if existing_sub_by_uuid:
-                                # Atomic update of all relevant fields
-                                await subscription_dal.update_subscription(
-                                    session,
-                                    existing_sub_by_uuid.subscription_id,
-                                    {
+                                if existing_sub_by_uuid:
+                                    # Atomic update of all relevant fields
+                                    await subscription_dal.update_subscription(
+                                        session,
+                                        existing_sub_by_uuid.subscription_id,
+                                        {
+                                            "user_id": actual_user_id,
+                                            "panel_user_uuid": panel_uuid,
+                                            "end_date": panel_expire_at,
+                                            "is_active": panel_status == "ACTIVE",
+                                            "status_from_panel": panel_status,
+                                        },
+                                    )
+                                    subscriptions_synced_count += 1
+                                    subscriptions_updated += 1
+                                    user_was_updated = True
+                                    logging.info(
+                                        f"Synced existing subscription {existing_sub_by_uuid.subscription_id} for user {actual_user_id}: expires {panel_expire_at}, status {panel_status}"
+                                    )
+                                else:
+                                    # Create a new subscription only when we have a concrete subscription UUID
+                                    sub_payload = {
                                         "user_id": actual_user_id,
                                         "panel_user_uuid": panel_uuid,
+                                        "panel_subscription_uuid": subscription_uuid_from_panel,
+                                        # Do not guess precise start_date from panel; keep nullable
+                                        "start_date": None,
                                         "end_date": panel_expire_at,
+                                        "duration_months": None,
                                         "is_active": panel_status == "ACTIVE",
                                         "status_from_panel": panel_status,
-                                    },
-                                )
-                                subscriptions_synced_count += 1
-                                subscriptions_updated += 1
-                                user_was_updated = True
-                                logging.info(
-                                    f"Synced existing subscription {existing_sub_by_uuid.subscription_id} for user {actual_user_id}: expires {panel_expire_at}, status {panel_status}"
-                                )
-                            else:
-                                # Create a new subscription only when we have a concrete subscription UUID
-                                sub_payload = {
-                                    "user_id": actual_user_id,
-                                    "panel_user_uuid": panel_uuid,
-                                    "panel_subscription_uuid": subscription_uuid_from_panel,
-                                    # Do not guess precise start_date from panel; keep nullable
-                                    "start_date": None,
-                                    "end_date": panel_expire_at,
-                                    "duration_months": None,
-                                    "is_active": panel_status == "ACTIVE",
-                                    "status_from_panel": panel_status,
-                                    "traffic_limit_bytes": settings.user_traffic_limit_bytes,
-                                }
-                                created_sub = await subscription_dal.upsert_subscription(
-                                    session, sub_payload
-                                )
-                                subscriptions_synced_count += 1
-                                subscriptions_created += 1
-                                user_was_updated = True
-                                logging.info(
-                                    f"Created subscription {created_sub.subscription_id} for user {actual_user_id} by panel_sub_uuid {subscription_uuid_from_panel}"
-                                )
-                        else:
-                            # No subscription UUID from panel: only update an already active subscription for this user/panel UUID
-                            active_sub = await subscription_dal.get_active_subscription_by_user_id(
-                                session, actual_user_id, panel_uuid
-                            )
-                            if active_sub:
-                                await subscription_dal.update_subscription(
-                                    session,
-                                    active_sub.subscription_id,
-                                    {
-                                        "end_date": panel_expire_at,
-                                        "is_active": panel_status == "ACTIVE",
-                                        "status_from_panel": panel_status,
-                                    },
-                                )
-                                subscriptions_synced_count += 1
-                                subscriptions_updated += 1
-                                user_was_updated = True
-                                logging.info(
-                                    f"Updated active subscription {active_sub.subscription_id} for user {actual_user_id}: expires {panel_expire_at}, status {panel_status}"
-                                )
+                                        "traffic_limit_bytes": settings.user_traffic_limit_bytes,
+                                    }
+                                    created_sub = await subscription_dal.upsert_subscription(
+                                        session, sub_payload
+                                    )
+                                    subscriptions_synced_count += 1
+                                    subscriptions_created += 1
+                                    user_was_updated = True
+                                    logging.info(
+                                        f"Created subscription {created_sub.subscription_id} for user {actual_user_id} by panel_sub_uuid {subscription_uuid_from_panel}"
+                                    )
                             else:
-                                # Without a concrete subscription UUID we avoid creating new records to keep sync idempotent
-                                logging.debug(
-                                    f"No subscriptionUuid for panel user {panel_uuid}; skipped creation for user {actual_user_id}"
+                                # No subscription UUID from panel: only update an already active subscription for this user/panel UUID
+                                active_sub = await subscription_dal.get_active_subscription_by_user_id(
+                                    session, actual_user_id, panel_uuid
                                 )
+                                if active_sub:
+                                    await subscription_dal.update_subscription(
+                                        session,
+                                        active_sub.subscription_id,
+                                        {
+                                            "end_date": panel_expire_at,
+                                            "is_active": panel_status == "ACTIVE",
+                                            "status_from_panel": panel_status,
+                                        },
+                                    )
+                                    subscriptions_synced_count += 1
+                                    subscriptions_updated += 1
+                                    user_was_updated = True
+                                    logging.info(
+                                        f"Updated active subscription {active_sub.subscription_id} for user {actual_user_id}: expires {panel_expire_at}, status {panel_status}"
+                                    )
+                                else:
+                                    # Without a concrete subscription UUID we avoid creating new records to keep sync idempotent
+                                    logging.debug(
+                                        f"No subscriptionUuid for panel user {panel_uuid}; skipped creation for user {actual_user_id}"
+                                    )
                             
-                    except Exception as e:
-                        sync_errors.append(f"Error syncing subscription for user {actual_user_id}: {str(e)}")
-                        logging.error(f"Error syncing subscription for user {actual_user_id}: {e}")
+                        except Exception as e:
+                            sync_errors.append(f"Error syncing subscription for user {actual_user_id}: {str(e)}")
+                            logging.error(f"Error syncing subscription for user {actual_user_id}: {e}")
 
-                if user_was_updated:
-                    users_updated += 1
+                    if user_was_updated:
+                        users_updated += 1
                             
-            except Exception as e_user:
-                sync_errors.append(f"Error processing panel user {panel_user_dict.get('uuid', 'unknown')}: {str(e_user)}")
-                logging.error(f"Error syncing user: {e_user}")
+                except Exception as e_user:
+                    sync_errors.append(f"Error processing panel user {panel_user_dict.get('uuid', 'unknown')}: {str(e_user)}")
+                    logging.error(f"Error syncing user: {e_user}")
+
+            # Flush the batch so changed rows don't pile up in the session
+            await session.flush()
+
+        if not panel_records_checked:
+            status_msg = "No users found in the panel to sync."
+            await panel_sync_dal.update_panel_sync_status(
+                session, "success", status_msg, 0, 0
+            )
+            await session.commit()
+            return {"status": "success", "details": status_msg, "users_synced": 0, "subs_synced": 0}
 
         # Update sync status
         status = "completed_with_errors" if sync_errors else "completed"
@@ -310,6 +305,17 @@ async def perform_sync(panel_service: PanelApiService, session: AsyncSession,
             "errors": sync_errors
         }
 
+    except PanelApiError as e_fetch:
+        # Batches processed before the failure are kept
+        error_msg = f"Failed to fetch users from panel or panel API issue: {e_fetch}"
+        logging.error(error_msg)
+        sync_errors.append(error_msg)
+        await panel_sync_dal.update_panel_sync_status(
+            session, "failed", error_msg, panel_records_checked, subscriptions_synced_count
+        )
+        await session.commit()
+        return {"status": "failed", "details": error_msg, "errors": sync_errors}
+
     except Exception as e_sync_global:
         await session.rollback()
         logging.error(f"Global error during sync: {e_sync_global}", exc_info=True)
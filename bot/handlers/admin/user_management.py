@@ -17,6 +17,7 @@ from bot.services.subscription_service import SubscriptionService
 from bot.services.panel_api_service import PanelApiService
 from bot.middlewares.i18n import JsonI18n
 from bot.utils import get_message_content, send_direct_message
+from bot.utils.ban_registry import get_ban_registry
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 
 router = Router(name="admin_user_management_router")
@@ -288,7 +289,8 @@ async def user_action_handler(callback: types.CallbackQuery, state: FSMContext,
     elif action == "balance_management":
         await handle_balance_management(callback, user, i18n, current_lang)
     elif action == "toggle_ban":
-        await handle_toggle_ban(callback, user, panel_service, session, i18n, current_lang)
+        await handle_toggle_ban(callback, user, panel_service, subscription_service,
+                                session, i18n, current_lang)
     elif action == "send_message":
         await handle_send_message_prompt(callback, state, user, i18n, current_lang)
     elif action == "view_logs":
@@ -350,8 +352,9 @@ async def handle_add_subscription_prompt(callback: types.CallbackQuery, state: F
 
 
 async def handle_toggle_ban(callback: types.CallbackQuery, user: User,
-                          panel_service: PanelApiService, session: AsyncSession,
-                          i18n_instance, lang: str):
+                          panel_service: PanelApiService,
+                          subscription_service: SubscriptionService,
+                          session: AsyncSession, i18n_instance, lang: str):
     """Toggle user ban status"""
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     
@@ -367,6 +370,9 @@ async def handle_toggle_ban(callback: types.CallbackQuery, user: User,
             await panel_service.update_user_status_on_panel(user.panel_user_uuid, not new_ban_status)
         
         await session.commit()
+        ban_registry = get_ban_registry()
+        if ban_registry:
+            ban_registry.set_banned(user.user_id, new_ban_status)
         
         status_text = _("admin_user_ban_action_banned", default="заблокирован") if new_ban_status else _("admin_user_ban_action_unbanned", default="разблокирован")
         await callback.answer(_(
@@ -377,12 +383,7 @@ async def handle_toggle_ban(callback: types.CallbackQuery, user: User,
         
         # Refresh user card with updated ban status
         user.is_banned = new_ban_status  # Update local object
-        from config.settings import Settings
-        from bot.services.panel_api_service import PanelApiService
-        settings = Settings()
-        async with PanelApiService(settings) as panel_service:
-            subscription_service = SubscriptionService(settings, panel_service)
-            await handle_refresh_user_card(callback, user, subscription_service, session, i18n_instance, lang)
+        await handle_refresh_user_card(callback, user, subscription_service, session, i18n_instance, lang)
         
     except Exception as e:
         logging.error(f"Error toggling ban for user {user.user_id}: {e}")
@@ -597,7 +598,8 @@ async def process_subscription_days_handler(message: types.Message, state: FSMCo
 @router.message(AdminStates.waiting_for_direct_message_to_user)
 async def process_direct_message_handler(message: types.Message, state: FSMContext,
                                        settings: Settings, i18n_data: dict,
-                                       bot: Bot, session: AsyncSession):
+                                       bot: Bot, session: AsyncSession,
+                                       subscription_service: SubscriptionService):
     """Process direct message to user"""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -673,17 +675,14 @@ async def process_direct_message_handler(message: types.Message, state: FSMConte
         ))
         
         # Show user card again  
-        from bot.services.panel_api_service import PanelApiService
-        async with PanelApiService(settings) as panel_service:
-            subscription_service = SubscriptionService(settings, panel_service)
-            user_card_text = await format_user_card(target_user, session, subscription_service, i18n, current_lang)
-            keyboard = get_user_card_keyboard(target_user.user_id, i18n, current_lang)
-            
-            await message.answer(
-                user_card_text,
-                reply_markup=keyboard.as_markup(),
-                parse_mode="HTML"
-            )
+        user_card_text = await format_user_card(target_user, session, subscription_service, i18n, current_lang)
+        keyboard = get_user_card_keyboard(target_user.user_id, i18n, current_lang)
+        
+        await message.answer(
+            user_card_text,
+            reply_markup=keyboard.as_markup(),
+            parse_mode="HTML"
+        )
         
     except Exception as e:
         logging.error(f"Error sending direct message to user {target_user_id}: {e}")
@@ -857,6 +856,9 @@ async def process_ban_user_handler(message: types.Message, state: FSMContext,
             await panel_service.update_user_status_on_panel(user_model.panel_user_uuid, False)
         
         await session.commit()
+        ban_registry = get_ban_registry()
+        if ban_registry:
+            ban_registry.set_banned(user_model.user_id, True)
         
         await message.answer(_(
             "admin_user_ban_success",
@@ -928,6 +930,9 @@ async def process_unban_user_handler(message: types.Message, state: FSMContext,
             await panel_service.update_user_status_on_panel(user_model.panel_user_uuid, True)
         
         await session.commit()
+        ban_registry = get_ban_registry()
+        if ban_registry:
+            ban_registry.set_banned(user_model.user_id, False)
         
         await message.answer(_(
             "admin_user_unban_success",
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import Settings
 from db.dal import user_dal, payment_dal
 from bot.services.referral_service import ReferralService
+from bot.services.panel_api_service import PanelApiService
 from bot.middlewares.i18n import JsonI18n
 
 router = Router(name="inline_mode_router")
@@ -18,7 +19,8 @@ async def inline_query_handler(inline_query: InlineQuery,
                                i18n_data: dict,
                                referral_service: ReferralService,
                                bot: Bot,
-                               session: AsyncSession):
+                               session: AsyncSession,
+                               panel_service: PanelApiService):
     """Handle inline queries for referral links and admin statistics"""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -46,7 +48,7 @@ async def inline_query_handler(inline_query: InlineQuery,
         # For admins: statistics
         if is_admin and (not query or "стат" in query or "stat" in query or "админ" in query or "admin" in query):
             stats_results = await create_admin_stats_results(
-                session, i18n, current_lang, settings
+                session, i18n, current_lang, settings, panel_service
             )
             results.extend(stats_results)
         
@@ -112,7 +114,8 @@ async def create_referral_result(inline_query: InlineQuery, bot: Bot,
         return None
 
 
-async def create_admin_stats_results(session: AsyncSession, i18n_instance, lang: str, settings: Settings) -> List[InlineQueryResultArticle]:
+async def create_admin_stats_results(session: AsyncSession, i18n_instance, lang: str, settings: Settings,
+                                     panel_service: PanelApiService) -> List[InlineQueryResultArticle]:
     """Create admin statistics results for inline query"""
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     results = []
@@ -129,7 +132,7 @@ async def create_admin_stats_results(session: AsyncSession, i18n_instance, lang:
             results.append(financial_stats_result)
         
         # Quick system stats
-        system_stats_result = await create_system_stats_result(session, i18n_instance, lang, settings)
+        system_stats_result = await create_system_stats_result(panel_service, i18n_instance, lang)
         if system_stats_result:
             results.append(system_stats_result)
             
@@ -235,90 +238,87 @@ async def create_financial_stats_result(session: AsyncSession, i18n_instance, la
         return None
 
 
-async def create_system_stats_result(session: AsyncSession, i18n_instance, lang: str, settings: Settings) -> Optional[InlineQueryResultArticle]:
+async def create_system_stats_result(panel_service: PanelApiService, i18n_instance, lang: str) -> Optional[InlineQueryResultArticle]:
     """Create panel statistics result with system/nodes/bandwidth info"""
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     
     try:
-        from bot.services.panel_api_service import PanelApiService
-        
         # Get panel stats similar to main statistics
-        async with PanelApiService(settings) as panel_service:
-            system_stats = await panel_service.get_system_stats()
-            bandwidth_stats = await panel_service.get_bandwidth_stats()
-            nodes_stats = await panel_service.get_nodes_statistics()
+        system_stats = await panel_service.get_system_stats()
+        bandwidth_stats = await panel_service.get_bandwidth_stats()
+        nodes_stats = await panel_service.get_nodes_statistics()
+        
+        if system_stats:
+            users = system_stats.get('users', {})
+            status_counts = users.get('statusCounts', {})
+            online_stats = system_stats.get('onlineStats', {})
             
-            if system_stats:
-                users = system_stats.get('users', {})
-                status_counts = users.get('statusCounts', {})
-                online_stats = system_stats.get('onlineStats', {})
-                
-                active_users = status_counts.get('ACTIVE', 0)
-                disabled_users = status_counts.get('DISABLED', 0) 
-                expired_users = status_counts.get('EXPIRED', 0)
-                limited_users = status_counts.get('LIMITED', 0)
-                total_users = users.get('totalUsers', 0)
-                online_now = online_stats.get('onlineNow', 0)
-                
-                # Memory usage
-                memory = system_stats.get('memory', {})
-                memory_usage = 0
-                if memory:
-                    memory_total = memory.get('total', 1)
-                    memory_used = memory.get('used', 0)
-                    memory_usage = (memory_used / memory_total) * 100 if memory_total > 0 else 0
-                
-                # Bandwidth
-                week_traffic = "N/A"
-                month_traffic = "N/A"
-                if bandwidth_stats:
-                    week_data = bandwidth_stats.get('bandwidthLastSevenDays', {})
-                    month_data = bandwidth_stats.get('bandwidthLast30Days', {}) or bandwidth_stats.get('bandwidthLastThirtyDays', {})
-                    
-                    week_traffic = week_data.get('current', 'N/A') if week_data else 'N/A'
-                    month_traffic = month_data.get('current', 'N/A') if month_data else 'N/A'
-                
-                # Nodes
-                active_nodes = 0
-                total_nodes = 0
-                if nodes_stats and 'lastSevenDays' in nodes_stats:
-                    unique_nodes = set()
-                    for node_data in nodes_stats.get('lastSevenDays', []):
-                        unique_nodes.add(node_data.get('nodeName', ''))
-                    total_nodes = len(unique_nodes)
-                    active_nodes = total_nodes  # Assume all are active
-                elif system_stats and 'nodes' in system_stats:
-                    active_nodes = system_stats.get('nodes', {}).get('totalOnline', 0)
-                    total_nodes = active_nodes
+            active_users = status_counts.get('ACTIVE', 0)
+            disabled_users = status_counts.get('DISABLED', 0) 
+            expired_users = status_counts.get('EXPIRED', 0)
+            limited_users = status_counts.get('LIMITED', 0)
+            total_users = users.get('totalUsers', 0)
+            online_now = online_stats.get('onlineNow', 0)
+            
+            # Memory usage
+            memory = system_stats.get('memory', {})
+            memory_usage = 0
+            if memory:
+                memory_total = memory.get('total', 1)
+                memory_used = memory.get('used', 0)
+                memory_usage = (memory_used / memory_total) * 100 if memory_total > 0 else 0
+            
+            # Bandwidth
+            week_traffic = "N/A"
+            month_traffic = "N/A"
+            if bandwidth_stats:
+                week_data = bandwidth_stats.get('bandwidthLastSevenDays', {})
+                month_data = bandwidth_stats.get('bandwidthLast30Days', {}) or bandwidth_stats.get('bandwidthLastThirtyDays', {})
                 
-                stats_text = _(
-                    "inline_system_stats_message",
-                    default="🖥 <b>Статистика панели</b>\n\n"
-                           "🟢 Онлайн: <b>{online}</b>\n"
-                           "📊 Активных: <b>{active}</b>\n"
-                           "🔴 Отключенных: <b>{disabled}</b>\n"
-                           "⏰ Истекшие: <b>{expired}</b>\n"
-                           "⚠️ Ограниченные: <b>{limited}</b>\n"
-                           "👥 Всего пользователей: <b>{total}</b>\n"
-                           "💾 Использование RAM: <b>{memory:.1f}%</b>\n"
-                           "📊 Трафик за неделю: <b>{week_traffic}</b>\n"
-                           "📊 Трафик за месяц: <b>{month_traffic}</b>\n"
-                           "🔗 Активных нод: <b>{active_nodes}/{total_nodes}</b>",
-                    online=online_now,
-                    active=active_users,
-                    disabled=disabled_users,
-                    expired=expired_users,
-                    limited=limited_users,
-                    total=total_users,
-                    memory=memory_usage,
-                    week_traffic=week_traffic,
-                    month_traffic=month_traffic,
-                    active_nodes=active_nodes,
-                    total_nodes=total_nodes
-                )
-            else:
-                stats_text = _("inline_panel_stats_error", default="❌ Ошибка получения данных с панели")
-        
+                week_traffic = week_data.get('current', 'N/A') if week_data else 'N/A'
+                month_traffic = month_data.get('current', 'N/A') if month_data else 'N/A'
+            
+            # Nodes
+            active_nodes = 0
+            total_nodes = 0
+            if nodes_stats and 'lastSevenDays' in nodes_stats:
+                unique_nodes = set()
+                for node_data in nodes_stats.get('lastSevenDays', []):
+                    unique_nodes.add(node_data.get('nodeName', ''))
+                total_nodes = len(unique_nodes)
+                active_nodes = total_nodes  # Assume all are active
+            elif system_stats and 'nodes' in system_stats:
+                active_nodes = system_stats.get('nodes', {}).get('totalOnline', 0)
+                total_nodes = active_nodes
+            
+            stats_text = _(
+                "inline_system_stats_message",
+                default="🖥 <b>Статистика панели</b>\n\n"
+                       "🟢 Онлайн: <b>{online}</b>\n"
+                       "📊 Активных: <b>{active}</b>\n"
+                       "🔴 Отключенных: <b>{disabled}</b>\n"
+                       "⏰ Истекшие: <b>{expired}</b>\n"
+                       "⚠️ Ограниченные: <b>{limited}</b>\n"
+                       "👥 Всего пользователей: <b>{total}</b>\n"
+                       "💾 Использование RAM: <b>{memory:.1f}%</b>\n"
+                       "📊 Трафик за неделю: <b>{week_traffic}</b>\n"
+                       "📊 Трафик за месяц: <b>{month_traffic}</b>\n"
+                       "🔗 Активных нод: <b>{active_nodes}/{total_nodes}</b>",
+                online=online_now,
+                active=active_users,
+                disabled=disabled_users,
+                expired=expired_users,
+                limited=limited_users,
+                total=total_users,
+                memory=memory_usage,
+                week_traffic=week_traffic,
+                month_traffic=month_traffic,
+                active_nodes=active_nodes,
+                total_nodes=total_nodes
+            )
+        else:
+            stats_text = _("inline_panel_stats_error", default="❌ Ошибка получения данных с панели")
+    
         return InlineQueryResultArticle(
             id="admin_system_stats",
             title=_(
@@ -22,6 +22,7 @@ from bot.middlewares.i18n import JsonI18n
 from config.settings import Settings
 from bot.services.notification_service import NotificationService
 from bot.keyboards.inline.user_keyboards import get_connect_and_main_keyboard
+from bot.utils.message_queue import send_transactional_message
 
 payment_processing_lock = asyncio.Lock()
 
@@ -188,7 +189,8 @@ async def process_successful_payment(session: AsyncSession, bot: Bot,
             user_lang, i18n, settings, config_link
         )
         try:
-            await bot.send_message(
+            await send_transactional_message(
+                bot,
                 user_id,
                 details_message,
                 reply_markup=details_markup,
@@ -203,14 +205,13 @@ async def process_successful_payment(session: AsyncSession, bot: Bot,
         # Send notification about payment
         try:
             notification_service = NotificationService(bot, settings, i18n)
-            user = await user_dal.get_user_by_id(session, user_id)
             await notification_service.notify_payment_received(
                 user_id=user_id,
                 amount=payment_value,
                 currency=settings.DEFAULT_CURRENCY_SYMBOL,
                 months=subscription_months,
                 payment_provider="yookassa",  # This is specifically for YooKassa webhook
-                username=user.username if user else None
+                username=db_user.username if db_user else None
             )
         except Exception as e:
             logging.error(f"Failed to send payment notification: {e}")
@@ -265,7 +266,7 @@ async def process_cancelled_payment(session: AsyncSession, bot: Bot,
         if db_user and db_user.language_code: user_lang = db_user.language_code
 
         _ = lambda key, **kwargs: i18n.gettext(user_lang, key, **kwargs)
-        await bot.send_message(user_id, _("payment_failed"))
+        await send_transactional_message(bot, user_id, _("payment_failed"))
 
     except Exception as e_process_cancel:
         logging.error(
@@ -16,7 +16,8 @@ from bot.services.panel_api_service import PanelApiService
 from bot.services.referral_service import ReferralService
 from bot.services.promo_code_service import PromoCodeService
 from config.settings import Settings
-from bot.middlewares.i18n import JsonI18n
+from bot.middlewares.i18n import JsonI18n, invalidate_user_language_on_commit
+from bot.middlewares.user_context import UserContext
 
 router = Router(name="user_start_router")
 
@@ -132,6 +133,7 @@ async def start_command_handler(message: types.Message,
                                 i18n_data: dict,
                                 subscription_service: SubscriptionService,
                                 session: AsyncSession,
+                                user_context: Optional[UserContext] = None,
                                 ref_match: Optional[re.Match] = None,
                                 promo_match: Optional[re.Match] = None):
     await state.clear()
@@ -154,7 +156,10 @@ async def start_command_handler(message: types.Message,
         promo_code_to_apply = promo_match.group(1)
         logging.info(f"User {user_id} started with promo code: {promo_code_to_apply}")
 
-    db_user = await user_dal.get_user_by_id(session, user_id)
+    if user_context:
+        db_user = await user_context.get_user()
+    else:
+        db_user = await user_dal.get_user_by_id(session, user_id)
     if not db_user:
         user_data_to_create = {
             "user_id": user_id,
@@ -169,6 +174,9 @@ async def start_command_handler(message: types.Message,
         }
         try:
             db_user, created = await user_dal.create_user(session, user_data_to_create)
+            if user_context:
+                user_context.set_user(db_user)
+            invalidate_user_language_on_commit(session, user_id)
 
             if created:
                 logging.info(
@@ -213,10 +221,15 @@ async def start_command_handler(message: types.Message,
             update_payload["first_name"] = user.first_name
         if user.last_name != db_user.last_name:
             update_payload["last_name"] = user.last_name
+        if db_user.bot_blocked_at is not None:
+            # The user is writing to us again, so the bot is no longer blocked
+            update_payload["bot_blocked_at"] = None
 
         if update_payload:
             try:
                 await user_dal.update_user(session, user_id, update_payload)
+                if "language_code" in update_payload:
+                    invalidate_user_language_on_commit(session, user_id)
 
                 logging.info(
                     f"Updated existing user {user_id} in session: {update_payload}"
@@ -347,6 +360,7 @@ async def select_language_callback_handler(
     try:
         updated = await user_dal.update_user_language(session, user_id,
                                                       lang_code)
+        invalidate_user_language_on_commit(session, user_id)
         if updated:
 
             i18n_data["current_language"] = lang_code
@@ -377,7 +391,8 @@ async def main_action_callback_handler(
         callback: types.CallbackQuery, state: FSMContext, settings: Settings,
         i18n_data: dict, bot: Bot, subscription_service: SubscriptionService,
         referral_service: ReferralService, panel_service: PanelApiService,
-        promo_code_service: PromoCodeService, session: AsyncSession):
+        promo_code_service: PromoCodeService, session: AsyncSession,
+        user_context: Optional[UserContext] = None):
     action = callback.data.split(":")[1]
     user_id = callback.from_user.id
 
@@ -397,7 +412,7 @@ async def main_action_callback_handler(
 
         await user_subscription_handlers.my_subscription_command_handler(
             callback, i18n_data, settings, panel_service, subscription_service,
-            session, bot)
+            session, bot, user_context)
     elif action == "referral":
         await user_referral_handlers.referral_command_handler(
             callback, settings, i18n_data, referral_service, bot, session)
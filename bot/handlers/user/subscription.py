@@ -18,6 +18,7 @@ from bot.services.subscription_service import SubscriptionService
 from bot.services.panel_api_service import PanelApiService
 from bot.services.referral_service import ReferralService
 from bot.middlewares.i18n import JsonI18n
+from bot.middlewares.user_context import UserContext
 
 router = Router(name="user_subscription_router")
 
@@ -211,7 +212,8 @@ async def pay_stars_callback_handler(
 async def pay_balance_callback_handler(
         callback: types.CallbackQuery, settings: Settings, i18n_data: dict,
         session: AsyncSession, bot: Bot, subscription_service: SubscriptionService,
-        referral_service: ReferralService, panel_service: PanelApiService):
+        referral_service: ReferralService, panel_service: PanelApiService,
+        user_context: Optional[UserContext] = None):
     """Handle payment with balance."""
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
     i18n: Optional[JsonI18n] = i18n_data.get("i18n_instance")
@@ -315,7 +317,9 @@ async def pay_balance_callback_handler(
         await session.commit()
 
         # Get subscription details for display
-        active_subscription = await subscription_service.get_active_subscription_details(session, user_id)
+        db_user = await user_context.get_user() if user_context else None
+        active_subscription = await subscription_service.get_active_subscription_details(
+            session, user_id, db_user=db_user)
         config_link = active_subscription.get("config_link") if active_subscription else None
         config_link = config_link or get_text("config_link_not_available")
         
@@ -641,7 +645,8 @@ async def my_subscription_command_handler(
     panel_service: PanelApiService,
     subscription_service: SubscriptionService,
     session: AsyncSession,
-    bot: Bot
+    bot: Bot,
+    user_context: Optional[UserContext] = None,
 ):
     target = event.message if isinstance(event, types.CallbackQuery) else event
     current_lang = i18n_data.get("current_language", settings.DEFAULT_LANGUAGE)
@@ -657,7 +662,9 @@ async def my_subscription_command_handler(
         await target.answer(get_text("error_service_unavailable"))
         return
 
-    active = await subscription_service.get_active_subscription_details(session, event.from_user.id)
+    db_user = await user_context.get_user() if user_context else None
+    active = await subscription_service.get_active_subscription_details(
+        session, event.from_user.id, db_user=db_user)
 
     if not active:
         text = get_text("subscription_not_active")
@@ -733,7 +740,8 @@ async def stars_pre_checkout_handler(pre_checkout_query: types.PreCheckoutQuery)
 @router.message(F.successful_payment)
 async def stars_successful_payment_handler(
         message: types.Message, settings: Settings, i18n_data: dict,
-        session: AsyncSession, stars_service: StarsService):
+        session: AsyncSession, stars_service: StarsService,
+        user_context: Optional[UserContext] = None):
     sp = message.successful_payment
     if not sp or sp.currency != "XTR":
         return
@@ -748,8 +756,10 @@ async def stars_successful_payment_handler(
         return
 
     stars_amount = sp.total_amount
+    db_user = await user_context.get_user() if user_context else None
     await stars_service.process_successful_payment(
-        session, message, payment_db_id, months, stars_amount, i18n_data)
+        session, message, payment_db_id, months, stars_amount, i18n_data,
+        db_user=db_user)
 
 
 @router.message(Command("connect"))
@@ -757,8 +767,9 @@ async def connect_command_handler(message: types.Message, i18n_data: dict,
                                   settings: Settings,
                                   panel_service: PanelApiService,
                                   subscription_service: SubscriptionService,
-                                  session: AsyncSession, bot: Bot):
+                                  session: AsyncSession, bot: Bot,
+                                  user_context: Optional[UserContext] = None):
     logging.info(f"User {message.from_user.id} used /connect command.")
     await my_subscription_command_handler(message, i18n_data, settings,
                                           panel_service, subscription_service,
-                                          session, bot)
+                                          session, bot, user_context)
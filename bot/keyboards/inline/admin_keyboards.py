@@ -5,7 +5,7 @@ import math
 
 from config.settings import Settings
 from bot.middlewares.i18n import JsonI18n
-from db.models import User
+from db.models import BroadcastJob, User
 
 
 def get_admin_panel_keyboard(i18n_instance, lang: str,
@@ -111,10 +111,12 @@ def get_system_functions_keyboard(i18n_instance, lang: str) -> InlineKeyboardMar
                    callback_data="admin_action:sync_panel")
     builder.button(text=_(key="admin_queue_status_button"),
                    callback_data="admin_action:queue_status")
+    builder.button(text=_(key="admin_broadcast_jobs_button"),
+                   callback_data="broadcast_job:list")
     
     builder.button(text=_(key="back_to_admin_panel_button"),
                    callback_data="admin_action:main")
-    builder.adjust(2, 1, 1)
+    builder.adjust(2, 2, 1)
     return builder.as_markup()
 
 
@@ -263,7 +265,8 @@ def get_confirmation_keyboard(yes_callback_data: str, no_callback_data: str,
 
 def get_broadcast_confirmation_keyboard(lang: str,
                                         i18n_instance,
-                                        target: str = "all") -> InlineKeyboardMarkup:
+                                        target: str = "all",
+                                        variant_languages: Optional[List[str]] = None) -> InlineKeyboardMarkup:
     _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
     builder = InlineKeyboardBuilder()
 
@@ -297,14 +300,74 @@ def get_broadcast_confirmation_keyboard(lang: str,
         text=mark_selected(target_inactive_label, target == "inactive"),
         callback_data="broadcast_target:inactive",
     )
-    builder.adjust(3)
+
+    # Row: per-language variants of the message
+    languages = sorted(getattr(i18n_instance, "locales_data", {}) or {})
+    for language in languages:
+        builder.button(
+            text=mark_selected(_(key="broadcast_variant_button", language=language.upper()),
+                               language in (variant_languages or [])),
+            callback_data=f"broadcast_variant:{language}",
+        )
 
     # Row: confirmation
     builder.button(text=_(key="confirm_broadcast_send_button", default="🚀 Отправить"),
                    callback_data="broadcast_final_action:send")
     builder.button(text=_(key="cancel_broadcast_button", default="❌ Отмена"),
                    callback_data="broadcast_final_action:cancel")
-    builder.adjust(2)
+    builder.adjust(3, *([len(languages)] if languages else []), 2)
+    return builder.as_markup()
+
+
+def get_broadcast_variant_keyboard(lang: str, i18n_instance, language: str,
+                                   has_variant: bool) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    if has_variant:
+        builder.button(text=_(key="broadcast_variant_remove_button", language=language.upper()),
+                       callback_data="broadcast_variant_action:remove")
+    builder.button(text=_(key="broadcast_variant_back_button"),
+                   callback_data="broadcast_variant_action:back")
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def _add_broadcast_job_buttons(builder: InlineKeyboardBuilder, _, job_id: int,
+                               paused: bool, suffix: str = "") -> None:
+    # suffix ":list" makes the handler redraw the job list after the action
+    if paused:
+        builder.button(text=_(key="broadcast_job_resume_button", job_id=job_id),
+                       callback_data=f"broadcast_job:resume:{job_id}{suffix}")
+    else:
+        builder.button(text=_(key="broadcast_job_pause_button", job_id=job_id),
+                       callback_data=f"broadcast_job:pause:{job_id}{suffix}")
+    builder.button(text=_(key="broadcast_job_cancel_button", job_id=job_id),
+                   callback_data=f"broadcast_job:cancel:{job_id}{suffix}")
+
+
+def get_broadcast_job_controls_keyboard(i18n_instance, lang: str, job_id: int,
+                                        paused: bool = False) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    _add_broadcast_job_buttons(builder, _, job_id, paused)
+    builder.button(text=_(key="admin_broadcast_jobs_button"),
+                   callback_data="broadcast_job:list")
+    builder.adjust(2, 1)
+    return builder.as_markup()
+
+
+def get_broadcast_jobs_keyboard(i18n_instance, lang: str,
+                                jobs: List[BroadcastJob]) -> InlineKeyboardMarkup:
+    _ = lambda key, **kwargs: i18n_instance.gettext(lang, key, **kwargs)
+    builder = InlineKeyboardBuilder()
+    active_jobs = [job for job in jobs if job.status in ("running", "paused")]
+    for job in active_jobs:
+        _add_broadcast_job_buttons(builder, _, job.job_id, job.status == "paused", ":list")
+    builder.button(text=_(key="broadcast_jobs_refresh_button"),
+                   callback_data="broadcast_job:list")
+    builder.button(text=_(key="back_to_admin_panel_button"),
+                   callback_data="admin_section:system_functions")
+    builder.adjust(*([2] * len(active_jobs)), 1, 1)
     return builder.as_markup()
 
 
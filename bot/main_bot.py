@@ -39,6 +39,10 @@ from bot.services.crypto_pay_service import CryptoPayService, cryptopay_webhook_
 from bot.handlers.user import payment as user_payment_webhook_module
 from bot.handlers.admin.sync_admin import perform_sync
 from bot.utils.message_queue import init_queue_manager
+from bot.utils.ban_registry import init_ban_registry
+from bot.utils.log_digest import init_log_digest
+from bot.utils.metrics import get_metrics, instrument_engine
+from bot.middlewares.i18n import get_user_language_cache
 
 
 async def register_all_routers(dp: Dispatcher, settings: Settings):
@@ -144,12 +148,51 @@ async def on_startup_configured(dispatcher: Dispatcher):
 
     # Initialize message queue manager
     try:
-        queue_manager = init_queue_manager(bot)
+        queue_manager = init_queue_manager(
+            bot,
+            settings=settings,
+            async_session_factory=async_session_factory,
+        )
+        queue_manager.start()
         dispatcher["queue_manager"] = queue_manager
-        logging.info("STARTUP: Message queue manager initialized")
+        get_metrics().register_provider("message_queues", queue_manager.get_queue_stats)
+        logging.info(f"STARTUP: Message queue manager initialized ({queue_manager.backend} backend)")
     except Exception as e:
         logging.error(f"STARTUP: Failed to initialize message queue manager: {e}", exc_info=True)
 
+    # Coalesce log channel notifications into digests
+    if settings.LOG_CHAT_ID and settings.LOG_DIGEST_WINDOW_SECONDS > 0:
+        log_digest = init_log_digest(
+            bot,
+            window=settings.LOG_DIGEST_WINDOW_SECONDS,
+            max_messages=settings.LOG_DIGEST_MAX_MESSAGES,
+        )
+        dispatcher["log_digest"] = log_digest
+        get_metrics().register_provider("log_digest", log_digest.get_stats)
+        logging.info(f"STARTUP: Log channel digest enabled ({settings.LOG_DIGEST_WINDOW_SECONDS:g}s window)")
+
+    # Load banned user IDs for the per-update ban check
+    try:
+        ban_registry = init_ban_registry()
+        async with async_session_factory() as session:
+            banned_count = await ban_registry.load(session)
+        logging.info(f"STARTUP: Ban registry loaded with {banned_count} banned users")
+        get_metrics().register_provider("ban_registry", lambda: {"banned_users": len(ban_registry)})
+    except Exception as e:
+        logging.error(f"STARTUP: Failed to load ban registry, ban check will query the DB: {e}", exc_info=True)
+
+    message_log_writer = dispatcher.get("message_log_writer")
+    if message_log_writer:
+        message_log_writer.start()
+
+    # Continue broadcast jobs interrupted by the last shutdown
+    broadcast_service = dispatcher.get("broadcast_service")
+    if broadcast_service:
+        try:
+            await broadcast_service.start()
+        except Exception as e:
+            logging.error(f"STARTUP: Failed to resume broadcast jobs: {e}", exc_info=True)
+
     # Automatic sync on startup
     try:
         logging.info("STARTUP: Running automatic panel sync...")
@@ -197,6 +240,7 @@ async def on_shutdown_configured(dispatcher: Dispatcher):
                     logging.warning(f"Failed to close session for {key}: {e}")
 
     for service_key in (
+        "panel_profile_sync_service",
         "panel_service",
         "cryptopay_service",
         "tribute_service",
@@ -206,6 +250,10 @@ async def on_shutdown_configured(dispatcher: Dispatcher):
         "stars_service",
         "subscription_service",
         "referral_service",
+        "broadcast_service",
+        "log_digest",
+        "queue_manager",
+        "message_log_writer",
     ):
         await close_service(service_key)
 
@@ -260,6 +308,19 @@ async def run_bot(settings_param: Settings):
     dp["panel_service"] = services["panel_service"]
     dp["async_session_factory"] = local_async_session_factory
 
+    metrics = get_metrics()
+    for key in ("message_log_writer", "panel_profile_sync_service", "broadcast_service",
+                "panel_service"):
+        if services.get(key):
+            metrics.register_provider(key, services[key].get_stats)
+    language_cache = get_user_language_cache()
+    if language_cache:
+        metrics.register_provider("language_cache", language_cache.get_stats)
+
+    from db.database_setup import async_engine as global_async_engine
+    if global_async_engine:
+        instrument_engine(global_async_engine)
+
     # Wrap startup/shutdown handlers to satisfy aiogram event signature (no args passed)
     async def _on_startup_wrapper():
         await on_startup_configured(dp)
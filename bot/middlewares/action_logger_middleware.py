@@ -1,4 +1,5 @@
 import logging
+import random
 from typing import Callable, Dict, Any, Awaitable, Optional
 from datetime import datetime, timezone
 
@@ -6,24 +7,67 @@ from aiogram import BaseMiddleware
 from aiogram.types import Update, User, Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.dal import message_log_dal, user_dal
+from db.dal import message_log_dal
+from db.models import User as DbUser
 from config.settings import Settings
 
+from .user_context import UserContext
+from ..services.message_log_writer import MessageLogWriter
+
+
+class LazyRawUpdatePreview:
+    """Defers serializing the update until the log record is persisted."""
+
+    __slots__ = ("event", )
+
+    def __init__(self, event: Update):
+        self.event = event
+
+    def __call__(self) -> str:
+        try:
+            return self.event.model_dump_json(exclude_none=True,
+                                              indent=None)[:1000]
+        except Exception:
+            return str(self.event)[:1000]
+
 
 class ActionLoggerMiddleware(BaseMiddleware):
 
     def __init__(self, settings: Settings):
         super().__init__()
         self.settings = settings
+        self.raw_sample_rate = min(
+            max(settings.ACTION_LOG_RAW_UPDATE_SAMPLE_PERCENT, 0.0), 100.0) / 100
 
     async def __call__(self, handler: Callable[[Update, Dict[str, Any]],
                                                Awaitable[Any]], event: Update,
                        data: Dict[str, Any]) -> Any:
 
-        result = await handler(event, data)
+        try:
+            result = await handler(event, data)
+        except Exception:
+            try:
+                await self._log_event(event, data, handler_failed=True)
+            except Exception as e_log:
+                logging.error(
+                    f"ActionLoggerMiddleware: Failed to log failed update: {e_log}")
+            raise
+
+        await self._log_event(event, data, handler_failed=False)
+        return result
 
+    def _should_capture_raw(self, is_admin_event: bool,
+                            handler_failed: bool) -> bool:
+        if handler_failed or is_admin_event:
+            return True
+        return self.raw_sample_rate > 0 and random.random(
+        ) < self.raw_sample_rate
+
+    async def _log_event(self, event: Update, data: Dict[str, Any],
+                         handler_failed: bool) -> None:
         session: AsyncSession = data["session"]
         event_user: Optional[User] = data.get("event_from_user")
+        user_context: Optional[UserContext] = data.get("user_context")
 
         user_id: Optional[int] = None
         telegram_username: Optional[str] = None
@@ -40,13 +84,9 @@ class ActionLoggerMiddleware(BaseMiddleware):
                 is_admin_event_flag = True
 
         raw_update_snippet = None
-        try:
-            raw_update_snippet = event.model_dump_json(exclude_none=True,
-                                                       indent=None)[:1000]
-        except AttributeError:
-            raw_update_snippet = str(event)[:1000]
-        except Exception:
-            raw_update_snippet = str(event)[:1000]
+        if self._should_capture_raw(is_admin_event_flag, handler_failed):
+            # Serialized only when the writer actually persists the record
+            raw_update_snippet = LazyRawUpdatePreview(event)
 
         current_event_type = event.event_type
 
@@ -69,9 +109,21 @@ class ActionLoggerMiddleware(BaseMiddleware):
 
         if user_id or current_event_type not in ["update"]:
 
+            log_writer: Optional[MessageLogWriter] = data.get(
+                "message_log_writer")
+
             log_user_id_for_db = user_id
-            if user_id:
-                user_exists = await user_dal.get_user_by_id(session, user_id)
+            # Don't load the user just for logging: the writer nulls unknown
+            # user IDs itself if the batch insert hits the FK constraint.
+            needs_user_check = bool(user_id) and not (
+                log_writer and not (user_context and user_context.is_loaded))
+            if needs_user_check:
+                user_exists = await user_context.get_user(
+                ) if user_context else None
+                if not user_exists:
+                    # The handler may have just created the user (e.g. /start);
+                    # session.get() resolves it from the identity map for free.
+                    user_exists = await session.get(DbUser, user_id)
                 if not user_exists:
                     logging.warning(
                         f"ActionLoggerMiddleware: User {user_id} not found in DB. Logging action with user_id=NULL."
@@ -90,12 +142,14 @@ class ActionLoggerMiddleware(BaseMiddleware):
                 "timestamp": datetime.now(timezone.utc)
             }
             try:
-
-                await message_log_dal.create_message_log_no_commit(
-                    session, log_payload)
+                if log_writer:
+                    log_writer.submit(log_payload)
+                else:
+                    if raw_update_snippet is not None:
+                        log_payload["raw_update_preview"] = raw_update_snippet()
+                    await message_log_dal.create_message_log_no_commit(
+                        session, log_payload)
             except Exception as e_log:
                 logging.error(
                     f"ActionLoggerMiddleware: Failed to add log to session for user {user_id}, type {current_event_type}: {e_log}",
                     exc_info=True)
-
-        return result
@@ -3,13 +3,13 @@ from typing import Callable, Dict, Any, Awaitable, Optional, Union
 
 from aiogram import BaseMiddleware, Bot
 from aiogram.types import Message, CallbackQuery, User, Update, InlineKeyboardMarkup
-from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramBadRequest, AiogramError
 
 from config.settings import Settings
-from db.dal import user_dal
 
 from .i18n import JsonI18n
+from .user_context import UserContext
+from ..utils.ban_registry import get_ban_registry
 from ..keyboards.inline.user_keyboards import get_user_banned_keyboard
 
 
@@ -23,7 +23,7 @@ class BanCheckMiddleware(BaseMiddleware):
     async def __call__(self, handler: Callable[[Update, Dict[str, Any]],
                                                Awaitable[Any]], event: Update,
                        data: Dict[str, Any]) -> Any:
-        session: AsyncSession = data["session"]
+        user_context: Optional[UserContext] = data.get("user_context")
         event_user: Optional[User] = data.get("event_from_user")
         bot_instance: Bot = data["bot"]
 
@@ -33,16 +33,22 @@ class BanCheckMiddleware(BaseMiddleware):
         if event_user.id in self.settings.ADMIN_IDS:
             return await handler(event, data)
 
-        try:
-            db_user_model = await user_dal.get_user_by_id(
-                session, event_user.id)
-        except Exception as e_db:
-            logging.error(
-                f"BanCheckMiddleware: DB error fetching user {event_user.id}: {e_db}",
-                exc_info=True)
+        ban_registry = get_ban_registry()
+        if ban_registry and ban_registry.is_loaded:
+            is_banned = ban_registry.is_banned(event_user.id)
+        elif user_context:
+            try:
+                db_user_model = await user_context.get_user()
+            except Exception as e_db:
+                logging.error(
+                    f"BanCheckMiddleware: DB error fetching user {event_user.id}: {e_db}",
+                    exc_info=True)
+                return await handler(event, data)
+            is_banned = bool(db_user_model and db_user_model.is_banned)
+        else:
             return await handler(event, data)
 
-        if db_user_model and db_user_model.is_banned:
+        if is_banned:
             logging.info(
                 f"User {event_user.id} ({event_user.username or 'NoUsername'}) is banned. Blocking access."
             )
@@ -5,6 +5,8 @@ from aiogram import BaseMiddleware
 from aiogram.types import Update
 from sqlalchemy.orm import sessionmaker
 
+from db.database_setup import session_has_writes
+
 
 class DBSessionMiddleware(BaseMiddleware):
 
@@ -24,12 +26,17 @@ class DBSessionMiddleware(BaseMiddleware):
                 "async_session_factory not provided to DBSessionMiddleware"
             )
 
+        # AsyncSession checks out a pooled connection only when the first
+        # statement runs, so updates that never touch the DB hold no pool slot.
         async with self.async_session_factory() as session:
             data["session"] = session
             try:
                 result = await handler(event, data)
 
-                await session.commit()
+                # Read-only updates skip COMMIT; closing the session releases
+                # the connection (rollback-on-return) which is enough for them.
+                if session_has_writes(session):
+                    await session.commit()
                 return result
             except Exception:
                 await session.rollback()
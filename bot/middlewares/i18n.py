@@ -1,15 +1,20 @@
 import logging
 import json
 import os
-from typing import Any, Awaitable, Callable, Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from aiogram import BaseMiddleware
 from aiogram.types import User, Update
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from db.dal import user_dal
 from config.settings import Settings
 
+from .user_context import UserContext
+
 
 class JsonI18n:
 
@@ -104,27 +109,141 @@ def get_i18n_instance(path: str = "locales",
     return _i18n_instance_singleton
 
 
+class UserLanguageCache:
+    """Bounded LRU cache of user_id -> language_code stored in the DB.
+
+    ``None`` is cached too (user not registered or no language set), so the
+    middleware falls back to the Telegram client language without a query.
+    Entries expire after ``ttl_seconds`` and are dropped explicitly whenever
+    a handler changes the user's language. ``generation`` moves on every
+    drop, so a DB read that raced with a change is not cached.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 600):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[Optional[str], float]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, user_id: int) -> Tuple[bool, Optional[str]]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return True, entry[0]
+
+    def set(self, user_id: int, language_code: Optional[str],
+            generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[user_id] = (language_code,
+                                  time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        self.generation += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_user_language_cache: Optional[UserLanguageCache] = None
+
+
+def init_user_language_cache(max_size: int,
+                             ttl_seconds: float) -> UserLanguageCache:
+    global _user_language_cache
+    _user_language_cache = UserLanguageCache(max_size=max_size,
+                                             ttl_seconds=ttl_seconds)
+    return _user_language_cache
+
+
+def get_user_language_cache() -> Optional[UserLanguageCache]:
+    return _user_language_cache
+
+
+def invalidate_user_language(user_id: int) -> None:
+    if _user_language_cache:
+        _user_language_cache.invalidate(user_id)
+
+
+_LANGUAGE_INVALIDATIONS_KEY = "invalidate_user_languages"
+
+
+def invalidate_user_language_on_commit(session: AsyncSession,
+                                       user_id: int) -> None:
+    """Drop the cached language once the session commits the change.
+
+    Dropping it before the commit would let a concurrent update re-read
+    the old row and cache it for the whole TTL.
+    """
+    session.sync_session.info.setdefault(_LANGUAGE_INVALIDATIONS_KEY,
+                                         set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_language_invalidations(session: Session) -> None:
+    for user_id in session.info.pop(_LANGUAGE_INVALIDATIONS_KEY, ()):
+        invalidate_user_language(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_language_invalidations(session: Session) -> None:
+    session.info.pop(_LANGUAGE_INVALIDATIONS_KEY, None)
+
+
 class I18nMiddleware(BaseMiddleware):
 
     def __init__(self, i18n: JsonI18n, settings: Settings):
         super().__init__()
         self.i18n = i18n
         self.settings = settings
+        self.language_cache = init_user_language_cache(
+            settings.LANGUAGE_CACHE_SIZE, settings.LANGUAGE_CACHE_TTL_SECONDS)
+
+    async def _get_db_language(self, user_id: int,
+                               user_context: Optional[UserContext]
+                               ) -> Optional[str]:
+        found, language_code = self.language_cache.lookup(user_id)
+        if found:
+            return language_code
+        generation = self.language_cache.generation
+        user_db_model = await user_context.get_user(
+        ) if user_context else None
+        language_code = user_db_model.language_code if user_db_model else None
+        self.language_cache.set(user_id, language_code, generation=generation)
+        return language_code
 
     async def __call__(self, handler: Callable[[Update, Dict[str, Any]],
                                                Awaitable[Any]], event: Update,
                        data: Dict[str, Any]) -> Any:
-        session: AsyncSession = data["session"]
         event_user: Optional[User] = data.get("event_from_user")
+        user_context: Optional[UserContext] = data.get("user_context")
 
         current_language = self.i18n.default_lang
 
         if event_user:
             try:
-                user_db_model = await user_dal.get_user_by_id(
-                    session, event_user.id)
-                if user_db_model and user_db_model.language_code and user_db_model.language_code in self.i18n.locales_data:
-                    current_language = user_db_model.language_code
+                db_language = await self._get_db_language(
+                    event_user.id, user_context)
+                if db_language and db_language in self.i18n.locales_data:
+                    current_language = db_language
                 elif event_user.language_code:
                     lang_prefix = event_user.language_code.split(
                         '-')[0].lower()
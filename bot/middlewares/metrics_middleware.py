@@ -0,0 +1,108 @@
+import time
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update, TelegramObject
+
+from bot.utils.metrics import get_metrics, start_db_query_count, finish_db_query_count
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outermost middleware: whole-update latency and DB statements per update."""
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = get_metrics()
+        token = start_db_query_count()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - start
+            query_count = finish_db_query_count(token)
+            event_type = event.event_type
+            metrics.observe("update", event_type, elapsed)
+            metrics.observe("update", "_all", elapsed)
+            metrics.increment("updates", event_type)
+            metrics.increment("db_queries", event_type, query_count)
+            metrics.increment("db_queries_per_update",
+                              str(query_count) if query_count < 10 else "10+")
+
+
+class TimedMiddleware(BaseMiddleware):
+    """Wraps an outer middleware and records its own time, excluding downstream."""
+
+    def __init__(self, inner: BaseMiddleware, name: Optional[str] = None):
+        super().__init__()
+        self.inner = inner
+        self.name = name or type(inner).__name__
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        downstream_elapsed = 0.0
+
+        async def timed_handler(event_: TelegramObject, data_: Dict[str, Any]) -> Any:
+            nonlocal downstream_elapsed
+            downstream_start = time.perf_counter()
+            try:
+                return await handler(event_, data_)
+            finally:
+                downstream_elapsed += time.perf_counter() - downstream_start
+
+        start = time.perf_counter()
+        try:
+            return await self.inner(timed_handler, event, data)
+        finally:
+            own_elapsed = time.perf_counter() - start - downstream_elapsed
+            get_metrics().observe("middleware", self.name, own_elapsed)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: latency of the matched handler, labelled router.handler."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - start
+            handler_object = data.get("handler")
+            router = data.get("event_router")
+            handler_name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+            router_name = getattr(router, "name", "unknown")
+            get_metrics().observe("handler", f"{router_name}.{handler_name}", elapsed)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: latency of outgoing Bot API calls per method."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        start = time.perf_counter()
+        method_name = type(method).__name__
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            get_metrics().increment("bot_api_errors", method_name)
+            raise
+        finally:
+            get_metrics().observe("bot_api", method_name, time.perf_counter() - start)
@@ -1,15 +1,32 @@
 import logging
+from collections import OrderedDict
 from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Update, User as TgUser
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.dal import user_dal
+from .user_context import UserContext
 
 
 class ProfileSyncMiddleware(BaseMiddleware):
 
+    def __init__(self, fingerprint_cache_size: int = 50000):
+        super().__init__()
+        # user_id -> fingerprint of the profile last confirmed to match the DB
+        self._fingerprints: "OrderedDict[int, int]" = OrderedDict()
+        self.fingerprint_cache_size = max(1, fingerprint_cache_size)
+
+    @staticmethod
+    def _fingerprint(tg_user: TgUser) -> int:
+        return hash((tg_user.username, tg_user.first_name, tg_user.last_name))
+
+    def _remember(self, user_id: int, fingerprint: int) -> None:
+        self._fingerprints[user_id] = fingerprint
+        self._fingerprints.move_to_end(user_id)
+        while len(self._fingerprints) > self.fingerprint_cache_size:
+            self._fingerprints.popitem(last=False)
+
     async def __call__(
         self,
         handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
@@ -18,48 +35,56 @@ class ProfileSyncMiddleware(BaseMiddleware):
     ) -> Any:
         session: AsyncSession = data.get("session")
         tg_user: Optional[TgUser] = data.get("event_from_user")
+        user_context: Optional[UserContext] = data.get("user_context")
 
-        if session and tg_user:
-            try:
-                db_user = await user_dal.get_user_by_id(session, tg_user.id)
-                if db_user:
-                    update_payload: Dict[str, Any] = {}
-                    if db_user.username != tg_user.username:
-                        update_payload["username"] = tg_user.username
-                    if db_user.first_name != tg_user.first_name:
-                        update_payload["first_name"] = tg_user.first_name
-                    if db_user.last_name != tg_user.last_name:
-                        update_payload["last_name"] = tg_user.last_name
+        if not (session and tg_user and user_context):
+            return await handler(event, data)
 
-                    if update_payload:
-                        await user_dal.update_user(session, tg_user.id, update_payload)
-                        logging.info(
-                            f"ProfileSyncMiddleware: Updated user {tg_user.id} profile fields: {list(update_payload.keys())}"
-                        )
+        fingerprint = self._fingerprint(tg_user)
+        if self._fingerprints.get(tg_user.id) == fingerprint:
+            self._fingerprints.move_to_end(tg_user.id)
+            return await handler(event, data)
 
-                        # Also update description on panel if linked
-                        try:
-                            panel_service = data.get("panel_service")
-                            if panel_service and db_user.panel_user_uuid:
-                                description_text = "\n".join([
-                                    tg_user.username or "",
-                                    tg_user.first_name or "",
-                                    tg_user.last_name or "",
-                                ])
-                                await panel_service.update_user_details_on_panel(
-                                    db_user.panel_user_uuid,
-                                    {"description": description_text},
-                                )
-                        except Exception as e_upd_desc:
-                            logging.warning(
-                                f"ProfileSyncMiddleware: Failed to update panel description for user {tg_user.id}: {e_upd_desc}"
-                            )
-            except Exception as e:
-                logging.error(
-                    f"ProfileSyncMiddleware: Failed to sync profile for user {getattr(tg_user, 'id', 'N/A')}: {e}",
-                    exc_info=True,
-                )
+        try:
+            db_user = await user_context.get_user()
+            if db_user:
+                update_payload: Dict[str, Any] = {}
+                if db_user.username != tg_user.username:
+                    update_payload["username"] = tg_user.username
+                if db_user.first_name != tg_user.first_name:
+                    update_payload["first_name"] = tg_user.first_name
+                if db_user.last_name != tg_user.last_name:
+                    update_payload["last_name"] = tg_user.last_name
 
-        return await handler(event, data)
+                if update_payload:
+                    # Mutate the shared row in place so later middlewares
+                    # and the handler see the fresh values without a reload.
+                    for key, value in update_payload.items():
+                        setattr(db_user, key, value)
+                    await session.flush()
+                    logging.info(
+                        f"ProfileSyncMiddleware: Updated user {tg_user.id} profile fields: {list(update_payload.keys())}"
+                    )
 
+                    # Also update description on panel if linked; sent in the
+                    # background so a slow panel never delays the handler.
+                    panel_profile_sync = data.get("panel_profile_sync_service")
+                    if panel_profile_sync and db_user.panel_user_uuid:
+                        description_text = "\n".join([
+                            tg_user.username or "",
+                            tg_user.first_name or "",
+                            tg_user.last_name or "",
+                        ])
+                        panel_profile_sync.schedule_description_update(
+                            db_user.panel_user_uuid, description_text)
+                else:
+                    # Only cache once the DB is known to match; a fresh update
+                    # is confirmed on the next event, after it was committed.
+                    self._remember(tg_user.id, fingerprint)
+        except Exception as e:
+            logging.error(
+                f"ProfileSyncMiddleware: Failed to sync profile for user {getattr(tg_user, 'id', 'N/A')}: {e}",
+                exc_info=True,
+            )
 
+        return await handler(event, data)
@@ -0,0 +1,123 @@
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update, User
+
+from config.settings import Settings
+from bot.utils.metrics import get_metrics
+from bot.utils.rate_limit import TokenBucket
+
+from .i18n import JsonI18n
+
+
+def parse_throttle_rules(raw_rules: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse ``key=rate/burst`` pairs separated by commas.
+
+    Keys are update types (``message``, ``callback_query``, ``inline_query``)
+    or ``callback:<prefix>`` for callback data starting with ``<prefix>:``.
+    """
+    rules: Dict[str, Tuple[float, float]] = {}
+    for chunk in (raw_rules or "").split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        try:
+            key, value = chunk.split("=", 1)
+            rate_str, burst_str = value.split("/", 1)
+            rules[key.strip()] = (float(rate_str), float(burst_str))
+        except ValueError:
+            logging.error(f"Invalid throttle rule '{chunk}', expected key=rate/burst. Skipped.")
+    return rules
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Per-user token-bucket flood control.
+
+    Runs before the DB session is opened, so throttled events cost nothing
+    beyond a dict lookup. Throttled callback queries get a short alert so the
+    client stops spinning; other throttled events are dropped silently.
+    Payments (pre-checkout queries and successful_payment messages) and admins
+    are never throttled.
+    """
+
+    _PRUNE_EVERY = 5000
+
+    def __init__(self, settings: Settings, i18n: Optional[JsonI18n] = None):
+        super().__init__()
+        self.settings = settings
+        self.i18n = i18n
+        self.rules = parse_throttle_rules(settings.THROTTLE_RULES)
+        self._buckets: Dict[Tuple[int, str], TokenBucket] = {}
+        self._calls_since_prune = 0
+        self.throttled_count = 0
+
+    def _resolve_rule_key(self, event: Update) -> Optional[str]:
+        if event.callback_query:
+            callback_data = event.callback_query.data or ""
+            prefix_key = f"callback:{callback_data.split(':', 1)[0]}"
+            if prefix_key in self.rules:
+                return prefix_key
+            return "callback_query" if "callback_query" in self.rules else None
+        # Payments: a throttled pre-checkout query times out the payment
+        if event.pre_checkout_query or (event.message and event.message.successful_payment):
+            return None
+        event_type = event.event_type
+        return event_type if event_type in self.rules else None
+
+    def _prune_idle_buckets(self, now: float) -> None:
+        self._calls_since_prune = 0
+        idle_keys = [key for key, bucket in self._buckets.items() if bucket.is_full(now)]
+        for key in idle_keys:
+            del self._buckets[key]
+
+    def _allow(self, user_id: int, rule_key: str) -> bool:
+        now = time.monotonic()
+        self._calls_since_prune += 1
+        if self._calls_since_prune >= self._PRUNE_EVERY:
+            self._prune_idle_buckets(now)
+
+        bucket_key = (user_id, rule_key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            rate, burst = self.rules[rule_key]
+            bucket = self._buckets[bucket_key] = TokenBucket(rate, burst, now=now)
+        return bucket.try_consume(now=now)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "active_buckets": len(self._buckets),
+            "throttled": self.throttled_count,
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        event_user: Optional[User] = data.get("event_from_user")
+        if not event_user or not self.rules or event_user.id in self.settings.ADMIN_IDS:
+            return await handler(event, data)
+
+        rule_key = self._resolve_rule_key(event)
+        if rule_key is None or self._allow(event_user.id, rule_key):
+            return await handler(event, data)
+
+        self.throttled_count += 1
+        get_metrics().increment("throttled", rule_key)
+        if event.callback_query:
+            try:
+                await event.callback_query.answer(self._throttled_text(event_user))
+            except Exception as e:
+                logging.debug(f"ThrottlingMiddleware: failed to answer throttled callback: {e}")
+        return None
+
+    def _throttled_text(self, event_user: User) -> str:
+        if not self.i18n:
+            return "Too many requests, please slow down."
+        lang = (event_user.language_code or "").split("-")[0].lower()
+        if lang not in self.i18n.locales_data:
+            lang = self.settings.DEFAULT_LANGUAGE
+        return self.i18n.gettext(lang, "throttled_alert")
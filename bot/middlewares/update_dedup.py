@@ -0,0 +1,59 @@
+import logging
+from collections import deque
+from typing import Callable, Dict, Any, Awaitable, Deque, Set
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.utils.metrics import get_metrics
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """Drops updates whose update_id was already seen recently.
+
+    Telegram redelivers a webhook update when the previous delivery timed out,
+    so the same update_id may arrive twice. The last ``window_size`` IDs are
+    kept in a ring buffer backed by a set for O(1) lookups. The ID is recorded
+    before the handler runs, so a retry that arrives while the first delivery
+    is still being processed is dropped too.
+    """
+
+    def __init__(self, window_size: int = 10000):
+        super().__init__()
+        self.window_size = max(1, window_size)
+        self._recent_ids: Deque[int] = deque()
+        self._recent_set: Set[int] = set()
+        self.duplicates_dropped = 0
+
+    def _remember(self, update_id: int) -> bool:
+        """Record the ID. Returns False if it was already seen."""
+        if update_id in self._recent_set:
+            return False
+        if len(self._recent_ids) >= self.window_size:
+            self._recent_set.discard(self._recent_ids.popleft())
+        self._recent_ids.append(update_id)
+        self._recent_set.add(update_id)
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "window_size": self.window_size,
+            "tracked_ids": len(self._recent_ids),
+            "duplicates_dropped": self.duplicates_dropped,
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not self._remember(event.update_id):
+            self.duplicates_dropped += 1
+            get_metrics().increment("updates", "duplicate_dropped")
+            logging.info(
+                f"UpdateDeduplicationMiddleware: Dropped duplicate update {event.update_id} "
+                f"({self.duplicates_dropped} duplicates so far)."
+            )
+            return None
+        return await handler(event, data)
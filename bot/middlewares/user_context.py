@@ -0,0 +1,62 @@
+import logging
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update, User as TgUser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.dal import user_dal
+from db.models import User
+
+
+class UserContext:
+    """Per-update holder of the DB user row.
+
+    The row is fetched at most once per update, on first access, and then
+    shared by every middleware and handler that asks for it.
+    """
+
+    def __init__(self, session: AsyncSession, user_id: Optional[int]):
+        self.session = session
+        self.user_id = user_id
+        self._user: Optional[User] = None
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def get_user(self) -> Optional[User]:
+        if not self._loaded:
+            if self.user_id is not None:
+                self._user = await user_dal.get_user_by_id(
+                    self.session, self.user_id)
+            self._loaded = True
+        return self._user
+
+    def set_user(self, user: Optional[User]) -> None:
+        """Replace the cached row, e.g. after the handler created the user."""
+        self._user = user
+        self._loaded = True
+
+
+class UserContextMiddleware(BaseMiddleware):
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        session: Optional[AsyncSession] = data.get("session")
+        tg_user: Optional[TgUser] = data.get("event_from_user")
+
+        if session is None:
+            logging.error(
+                "UserContextMiddleware: session is missing, DBSessionMiddleware must run first."
+            )
+            return await handler(event, data)
+
+        data["user_context"] = UserContext(session,
+                                           tg_user.id if tg_user else None)
+        return await handler(event, data)
@@ -0,0 +1,373 @@
+import asyncio
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import Settings
+from db.dal import broadcast_dal, user_dal
+from db.models import BroadcastJob
+from bot.utils import MessageContent, send_message_via_queue
+from bot.utils.broadcast_progress import BroadcastProgress
+from bot.utils.message_queue import PRIORITY_BULK, get_queue_manager
+
+# Job statuses that still have work left
+ACTIVE_JOB_STATUSES = ("running", "paused")
+
+# Stop waiting for outcomes if none arrived for this long
+BROADCAST_STALL_TIMEOUT_SECONDS = 30 * 60
+
+
+# Content and send kwargs of one broadcast variant, built once per job
+RenderedBroadcast = Tuple[MessageContent, Dict[str, Any]]
+
+
+def render_broadcast_content(content_type: str, text: Optional[str], file_id: Optional[str],
+                             entities: Optional[List[Dict[str, Any]]]) -> RenderedBroadcast:
+    entity_kwarg = "entities" if content_type == "text" else "caption_entities"
+    content = MessageContent(content_type=content_type, file_id=file_id, text=text)
+    return content, {
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        entity_kwarg: entities or [],
+    }
+
+
+class BroadcastRun:
+    """In-memory state of a job that has a task in this process."""
+
+    def __init__(self, job: BroadcastJob):
+        self.job_id = job.job_id
+        # Seeded with stored counters: on a resume, outcomes of messages
+        # queued before the restart still arrive and count towards the job
+        self.progress = BroadcastProgress(
+            f"broadcast:{job.job_id}", job_id=job.job_id,
+            counts={"delivered": job.delivered or 0, "blocked": job.blocked or 0,
+                    "failed": job.failed or 0},
+        )
+        # Last recipient handed to the queue; the walk continues after it
+        self.last_user_id = job.last_user_id
+        # Queued recipients without an outcome yet. The stored cursor stays
+        # below the lowest of them: with the in-memory queue a restart
+        # loses whatever was still waiting in it.
+        self.track_pending = True
+        self._pending: Set[int] = set()
+        self._pending_heap: List[int] = []
+        # Queued by earlier runs of the job (before a pause or restart)
+        self.queued_before = job.total_queued or 0
+        self.queued = 0
+        # Set once every recipient is queued; only delivery is left then
+        self.exhausted = False
+        # None while running, otherwise "pause", "cancel" or "shutdown"
+        self.control: Optional[str] = None
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def request(self, control: Optional[str]) -> None:
+        self.control = control
+        self.changed.set()
+
+    def mark_queued(self, user_id: int) -> None:
+        self.queued += 1
+        if self.track_pending:
+            self._pending.add(user_id)
+            heapq.heappush(self._pending_heap, user_id)
+
+    def record(self, chat_id: int, outcome: str) -> None:
+        """Outcome listener registered with the queue manager"""
+        self._pending.discard(chat_id)
+        self.progress.record(chat_id, outcome)
+
+    @property
+    def checkpoint_user_id(self) -> Optional[int]:
+        """Highest user_id below which every queued recipient has an outcome"""
+        heap = self._pending_heap
+        while heap and heap[0] not in self._pending:
+            heapq.heappop(heap)
+        if heap:
+            return heap[0] - 1
+        return self.last_user_id
+
+    @property
+    def checkpoint_queued(self) -> int:
+        """Queued messages to store; ones still pending are queued again on resume"""
+        return self.queued_before + self.queued - len(self._pending)
+
+    @property
+    def total_queued(self) -> int:
+        return self.queued_before + self.queued
+
+    @property
+    def in_queue(self) -> int:
+        return max(0, self.total_queued - self.progress.completed)
+
+
+class BroadcastService:
+    """Runs broadcasts as background jobs.
+
+    A job walks the audience in user_id order and checkpoints a cursor
+    below which every recipient has an outcome, so it can be paused,
+    resumed or cancelled from the admin panel and continues where it
+    stopped after a restart. Recipients past the cursor that already have
+    a stored outcome are skipped on resume. Only
+    ``max_in_queue`` messages of a job wait in the message queue at a time;
+    that keeps the cursor close to what was actually sent and lets a pause
+    or cancel take effect within seconds.
+    """
+
+    def __init__(self, settings: Settings, async_session_factory: sessionmaker):
+        self.async_session_factory = async_session_factory
+        self.chunk_size = max(1, settings.BROADCAST_RECIPIENTS_CHUNK_SIZE)
+        self.max_in_queue = max(self.chunk_size, settings.BROADCAST_MAX_QUEUED_PER_JOB)
+        self.checkpoint_interval = max(1, settings.BROADCAST_PROGRESS_INTERVAL_SECONDS)
+        self._runs: Dict[int, BroadcastRun] = {}
+
+        self.started_count = 0
+        self.resumed_count = 0
+        self.checkpoint_errors = 0
+
+    async def start(self) -> int:
+        """Resume jobs that were running when the bot last stopped."""
+        async with self.async_session_factory() as session:
+            jobs = await broadcast_dal.get_broadcast_jobs_by_status(session, ("running",))
+        for job in jobs:
+            self._spawn(job)
+            self.resumed_count += 1
+        if jobs:
+            logging.info(f"BroadcastService: resumed {len(jobs)} interrupted broadcast jobs")
+        return len(jobs)
+
+    async def start_job(self, job_data: Dict[str, Any]) -> BroadcastJob:
+        async with self.async_session_factory() as session:
+            job = await broadcast_dal.create_broadcast_job(session, job_data)
+            await session.commit()
+        self._spawn(job)
+        self.started_count += 1
+        return job
+
+    def get_run(self, job_id: int) -> Optional[BroadcastRun]:
+        return self._runs.get(job_id)
+
+    async def get_job(self, job_id: int) -> Optional[BroadcastJob]:
+        async with self.async_session_factory() as session:
+            return await broadcast_dal.get_broadcast_job(session, job_id)
+
+    async def get_recent_jobs(self, limit: int = 10) -> List[BroadcastJob]:
+        async with self.async_session_factory() as session:
+            return await broadcast_dal.get_recent_broadcast_jobs(session, limit)
+
+    async def pause_job(self, job_id: int) -> bool:
+        run = self._runs.get(job_id)
+        if run is None or run.control is not None or run.exhausted:
+            return False
+        run.request("pause")
+        await self._set_status(job_id, "paused")
+        return True
+
+    async def resume_job(self, job_id: int) -> bool:
+        run = self._runs.get(job_id)
+        if run is not None:
+            if run.control != "pause":
+                return False
+            run.request(None)
+            await self._set_status(job_id, "running")
+            return True
+        # Paused before a restart: no task left, start one from the cursor
+        async with self.async_session_factory() as session:
+            job = await broadcast_dal.get_broadcast_job(session, job_id)
+            if job is None or job.status != "paused":
+                return False
+            await broadcast_dal.update_broadcast_job(session, job_id, status="running")
+            await session.commit()
+        self._spawn(job)
+        return True
+
+    async def cancel_job(self, job_id: int) -> bool:
+        run = self._runs.get(job_id)
+        if run is not None:
+            if run.control == "cancel":
+                return False
+            run.request("cancel")
+            return True
+        async with self.async_session_factory() as session:
+            job = await broadcast_dal.get_broadcast_job(session, job_id)
+            if job is None or job.status not in ACTIVE_JOB_STATUSES:
+                return False
+            await broadcast_dal.finish_broadcast_job(session, job_id, "cancelled")
+            await session.commit()
+        return True
+
+    def _spawn(self, job: BroadcastJob) -> None:
+        run = BroadcastRun(job)
+        default = render_broadcast_content(job.content_type, job.text, job.file_id, job.entities)
+        variants = {
+            language: render_broadcast_content(
+                variant.get("content_type", "text"), variant.get("text"),
+                variant.get("file_id"), variant.get("entities"))
+            for language, variant in (job.variants or {}).items()
+        }
+        run.task = asyncio.create_task(
+            self._run_job(run, job.target, default, variants),
+            name=f"BroadcastJob-{job.job_id}",
+        )
+        self._runs[job.job_id] = run
+
+    async def _run_job(self, run: BroadcastRun, target: str, default: RenderedBroadcast,
+                       variants: Dict[str, RenderedBroadcast]) -> None:
+        queue_manager = get_queue_manager()
+        if queue_manager is None:
+            logging.error(f"BroadcastService: queue manager missing, job {run.job_id} not started")
+            self._runs.pop(run.job_id, None)
+            return
+        # Durable rows outlive a restart, so queued is as good as done there
+        run.track_pending = queue_manager.backend != "postgres"
+        queue_manager.add_outcome_listener(run.progress.tracking_key, run.record)
+        status = None
+        try:
+            while True:
+                exhausted = await self._queue_recipients(run, queue_manager, target,
+                                                         default, variants)
+                if run.control == "pause":
+                    await self._wait_while_paused(run)
+                    if run.control is None:
+                        continue
+                if run.control is None and exhausted:
+                    run.exhausted = True
+                    run.progress.set_total(run.total_queued)
+                    status = await self._wait_delivered(run) if run.in_queue else "completed"
+                if run.control == "cancel":
+                    dropped = await queue_manager.discard_tracked(run.progress.tracking_key)
+                    logging.info(f"Broadcast job {run.job_id} cancelled, {dropped} queued messages dropped")
+                    status = "cancelled"
+                break
+        except Exception as e:
+            logging.error(f"Broadcast job {run.job_id} failed: {e}", exc_info=True)
+        finally:
+            # On shutdown the job stays "running" and resumes from its cursor
+            await self._checkpoint(run, finish_status=status)
+            queue_manager.remove_outcome_listener(run.progress.tracking_key)
+            self._runs.pop(run.job_id, None)
+            logging.info(
+                f"Broadcast job {run.job_id} stopped ({status or run.control}): "
+                f"{run.queued} queued, {run.progress.counts} in {run.progress.elapsed_seconds():.0f}s"
+            )
+
+    async def _queue_recipients(self, run: BroadcastRun, queue_manager, target: str,
+                                default: RenderedBroadcast,
+                                variants: Dict[str, RenderedBroadcast]) -> bool:
+        """Queue recipients after the cursor. Returns True once they ran out.
+
+        Each recipient gets the variant for their language_code, or the
+        main content when there is none.
+        """
+        async for recipients in user_dal.iter_broadcast_recipients(
+                self.async_session_factory, target, chunk_size=self.chunk_size,
+                after_user_id=run.last_user_id, skip_job_id=run.job_id):
+            for uid, language_code in recipients:
+                await self._wait_for_room(run)
+                if run.control is not None:
+                    await self._checkpoint(run)
+                    return False
+                content, send_kwargs = variants.get(language_code, default)
+                try:
+                    await send_message_via_queue(
+                        queue_manager,
+                        uid,
+                        content,
+                        priority=PRIORITY_BULK,
+                        tracking_key=run.progress.tracking_key,
+                        **send_kwargs,
+                    )
+                    run.mark_queued(uid)
+                except Exception as e:
+                    run.progress.record_queue_failure(uid)
+                    logging.warning(
+                        f"Failed to queue broadcast to {uid}: {type(e).__name__} – {e}"
+                    )
+                run.last_user_id = uid
+            await self._checkpoint(run)
+        return True
+
+    async def _wait_for_room(self, run: BroadcastRun) -> None:
+        while run.in_queue >= self.max_in_queue and run.control is None:
+            await self._wait_changed(run, timeout=0.5)
+
+    async def _wait_while_paused(self, run: BroadcastRun) -> None:
+        while run.control == "pause":
+            await self._wait_changed(run, timeout=self.checkpoint_interval)
+            await self._checkpoint(run)
+
+    async def _wait_delivered(self, run: BroadcastRun) -> Optional[str]:
+        """Store outcomes as they arrive until the last queued message is done."""
+        while True:
+            finished = await run.progress.wait_finished(timeout=self.checkpoint_interval)
+            if finished:
+                return "completed"
+            if run.control is not None:
+                return None
+            if run.progress.is_stalled(BROADCAST_STALL_TIMEOUT_SECONDS):
+                return "stalled"
+            await self._checkpoint(run)
+
+    @staticmethod
+    async def _wait_changed(run: BroadcastRun, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(run.changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        run.changed.clear()
+
+    async def _checkpoint(self, run: BroadcastRun, finish_status: Optional[str] = None) -> None:
+        """Store buffered outcomes, the cursor and the queued count in one transaction."""
+        # Taken together before any await, so no outcome slips in between
+        last_user_id, total_queued = run.checkpoint_user_id, run.checkpoint_queued
+        outcomes = run.progress.drain_outcomes()
+        try:
+            async with self.async_session_factory() as session:
+                await broadcast_dal.add_broadcast_outcomes(session, run.job_id, outcomes)
+                await broadcast_dal.update_broadcast_job(
+                    session, run.job_id,
+                    last_user_id=last_user_id,
+                    total_queued=total_queued,
+                )
+                if finish_status:
+                    await broadcast_dal.finish_broadcast_job(session, run.job_id, finish_status)
+                await session.commit()
+        except Exception as e:
+            self.checkpoint_errors += 1
+            run.progress.restore_outcomes(outcomes)
+            logging.error(f"Broadcast job {run.job_id}: checkpoint failed: {e}", exc_info=True)
+
+    async def _set_status(self, job_id: int, status: str) -> None:
+        async with self.async_session_factory() as session:
+            await broadcast_dal.update_broadcast_job(session, job_id, status=status)
+            await session.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active_jobs": len(self._runs),
+            "started": self.started_count,
+            "resumed": self.resumed_count,
+            "checkpoint_errors": self.checkpoint_errors,
+            "jobs": {
+                job_id: {
+                    "queued": run.queued,
+                    "in_queue": run.in_queue,
+                    "send_rate": round(run.progress.send_rate(), 2),
+                    "control": run.control,
+                }
+                for job_id, run in self._runs.items()
+            },
+        }
+
+    async def close(self) -> None:
+        """Stop job tasks after a checkpoint; they resume on the next start."""
+        runs = list(self._runs.values())
+        for run in runs:
+            if run.control is None or run.control == "pause":
+                run.request("shutdown")
+        tasks = [run.task for run in runs if run.task]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logging.info(f"BroadcastService closed, {len(runs)} jobs checkpointed. Stats: {self.get_stats()}")
@@ -14,6 +14,7 @@ from bot.middlewares.i18n import JsonI18n
 from bot.services.subscription_service import SubscriptionService
 from bot.services.referral_service import ReferralService
 from bot.keyboards.inline.user_keyboards import get_connect_and_main_keyboard
+from bot.utils.message_queue import send_transactional_message
 from bot.services.notification_service import NotificationService
 from db.dal import payment_dal, user_dal
 
@@ -188,7 +189,8 @@ class CryptoPayService:
 
             markup = get_connect_and_main_keyboard(lang, i18n, settings, config_link)
             try:
-                await bot.send_message(
+                await send_transactional_message(
+                    bot,
                     user_id,
                     text,
                     reply_markup=markup,
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import Settings
+from db.dal import message_log_dal
+
+
+class MessageLogWriter:
+    """Background sink for action logs.
+
+    Middlewares push MessageLog dicts with ``submit()``, which never blocks
+    and never touches the DB. Values may be zero-argument callables; they are
+    evaluated right before the insert. A single writer task flushes the
+    buffer with a multi-row INSERT every ``batch_size`` records or every
+    ``flush_interval`` seconds, whichever comes first. When the buffer is full
+    new records are dropped and counted.
+    """
+
+    def __init__(self, settings: Settings, async_session_factory: sessionmaker):
+        self.async_session_factory = async_session_factory
+        self.batch_size = max(1, settings.ACTION_LOG_BATCH_SIZE)
+        self.flush_interval = max(0.05, settings.ACTION_LOG_FLUSH_INTERVAL_MS / 1000)
+        self.max_buffer_size = max(self.batch_size, settings.ACTION_LOG_BUFFER_SIZE)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.submitted_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.flush_count = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="MessageLogWriterTask")
+            logging.info(
+                f"MessageLogWriter started (batch={self.batch_size}, "
+                f"interval={self.flush_interval:.2f}s, buffer={self.max_buffer_size})"
+            )
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue a log record. Returns False if it was dropped."""
+        if self._closing or len(self._buffer) >= self.max_buffer_size:
+            self.dropped_count += 1
+            # Log the first drop and then every 1000th to avoid log storms
+            if self.dropped_count == 1 or self.dropped_count % 1000 == 0:
+                logging.warning(
+                    f"MessageLogWriter: buffer saturated, dropped {self.dropped_count} log records so far."
+                )
+            return False
+
+        self._buffer.append(record)
+        self.submitted_count += 1
+        if self._task is None:
+            self.start()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "buffer_capacity": self.max_buffer_size,
+            "submitted": self.submitted_count,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+            "flushes": self.flush_count,
+        }
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush_pending()
+            except Exception as e:
+                logging.error(f"MessageLogWriter: unexpected flush error: {e}", exc_info=True)
+
+    async def _flush_pending(self) -> None:
+        while self._buffer:
+            batch_len = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(batch_len)]
+            await self._write_batch(batch)
+
+    @staticmethod
+    def _materialize(batch: List[Dict[str, Any]]) -> None:
+        # Deferred values (e.g. the raw update preview) are computed only now
+        for record in batch:
+            for key, value in record.items():
+                if callable(value):
+                    try:
+                        record[key] = value()
+                    except Exception as e:
+                        logging.warning(f"MessageLogWriter: failed to render '{key}': {e}")
+                        record[key] = None
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self._materialize(batch)
+            async with self.async_session_factory() as session:
+                try:
+                    await message_log_dal.bulk_insert_message_logs(session, batch)
+                    await session.commit()
+                except IntegrityError:
+                    # A referenced user may not be committed yet (or was deleted).
+                    # Null out unknown FKs with one lookup and retry once.
+                    await session.rollback()
+                    await self._null_unknown_users(session, batch)
+                    await message_log_dal.bulk_insert_message_logs(session, batch)
+                    await session.commit()
+            self.written_count += len(batch)
+            self.flush_count += 1
+        except Exception as e:
+            self.failed_count += len(batch)
+            logging.error(
+                f"MessageLogWriter: failed to write batch of {len(batch)} log records: {e}",
+                exc_info=True,
+            )
+
+    @staticmethod
+    async def _null_unknown_users(session, batch: List[Dict[str, Any]]) -> None:
+        referenced_ids = set()
+        for record in batch:
+            referenced_ids.add(record.get("user_id"))
+            referenced_ids.add(record.get("target_user_id"))
+        existing_ids = await message_log_dal.get_existing_user_ids(session, referenced_ids)
+        for record in batch:
+            for key in ("user_id", "target_user_id"):
+                if record.get(key) is not None and record[key] not in existing_ids:
+                    record[key] = None
+
+    async def close(self) -> None:
+        """Stop the writer task and flush whatever is still buffered."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception as e:
+                logging.warning(f"MessageLogWriter: writer task ended with error: {e}")
+            self._task = None
+        await self._flush_pending()
+        logging.info(f"MessageLogWriter closed. Stats: {self.get_stats()}")
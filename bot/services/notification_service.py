@@ -9,7 +9,8 @@ from typing import Optional, Union, Dict, Any
 from config.settings import Settings
 from sqlalchemy.orm import sessionmaker
 from bot.middlewares.i18n import JsonI18n
-from bot.utils.message_queue import get_queue_manager
+from bot.utils.message_queue import get_queue_manager, PRIORITY_TRANSACTIONAL
+from bot.utils.log_digest import get_log_digest
 
 
 class NotificationService:
@@ -24,6 +25,13 @@ class NotificationService:
         """Send message to configured log channel/group using message queue"""
         if not self.settings.LOG_CHAT_ID:
             return
+
+        # Events are merged into digests so a busy channel doesn't build a backlog
+        log_digest = get_log_digest()
+        if log_digest:
+            log_digest.add(self.settings.LOG_CHAT_ID, message,
+                           thread_id=thread_id or self.settings.LOG_THREAD_ID)
+            return
         
         queue_manager = get_queue_manager()
         if not queue_manager:
@@ -55,7 +63,8 @@ class NotificationService:
                 kwargs["message_thread_id"] = final_thread_id
             
             # Queue message for sending (groups are rate limited to 15/minute)
-            await queue_manager.send_message(self.settings.LOG_CHAT_ID, **kwargs)
+            await queue_manager.send_message(
+                self.settings.LOG_CHAT_ID, priority=PRIORITY_TRANSACTIONAL, **kwargs)
             
         except Exception as e:
             logging.error(f"Failed to queue notification to log channel {self.settings.LOG_CHAT_ID}: {e}")
@@ -84,6 +93,7 @@ class NotificationService:
             try:
                 await queue_manager.send_message(
                     chat_id=admin_id,
+                    priority=PRIORITY_TRANSACTIONAL,
                     text=message,
                     parse_mode="HTML",
                     disable_web_page_preview=True
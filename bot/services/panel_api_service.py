@@ -1,7 +1,10 @@
 import aiohttp
 import logging
 import json
-from typing import Optional, List, Dict, Any
+import time
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Deque, Tuple
 from datetime import datetime, timedelta, timezone
 import asyncio
 from urllib.parse import urlencode
@@ -11,9 +14,101 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import Settings
 from db.dal import panel_sync_dal
 from db.models import PanelSyncStatus
+from bot.utils.metrics import get_metrics
+from bot.utils.rate_limit import TokenBucket
+
+# Paging of /users: the page size adapts towards this response time
+PANEL_USERS_PAGE_TARGET_SECONDS = 1.0
+PANEL_USERS_PAGE_SIZE_MIN = 50
+PANEL_USERS_PAGE_ATTEMPTS = 3
+
+
+class PanelApiError(Exception):
+    """A panel API call failed for good (used where None can't be returned)"""
+
+
+class PanelUserCache:
+    """Bounded TTL cache of panel user lookups.
+
+    Keys are ``("uuid", uuid)`` -> user dict and ``("telegram_id", id)`` ->
+    list of user dicts (an empty list is cached too). Cached objects are
+    shared between callers and must be treated as read-only. ``epoch`` is
+    bumped on every invalidation so a lookup that was in flight meanwhile
+    doesn't store a stale answer.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[Any, float]]" = OrderedDict()
+        # uuid -> telegramId seen with it, to drop the telegram_id entry on writes by uuid
+        self._telegram_ids: Dict[str, int] = {}
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def lookup(self, key: Tuple[str, Any]) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def set(self, key: Tuple[str, Any], value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        for user in (value if isinstance(value, list) else [value]):
+            if user.get("uuid") and user.get("telegramId") is not None:
+                self._telegram_ids[user["uuid"]] = user["telegramId"]
+        while len(self._entries) > self.max_size:
+            (kind, evicted), _ = self._entries.popitem(last=False)
+            if kind == "uuid":
+                self._telegram_ids.pop(evicted, None)
+
+    def invalidate(self, uuid: Optional[str] = None,
+                   telegram_id: Optional[int] = None) -> List[Tuple[str, Any]]:
+        """Drop entries of one user; returns the keys that were dropped."""
+        keys = []
+        if uuid:
+            keys.append(("uuid", uuid))
+            known_telegram_id = self._telegram_ids.pop(uuid, None)
+            if known_telegram_id is not None:
+                keys.append(("telegram_id", int(known_telegram_id)))
+        if telegram_id is not None:
+            keys.append(("telegram_id", int(telegram_id)))
+        for key in keys:
+            self._entries.pop(key, None)
+        self.epoch += 1
+        self.invalidations += 1
+        return keys
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
 
 
 class PanelApiService:
+    """Panel API client.
+
+    One instance is built at startup and injected everywhere through the
+    dispatcher, so all calls share a single keep-alive connection pool.
+    aiohttp speaks HTTP/1.1 only; reusing pooled connections is what saves
+    the TCP and TLS handshakes.
+    """
 
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -21,6 +116,30 @@ class PanelApiService:
         self.api_key = settings.PANEL_API_KEY
         self._session: Optional[aiohttp.ClientSession] = None
         self.default_client_ip = "127.0.0.1"
+
+        self.pool_size = max(1, settings.PANEL_HTTP_POOL_SIZE)
+        self.keepalive_timeout = max(1.0, settings.PANEL_HTTP_KEEPALIVE_SECONDS)
+        self.dns_cache_ttl = max(0, settings.PANEL_HTTP_DNS_CACHE_SECONDS)
+        self.requests_count = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.pool_waits = 0
+
+        # Lookups by uuid and telegramId are served from here for a short TTL
+        self.user_cache: Optional[PanelUserCache] = None
+        if settings.PANEL_USER_CACHE_TTL_SECONDS > 0:
+            self.user_cache = PanelUserCache(
+                max_size=settings.PANEL_USER_CACHE_SIZE,
+                ttl_seconds=settings.PANEL_USER_CACHE_TTL_SECONDS,
+            )
+        self._user_lookups: Dict[Tuple[str, Any], asyncio.Future] = {}
+
+        self.users_page_size = max(1, settings.PANEL_USERS_PAGE_SIZE)
+        self.users_page_size_max = max(self.users_page_size, settings.PANEL_USERS_PAGE_SIZE_MAX)
+        self.users_fetch_concurrency = max(1, settings.PANEL_USERS_FETCH_CONCURRENCY)
+        self.users_requests_per_second = max(0.0, settings.PANEL_USERS_REQUESTS_PER_SECOND)
+        self.users_pages_fetched = 0
+        self.users_page_retries = 0
     
     async def __aenter__(self):
         """Context manager entry"""
@@ -33,9 +152,107 @@ class PanelApiService:
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=30)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl or None,
+                use_dns_cache=self.dns_cache_ttl > 0,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=timeout,
+                connector=connector,
+                trace_configs=[self._build_trace_config()],
+            )
         return self._session
 
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Count new vs reused connections and time spent waiting for a free one."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context: SimpleNamespace, params) -> None:
+            self.requests_count += 1
+
+        async def on_connection_queued_start(session, context: SimpleNamespace, params) -> None:
+            context.queued_at = time.monotonic()
+
+        async def on_connection_queued_end(session, context: SimpleNamespace, params) -> None:
+            self.pool_waits += 1
+            get_metrics().observe("panel_http", "pool_wait",
+                                  time.monotonic() - getattr(context, "queued_at", time.monotonic()))
+
+        async def on_connection_create_end(session, context: SimpleNamespace, params) -> None:
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, context: SimpleNamespace, params) -> None:
+            self.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_stats(self) -> Dict[str, Any]:
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "pool_size": self.pool_size,
+            "requests": self.requests_count,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / acquired, 3) if acquired else 0.0,
+            "pool_waits": self.pool_waits,
+            "user_cache": self.user_cache.get_stats() if self.user_cache else None,
+            "users_pages_fetched": self.users_pages_fetched,
+            "users_page_retries": self.users_page_retries,
+        }
+
+    async def _cached_user_lookup(self, key: Tuple[str, Any],
+                                  fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Serve a user lookup from the cache, sharing one request between concurrent misses."""
+        cache = self.user_cache
+        if cache is None:
+            return await fetch()
+        found, value = cache.lookup(key)
+        if found:
+            return value
+        pending = self._user_lookups.get(key)
+        if pending is not None:
+            cache.coalesced += 1
+            return await asyncio.shield(pending)
+
+        epoch = cache.epoch
+
+        async def run_lookup() -> Any:
+            try:
+                result = await fetch()
+                # Errors come back as None and are not cached
+                if result is not None and cache.epoch == epoch:
+                    cache.set(key, result)
+                    if key[0] == "telegram_id":
+                        for user in result:
+                            if user.get("uuid"):
+                                cache.set(("uuid", user["uuid"]), user)
+                return result
+            finally:
+                if self._user_lookups.get(key) is lookup:
+                    del self._user_lookups[key]
+
+        lookup = asyncio.ensure_future(run_lookup())
+        self._user_lookups[key] = lookup
+        return await asyncio.shield(lookup)
+
+    def invalidate_user_cache(self, uuid: Optional[str] = None,
+                              telegram_id: Optional[int] = None) -> None:
+        """Forget cached lookups of a user after it changed on the panel."""
+        if self.user_cache is None:
+            return
+        for key in self.user_cache.invalidate(uuid=uuid, telegram_id=telegram_id):
+            # Later callers must not join a lookup that started before the write
+            self._user_lookups.pop(key, None)
+
     async def close_session(self):
         if self._session and not self._session.closed:
             await self._session.close()
@@ -198,36 +415,139 @@ class PanelApiService:
 
     async def get_all_panel_users(
             self,
-            page_size: int = 100,
+            page_size: Optional[int] = None,
             log_responses: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """All panel users in one list; prefer iter_panel_user_batches for big panels."""
         all_users = []
-        start_offset = 0
-        while True:
-            params = {"size": page_size, "start": start_offset}
+        try:
+            async for users_batch in self.iter_panel_user_batches(
+                    page_size=page_size, log_responses=log_responses):
+                all_users.extend(users_batch)
+        except PanelApiError as e:
+            logging.error(f"Failed to fetch panel users: {e}")
+            return None
+        logging.info(f"Fetched {len(all_users)} users from panel API.")
+        return all_users
+
+    async def iter_panel_user_batches(
+            self,
+            page_size: Optional[int] = None,
+            log_responses: bool = False) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield panel users page by page, in panel order.
+
+        Up to ``PANEL_USERS_FETCH_CONCURRENCY`` pages are fetched ahead while
+        the caller works on the current one, under the
+        ``PANEL_USERS_REQUESTS_PER_SECOND`` limit. The page size starts at
+        ``page_size`` and doubles or halves depending on how fast pages come
+        back. Raises PanelApiError if a page still fails after retries.
+        """
+        size = max(1, page_size or self.users_page_size)
+        max_size = max(size, self.users_page_size_max)
+        bucket = None
+        if self.users_requests_per_second > 0:
+            bucket = TokenBucket(rate=self.users_requests_per_second,
+                                 capacity=self.users_fetch_concurrency)
+        pending: Deque[Tuple[int, int, asyncio.Task]] = deque()
+
+        def schedule(start: int, page: int, front: bool = False) -> None:
+            task = asyncio.create_task(
+                self._fetch_users_page(start, page, bucket, log_responses))
+            if front:
+                pending.appendleft((start, page, task))
+            else:
+                pending.append((start, page, task))
+
+        try:
+            # The first page tells the total, if the panel reports one
+            users, total, elapsed = await self._fetch_users_page(0, size, bucket, log_responses)
+            if users:
+                yield users
+            if not users or (total is None and len(users) < size):
+                return
+            if len(users) < size:
+                max_size = len(users)
+            next_start = len(users)
+            size = self._adapt_users_page_size(min(size, max_size), elapsed, max_size)
+            end_seen = False
+            while True:
+                while (not end_seen and len(pending) < self.users_fetch_concurrency
+                       and (total is None or next_start < total)):
+                    schedule(next_start, size)
+                    next_start += size
+                if not pending:
+                    return
+                start, page, task = pending.popleft()
+                users, _, elapsed = await task
+                size = self._adapt_users_page_size(size, elapsed, max_size)
+                if len(users) < page:
+                    if users and (total is None or start + len(users) < min(total, start + page)):
+                        # Either the end or the panel capped the page size;
+                        # the gap page, fetched next, tells which
+                        max_size = len(users)
+                        size = min(size, max_size)
+                        schedule(start + len(users), page - len(users), front=True)
+                    else:
+                        end_seen = True
+                        for _, _, ahead in pending:
+                            ahead.cancel()
+                        pending.clear()
+                if users:
+                    yield users
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+
+    async def _fetch_users_page(
+            self, start: int, size: int, bucket: Optional[TokenBucket],
+            log_responses: bool) -> Tuple[List[Dict[str, Any]], Optional[int], float]:
+        """One page of /users as (users, total reported by the panel, seconds taken)."""
+        response_data = None
+        for attempt in range(PANEL_USERS_PAGE_ATTEMPTS):
+            if attempt:
+                self.users_page_retries += 1
+                await asyncio.sleep(0.5 * attempt)
+            if bucket is not None:
+                wait_time = bucket.time_until_available()
+                while wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                    wait_time = bucket.time_until_available()
+                bucket.try_consume()
+            started_at = time.monotonic()
             response_data = await self._request(
                 "GET",
                 "/users",
-                params=params,
+                params={"size": size, "start": start},
                 log_full_response=log_responses)
-
-            if not response_data or response_data.get("error"):
-                logging.error(
-                    f"Failed to fetch panel users batch (start: {start_offset}). Response: {response_data}"
-                )
-                return None
-            users_batch = response_data.get("response", {}).get("users", [])
-            if not users_batch: break
-            all_users.extend(users_batch)
-            if len(users_batch) < page_size: break
-            start_offset += page_size
-            await asyncio.sleep(0.1)
-        logging.info(f"Fetched {len(all_users)} users from panel API.")
-        return all_users
+            elapsed = time.monotonic() - started_at
+            if response_data and not response_data.get("error"):
+                self.users_pages_fetched += 1
+                get_metrics().observe("panel_http", "users_page", elapsed)
+                payload = response_data.get("response", {})
+                total = payload.get("total")
+                return payload.get("users", []), int(total) if total is not None else None, elapsed
+        raise PanelApiError(
+            f"users page (start: {start}, size: {size}) failed after "
+            f"{PANEL_USERS_PAGE_ATTEMPTS} attempts. Response: {response_data}")
+
+    @staticmethod
+    def _adapt_users_page_size(size: int, elapsed: float, max_size: int) -> int:
+        """Grow pages while the panel answers quickly, shrink them when it slows down."""
+        if elapsed < PANEL_USERS_PAGE_TARGET_SECONDS / 2:
+            return min(size * 2, max_size)
+        if elapsed > PANEL_USERS_PAGE_TARGET_SECONDS * 2:
+            return max(min(PANEL_USERS_PAGE_SIZE_MIN, max_size), size // 2)
+        return size
 
     async def get_user_by_uuid(
             self,
             user_uuid: str,
             log_response: bool = True) -> Optional[Dict[str, Any]]:
+        return await self._cached_user_lookup(
+            ("uuid", user_uuid),
+            lambda: self._fetch_user_by_uuid(user_uuid, log_response))
+
+    async def _fetch_user_by_uuid(self, user_uuid: str,
+                                  log_response: bool) -> Optional[Dict[str, Any]]:
         endpoint = f"/users/{user_uuid}"
         full_response = await self._request("GET",
                                             endpoint,
@@ -271,20 +591,9 @@ class PanelApiService:
         filter_used_log = "No filter specified"
 
         if telegram_id is not None:
-            filter_used_log = f"telegramId={telegram_id}"
-            endpoint = f"/users/by-telegram-id/{telegram_id}"
-            response_data = await self._request("GET",
-                                                endpoint,
-                                                log_full_response=log_response)
-
-            if response_data and not response_data.get(
-                    "error") and "response" in response_data and isinstance(
-                        response_data["response"], list):
-                return response_data["response"]
-            elif response_data and response_data.get("errorCode") == "A062":
-                logging.info(
-                    f"Panel API: Users not found for {filter_used_log}")
-                return []
+            return await self._cached_user_lookup(
+                ("telegram_id", int(telegram_id)),
+                lambda: self._fetch_users_by_telegram_id(telegram_id, log_response))
 
         elif username is not None:
             filter_used_log = f"username={username}"
@@ -329,6 +638,28 @@ class PanelApiService:
         )
         return None
 
+    async def _fetch_users_by_telegram_id(
+            self, telegram_id: int,
+            log_response: bool) -> Optional[List[Dict[str, Any]]]:
+        endpoint = f"/users/by-telegram-id/{telegram_id}"
+        response_data = await self._request("GET",
+                                            endpoint,
+                                            log_full_response=log_response)
+
+        if response_data and not response_data.get(
+                "error") and "response" in response_data and isinstance(
+                    response_data["response"], list):
+            return response_data["response"]
+        elif response_data and response_data.get("errorCode") == "A062":
+            logging.info(
+                f"Panel API: Users not found for telegramId={telegram_id}")
+            return []
+
+        logging.error(
+            f"Failed to fetch panel users with filter (telegramId={telegram_id}). Last API response: {response_data if not log_response else '(logged above)'}"
+        )
+        return None
+
     async def create_panel_user(
             self,
             username_on_panel: str,
@@ -379,6 +710,9 @@ class PanelApiService:
                                        "/users",
                                        json=payload,
                                        log_full_response=log_response)
+        if telegram_id is not None:
+            # A cached "no users for this telegramId" is wrong from now on
+            self.invalidate_user_cache(telegram_id=telegram_id)
         if response and not response.get("error") and "response" in response:
             logging.info(
                 f"Panel user '{username_on_panel}' created successfully (UUID: {response.get('response',{}).get('uuid')})."
@@ -402,6 +736,8 @@ class PanelApiService:
                                             "/users",
                                             json=update_payload,
                                             log_full_response=log_response)
+        self.invalidate_user_cache(uuid=user_uuid,
+                                   telegram_id=update_payload.get("telegramId"))
         if full_response and not full_response.get(
                 "error") and "response" in full_response:
             logging.info(f"User {user_uuid} details updated on panel.")
@@ -421,6 +757,7 @@ class PanelApiService:
         response_data = await self._request("POST",
                                             endpoint,
                                             log_full_response=log_response)
+        self.invalidate_user_cache(uuid=user_uuid)
 
         if response_data and not response_data.get(
                 "error") and "response" in response_data:
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from config.settings import Settings
+from .panel_api_service import PanelApiService
+
+
+class PanelProfileSyncService:
+    """Pushes Telegram profile changes to panel user descriptions in the background.
+
+    Requests are coalesced per panel user: only the latest description is
+    kept, and at most one PATCH per user is sent every ``min_interval``
+    seconds. Callers never wait for the panel.
+    """
+
+    def __init__(self, settings: Settings, panel_service: PanelApiService):
+        self.panel_service = panel_service
+        self.min_interval = max(0.0, float(settings.PANEL_PROFILE_SYNC_INTERVAL_SECONDS))
+
+        self._pending: Dict[str, str] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.scheduled_count = 0
+        self.coalesced_count = 0
+        self.sent_count = 0
+        self.failed_count = 0
+
+    def schedule_description_update(self, panel_user_uuid: str, description: str) -> None:
+        if self._closing:
+            return
+        if panel_user_uuid in self._pending:
+            self.coalesced_count += 1
+        self._pending[panel_user_uuid] = description
+        self.scheduled_count += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="PanelProfileSyncTask")
+        self._wakeup.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "scheduled": self.scheduled_count,
+            "coalesced": self.coalesced_count,
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+        }
+
+    def _seconds_until_next_due(self, now: float) -> Optional[float]:
+        if not self._pending:
+            return None
+        next_due = min(
+            self._last_sent.get(uuid, 0.0) + self.min_interval for uuid in self._pending
+        )
+        return max(0.0, next_due - now)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            timeout = self._seconds_until_next_due(time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._send_due(time.monotonic())
+
+    async def _send_due(self, now: float, force: bool = False) -> None:
+        due_uuids = [
+            uuid for uuid in self._pending
+            if force or now - self._last_sent.get(uuid, float("-inf")) >= self.min_interval
+        ]
+        for uuid in due_uuids:
+            description = self._pending.pop(uuid, None)
+            if description is None:
+                continue
+            self._last_sent[uuid] = time.monotonic()
+            try:
+                await self.panel_service.update_user_details_on_panel(
+                    uuid, {"description": description}
+                )
+                self.sent_count += 1
+            except Exception as e:
+                self.failed_count += 1
+                logging.warning(
+                    f"PanelProfileSyncService: Failed to update panel description for {uuid}: {e}"
+                )
+
+        # Forget send times that no longer restrict anything
+        cutoff = time.monotonic() - self.min_interval
+        for uuid in [u for u, ts in self._last_sent.items() if ts < cutoff]:
+            del self._last_sent[uuid]
+
+    async def close(self) -> None:
+        """Stop the worker and send whatever is still pending (best effort)."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception as e:
+                logging.warning(f"PanelProfileSyncService: worker ended with error: {e}")
+            self._task = None
+        if self._pending:
+            await self._send_due(time.monotonic(), force=True)
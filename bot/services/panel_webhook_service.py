@@ -172,6 +172,8 @@ class PanelWebhookService:
             logging.warning("Panel webhook without telegramId received")
             return
         user_id = int(telegram_id)
+        # The user changed on the panel side
+        self.panel_service.invalidate_user_cache(uuid=user_payload.get("uuid"), telegram_id=user_id)
 
         if not self.settings.SUBSCRIPTION_NOTIFICATIONS_ENABLED:
             return
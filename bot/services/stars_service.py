@@ -7,11 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import Settings
 from db.dal import payment_dal, user_dal
+from db.models import User
 from .subscription_service import SubscriptionService
 from .referral_service import ReferralService
 from bot.middlewares.i18n import JsonI18n
 from .notification_service import NotificationService
 from bot.keyboards.inline.user_keyboards import get_connect_and_main_keyboard
+from bot.utils.message_queue import send_transactional_message
 
 
 class StarsService:
@@ -68,7 +70,8 @@ class StarsService:
                                          payment_db_id: int,
                                          months: int,
                                          stars_amount: int,
-                                         i18n_data: dict) -> None:
+                                         i18n_data: dict,
+                                         db_user: Optional[User] = None) -> None:
         try:
             await payment_dal.update_provider_payment_and_status(
                 session, payment_db_id,
@@ -120,7 +123,8 @@ class StarsService:
 
         if applied_days:
             inviter_name_display = _("friend_placeholder")
-            db_user = await user_dal.get_user_by_id(session, message.from_user.id)
+            if db_user is None:
+                db_user = await user_dal.get_user_by_id(session, message.from_user.id)
             if db_user and db_user.referred_by_id:
                 inviter = await user_dal.get_user_by_id(session, db_user.referred_by_id)
                 if inviter and inviter.first_name:
@@ -147,7 +151,8 @@ class StarsService:
             current_lang, i18n, self.settings, config_link
         )
         try:
-            await self.bot.send_message(
+            await send_transactional_message(
+                self.bot,
                 message.from_user.id,
                 success_msg,
                 reply_markup=markup,
@@ -161,7 +166,7 @@ class StarsService:
         # Send notification about payment
         try:
             notification_service = NotificationService(self.bot, self.settings, self.i18n)
-            user = await user_dal.get_user_by_id(session, message.from_user.id)
+            user = db_user or await user_dal.get_user_by_id(session, message.from_user.id)
             await notification_service.notify_payment_received(
                 user_id=message.from_user.id,
                 amount=float(stars_amount),
@@ -656,9 +656,11 @@ class SubscriptionService:
             return None
 
     async def get_active_subscription_details(
-        self, session: AsyncSession, user_id: int
+        self, session: AsyncSession, user_id: int,
+        db_user: Optional[User] = None
     ) -> Optional[Dict[str, Any]]:
-        db_user = await user_dal.get_user_by_id(session, user_id)
+        if db_user is None:
+            db_user = await user_dal.get_user_by_id(session, user_id)
         if not db_user or not db_user.panel_user_uuid:
             logging.info(
                 f"User {user_id} not found in DB or no panel_user_uuid for 'my_subscription'."
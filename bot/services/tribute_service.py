@@ -15,6 +15,7 @@ from bot.services.panel_api_service import PanelApiService
 from bot.services.referral_service import ReferralService
 from .notification_service import NotificationService
 from bot.keyboards.inline.user_keyboards import get_connect_and_main_keyboard
+from bot.utils.message_queue import send_transactional_message
 from db.dal import payment_dal, user_dal, subscription_dal
 
 
@@ -209,7 +210,8 @@ class TributeService:
                     )
 
                     try:
-                        await bot.send_message(
+                        await send_transactional_message(
+                            bot,
                             int(user_id),
                             success_msg,
                             reply_markup=markup,
@@ -272,7 +274,8 @@ class TributeService:
                 )
                 
                 try:
-                    await bot.send_message(
+                    await send_transactional_message(
+                        bot,
                         int(user_id),
                         cancellation_msg,
                         reply_markup=markup,
@@ -5,6 +5,7 @@ class AdminStates(StatesGroup):
 
     waiting_for_broadcast_message = State()
     confirming_broadcast = State()
+    waiting_for_broadcast_variant = State()
     waiting_for_promo_details = State()
     waiting_for_promo_code = State()
     waiting_for_promo_bonus_days = State()
@@ -149,14 +149,22 @@ async def send_message_by_type(bot, chat_id: int, content: MessageContent, **kwa
             )
 
 
-async def send_message_via_queue(queue_manager, uid: int, content: MessageContent, **kwargs) -> None:
+async def send_message_via_queue(queue_manager, uid: int, content: MessageContent,
+                                 priority: Optional[int] = None,
+                                 tracking_key: Optional[str] = None, **kwargs) -> None:
     """
     Отправляет сообщение через очередь в зависимости от типа контента.
     Использует match/case вместо длинных if-elif цепочек.
     Автоматически фильтрует неподдерживаемые параметры.
+    priority - класс приоритета очереди (PRIORITY_* из bot.utils.message_queue).
+    tracking_key - ключ, по которому менеджер очереди сообщает результат доставки.
     """
     # Фильтруем kwargs для данного типа сообщения
     filtered_kwargs = filter_kwargs(content.content_type, kwargs)
+    if priority is not None:
+        filtered_kwargs["priority"] = priority
+    if tracking_key is not None:
+        filtered_kwargs["tracking_key"] = tracking_key
     
     match content.content_type:
         case "text":
@@ -198,6 +206,10 @@ async def send_message_via_queue(queue_manager, uid: int, content: MessageConten
         case _:
             # Fallback для неизвестных типов - отправляем как текст
             text_kwargs = filter_kwargs("text", kwargs)
+            if priority is not None:
+                text_kwargs["priority"] = priority
+            if tracking_key is not None:
+                text_kwargs["tracking_key"] = tracking_key
             await queue_manager.send_message(
                 chat_id=uid, text=content.text or "Unknown content type", **text_kwargs
             )
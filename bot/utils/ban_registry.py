@@ -0,0 +1,58 @@
+import logging
+from typing import Iterable, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.dal import user_dal
+
+
+class BannedUsersRegistry:
+    """In-process set of banned Telegram user IDs.
+
+    Loaded once at startup and kept current by the admin ban/unban handlers,
+    so the per-update ban check is a set lookup instead of a DB query.
+    """
+
+    def __init__(self):
+        self._banned_ids: Set[int] = set()
+        self.is_loaded = False
+
+    async def load(self, session: AsyncSession) -> int:
+        banned_ids = await user_dal.get_banned_user_ids(session)
+        self.replace(banned_ids)
+        return len(self._banned_ids)
+
+    def replace(self, banned_ids: Iterable[int]) -> None:
+        self._banned_ids = set(banned_ids)
+        self.is_loaded = True
+
+    def is_banned(self, user_id: int) -> bool:
+        return user_id in self._banned_ids
+
+    def set_banned(self, user_id: int, banned: bool) -> None:
+        if banned:
+            self._banned_ids.add(user_id)
+        else:
+            self._banned_ids.discard(user_id)
+        logging.info(
+            f"BannedUsersRegistry: user {user_id} {'added to' if banned else 'removed from'} ban set ({len(self._banned_ids)} banned)."
+        )
+
+    def __len__(self) -> int:
+        return len(self._banned_ids)
+
+
+# Global registry instance
+_ban_registry: Optional[BannedUsersRegistry] = None
+
+
+def init_ban_registry() -> BannedUsersRegistry:
+    """Initialize global ban registry"""
+    global _ban_registry
+    _ban_registry = BannedUsersRegistry()
+    return _ban_registry
+
+
+def get_ban_registry() -> Optional[BannedUsersRegistry]:
+    """Get global ban registry instance"""
+    return _ban_registry
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bot.utils.rate_limit import SlidingWindowCounter
+
+OUTCOMES = ("delivered", "blocked", "failed")
+
+
+class BroadcastProgress:
+    """Delivery outcomes of one broadcast, fed by the message queue.
+
+    Per-recipient outcomes are also buffered until ``drain_outcomes()`` so
+    they can be stored with one multi-row INSERT per batch.
+    """
+
+    RATE_WINDOW_SECONDS = 30
+
+    def __init__(self, tracking_key: str, total: int = 0, job_id: Optional[int] = None,
+                 counts: Optional[Dict[str, int]] = None):
+        self.tracking_key = tracking_key
+        self.job_id = job_id
+        self.total = total
+        # ``counts`` carries outcomes stored by earlier runs of a resumed job
+        counts = counts or {}
+        self.counts: Dict[str, int] = {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}
+        self.queue_failed = 0
+        self._pending_outcomes: List[Tuple[int, str]] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.last_outcome_at = self.started_at
+        self._recent = SlidingWindowCounter(window_seconds=self.RATE_WINDOW_SECONDS)
+        self._finished = asyncio.Event()
+
+    @property
+    def completed(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.completed)
+
+    def record(self, chat_id: int, outcome: str) -> None:
+        outcome = outcome if outcome in self.counts else "failed"
+        self.counts[outcome] += 1
+        self._pending_outcomes.append((chat_id, outcome))
+        self._recent.add()
+        self.last_outcome_at = time.monotonic()
+        self._check_finished()
+
+    def record_queue_failure(self, chat_id: int) -> None:
+        """The message never made it into the queue"""
+        self.queue_failed += 1
+        self._pending_outcomes.append((chat_id, "queue_failed"))
+
+    def drain_outcomes(self) -> List[Tuple[int, str]]:
+        outcomes, self._pending_outcomes = self._pending_outcomes, []
+        return outcomes
+
+    def restore_outcomes(self, outcomes: List[Tuple[int, str]]) -> None:
+        """Put back drained outcomes that could not be stored"""
+        self._pending_outcomes[:0] = outcomes
+
+    def set_total(self, total: int) -> None:
+        """Final number of queued messages, known once enqueueing is over"""
+        self.total = total
+        self._check_finished()
+
+    def _check_finished(self) -> None:
+        if self.total and self.completed >= self.total and not self._finished.is_set():
+            self.finished_at = time.monotonic()
+            self._finished.set()
+
+    @property
+    def is_finished(self) -> bool:
+        return self._finished.is_set()
+
+    async def wait_finished(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._finished.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_finished
+
+    def is_stalled(self, timeout_seconds: float) -> bool:
+        """No outcome arrived for timeout_seconds"""
+        return time.monotonic() - self.last_outcome_at > timeout_seconds
+
+    def send_rate(self) -> float:
+        """Completed messages per second over the recent window"""
+        window = min(self.RATE_WINDOW_SECONDS, max(1.0, time.monotonic() - self.started_at))
+        return self._recent.total() / window
+
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.send_rate()
+        if not self.remaining:
+            return 0.0
+        return self.remaining / rate if rate > 0 else None
+
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
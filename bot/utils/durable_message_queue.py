@@ -0,0 +1,276 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from pydantic import BaseModel
+from sqlalchemy.orm import sessionmaker
+
+from bot.utils.message_queue import PRIORITY_BULK, QueuedMessage, TelegramMessageQueue
+from db.dal import outbound_message_dal
+
+# How long close() waits for sends that already started
+CLOSE_DRAIN_TIMEOUT_SECONDS = 15
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: _to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(item) for item in value]
+    return value
+
+
+def serialize_kwargs(kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """JSON form of Bot API call kwargs, or None if they can't be stored."""
+    try:
+        payload = _to_jsonable(kwargs)
+        json.dumps(payload)
+    except (TypeError, ValueError):
+        return None
+    return payload
+
+
+class DurableMessageQueue(TelegramMessageQueue):
+    """Postgres-backed variant of the Telegram message queue.
+
+    ``add_message`` buffers the call and a single sync task writes it to the
+    ``outbound_messages`` table with a multi-row INSERT. The same task claims
+    due rows in batches with ``SELECT ... FOR UPDATE SKIP LOCKED`` and feeds
+    them to the in-memory workers, which keep doing rate limiting, retries
+    and per-chat ordering. Delivered rows are deleted and dropped ones are
+    marked failed, again in batches. Several bot replicas can drain one
+    table; rows claimed by a replica that died are handed back after
+    ``claim_timeout`` seconds.
+
+    Messages with a result callback can't be persisted and stay in memory.
+    """
+
+    def __init__(self, bot: Bot, async_session_factory: sessionmaker,
+                 messages_per_second: float, burst_size: int = 5,
+                 batch_size: int = 100, poll_interval: float = 1.0,
+                 claim_timeout: int = 600, failed_retention_days: int = 7, **kwargs):
+        super().__init__(bot, messages_per_second, burst_size, **kwargs)
+        self.async_session_factory = async_session_factory
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = max(0.05, poll_interval)
+        self.claim_timeout = max(60, claim_timeout)
+        self.failed_retention_days = max(1, failed_retention_days)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._insert_buffer: List[Dict[str, Any]] = []
+        self._delivered_ids: List[int] = []
+        self._failed: Dict[int, str] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._last_stale_check = 0.0
+
+        self.persisted_count = 0
+        self.claimed_count = 0
+        self.purged_count = 0
+        self.sync_errors = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="DurableMessageQueueTask")
+            logging.info(
+                f"DurableMessageQueue started (worker={self.worker_id}, batch={self.batch_size})"
+            )
+
+    def _depth(self) -> int:
+        # Messages not yet written to the DB are the ones held in memory
+        return len(self) + len(self._insert_buffer)
+
+    async def add_message(self, message: QueuedMessage) -> None:
+        payload = None
+        if message.callback is None and message.outbox_id is None and not self._closing:
+            payload = serialize_kwargs(message.kwargs)
+        if payload is None:
+            await super().add_message(message)
+            return
+
+        await self._wait_for_room(message)
+        self._insert_buffer.append({
+            "chat_id": message.chat_id,
+            "method_name": message.method_name,
+            "payload": payload,
+            "priority": message.priority,
+            "tracking_key": message.tracking_key,
+        })
+        if self._task is None:
+            self.start()
+        # Only bulk messages wait for a full batch or the poll interval
+        if message.priority != PRIORITY_BULK or len(self._insert_buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _on_message_finished(self, message: QueuedMessage, outcome: str,
+                             error: Optional[str] = None) -> None:
+        super()._on_message_finished(message, outcome, error)
+        if message.outbox_id is None:
+            return
+        if outcome == "delivered":
+            self._delivered_ids.append(message.outbox_id)
+        else:
+            self._failed[message.outbox_id] = f"{outcome}: {error}"
+        # Refill before the workers run dry
+        if len(self) < self.batch_size // 2 or len(self._delivered_ids) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                break
+            try:
+                await self._sync(claim=True)
+            except Exception as e:
+                self.sync_errors += 1
+                logging.error(f"DurableMessageQueue: sync with DB failed: {e}", exc_info=True)
+
+    async def _sync(self, claim: bool) -> None:
+        """Persist new messages, settle finished ones and claim a refill, in one transaction."""
+        inserts, self._insert_buffer = self._insert_buffer, []
+        delivered_ids, self._delivered_ids = self._delivered_ids, []
+        failed, self._failed = self._failed, {}
+        claimed = []
+        try:
+            async with self.async_session_factory() as session:
+                now = time.monotonic()
+                if now - self._last_stale_check >= self.claim_timeout / 4:
+                    self._last_stale_check = now
+                    released = await outbound_message_dal.release_stale_outbound_claims(
+                        session, self.claim_timeout)
+                    if released:
+                        logging.warning(f"DurableMessageQueue: released {released} stale claims")
+                    purged = await outbound_message_dal.purge_failed_outbound_messages(
+                        session, self.failed_retention_days)
+                    self.purged_count += purged
+                await outbound_message_dal.enqueue_outbound_messages(session, inserts)
+                await outbound_message_dal.delete_outbound_messages(session, delivered_ids)
+                await outbound_message_dal.mark_outbound_failed(session, failed)
+                # Keep up to two batches in memory so the workers never starve
+                room = 2 * self.batch_size - len(self)
+                if claim and room >= self.batch_size:
+                    claimed = await outbound_message_dal.claim_outbound_batch(
+                        session, room, self.worker_id)
+                await session.commit()
+        except Exception:
+            # Nothing was written; keep everything for the next round
+            self._insert_buffer[:0] = inserts
+            self._delivered_ids.extend(delivered_ids)
+            failed.update(self._failed)
+            self._failed = failed
+            raise
+
+        self.persisted_count += len(inserts)
+        self._notify_room()
+        self.claimed_count += len(claimed)
+        for row in claimed:
+            # Claims are bounded by the refill logic, so they skip the room check
+            self._enqueue(QueuedMessage(
+                chat_id=row.chat_id,
+                method_name=row.method_name,
+                kwargs=dict(row.payload),
+                outbox_id=row.id,
+                priority=row.priority,
+                tracking_key=row.tracking_key,
+            ))
+
+    async def discard_tracked(self, tracking_key: str) -> int:
+        """Drop buffered, claimed and pending rows of a cancelled batch."""
+        buffered = len(self._insert_buffer)
+        self._insert_buffer = [row for row in self._insert_buffer
+                               if row["tracking_key"] != tracking_key]
+        dropped = buffered - len(self._insert_buffer)
+        taken = self._take_tracked(tracking_key)
+        claimed_ids = [m.outbox_id for m in taken if m.outbox_id is not None]
+        async with self.async_session_factory() as session:
+            await outbound_message_dal.delete_outbound_messages(session, claimed_ids)
+            dropped += await outbound_message_dal.delete_pending_outbound_by_tracking_key(
+                session, tracking_key)
+            await session.commit()
+        self._notify_room()
+        return dropped + len(taken)
+
+    def _requeue_for_retry(self, message: QueuedMessage) -> None:
+        if self._closing and message.outbox_id is not None:
+            # Not sent; the row goes back to the pool once its claim is stale
+            self._retry_waiting -= 1
+            self._release_chat(message.order_key)
+            return
+        super()._requeue_for_retry(message)
+
+    def _take_unsent_claims(self) -> List[int]:
+        """Remove claimed messages that haven't started sending from memory."""
+        unsent_ids: List[int] = []
+        for chat_id, backlog in list(self._chat_backlog.items()):
+            kept = deque(m for m in backlog if m.outbox_id is None)
+            unsent_ids.extend(m.outbox_id for m in backlog if m.outbox_id is not None)
+            self._backlog_size -= len(backlog) - len(kept)
+            self._chat_backlog[chat_id] = kept
+
+        taken = self._take_ready(lambda m: m.outbox_id is not None)
+        unsent_ids.extend(m.outbox_id for m in taken)
+        return unsent_ids
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "in_memory": len(self),
+            "insert_buffer": len(self._insert_buffer),
+            "persisted": self.persisted_count,
+            "claimed": self.claimed_count,
+            "purged_failed": self.purged_count,
+            "sync_errors": self.sync_errors,
+        }
+
+    async def close(self) -> None:
+        """Stop claiming, persist buffered messages and hand back unsent claims."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception as e:
+                logging.warning(f"DurableMessageQueue: sync task ended with error: {e}")
+            self._task = None
+        unsent_ids = self._take_unsent_claims()
+        # Sends already under way must be settled by the final sync, or their
+        # rows stay 'processing' and are sent again after claim_timeout
+        deadline = time.monotonic() + CLOSE_DRAIN_TIMEOUT_SECONDS
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.in_flight:
+            logging.warning(
+                f"DurableMessageQueue: {self.in_flight} sends still running after "
+                f"{CLOSE_DRAIN_TIMEOUT_SECONDS}s, their rows are released by claim timeout")
+        # Messages that hit flood control went back to their lane meanwhile
+        unsent_ids.extend(self._take_unsent_claims())
+        try:
+            await self._sync(claim=False)
+            if unsent_ids:
+                async with self.async_session_factory() as session:
+                    await outbound_message_dal.release_outbound_messages(session, unsent_ids)
+                    await session.commit()
+        except Exception as e:
+            logging.error(f"DurableMessageQueue: failed to flush on close: {e}", exc_info=True)
+        logging.info(
+            f"DurableMessageQueue closed, {len(unsent_ids)} claimed messages handed back. "
+            f"Stats: {self.get_stats()}"
+        )
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+
+from bot.utils.message_queue import PRIORITY_TRANSACTIONAL, get_queue_manager
+
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+DIGEST_SEPARATOR = "\n\n➖➖➖\n\n"
+# Give up waiting for a digest's delivery report after this long
+DIGEST_DELIVERY_TIMEOUT_SECONDS = 120
+# Events buffered per chat before new ones are dropped (last resort when
+# the log channel can't keep up at all)
+DIGEST_MAX_BUFFERED_EVENTS = 10000
+
+
+def pack_digest(events: List[str], max_messages: int,
+                max_length: int = TELEGRAM_MESSAGE_MAX_LENGTH) -> Tuple[List[str], int]:
+    """Join events into at most max_messages texts of up to max_length chars.
+
+    Events are never split, so HTML markup stays intact; a single event
+    longer than the limit is sent on its own. Returns the messages and the
+    number of leading events they hold; the rest belong to the next digest.
+    """
+    messages: List[str] = []
+    current = ""
+    for index, event in enumerate(events):
+        candidate = f"{current}{DIGEST_SEPARATOR}{event}" if current else event
+        if len(candidate) <= max_length or not current:
+            current = candidate
+            continue
+        messages.append(current)
+        if len(messages) >= max_messages:
+            return messages, index
+        current = event
+    if current:
+        messages.append(current)
+    return messages, len(events)
+
+
+class LogChannelDigest:
+    """Coalesces log-channel notifications into digest messages.
+
+    Events for one chat/thread are buffered for ``window`` seconds and sent
+    as few messages as the 4096-char limit allows. The next digest for the
+    same chat is held back until the previous one is delivered, so events
+    arriving faster than the group rate limit make digests bigger instead
+    of growing the queue. One digest round is capped at ``max_messages``;
+    the remaining events stay at the front of the buffer for the next round.
+    """
+
+    def __init__(self, bot: Bot, window: float = 5.0, max_messages: int = 5):
+        self.bot = bot
+        self.window = max(0.0, window)
+        self.max_messages = max(1, max_messages)
+        self._buffers: Dict[Tuple[int, Optional[int]], List[str]] = {}
+        self._tasks: Dict[Tuple[int, Optional[int]], asyncio.Task] = {}
+        self._in_flight: Dict[Tuple[int, Optional[int]], int] = {}
+        self._delivered: Dict[Tuple[int, Optional[int]], asyncio.Event] = {}
+
+        self.events_count = 0
+        self.digests_count = 0
+        self.messages_count = 0
+        self.dropped_count = 0
+        self._dropped_unlogged: Dict[Tuple[int, Optional[int]], int] = {}
+
+    def add(self, chat_id: int, text: str, thread_id: Optional[int] = None) -> None:
+        key = (chat_id, thread_id)
+        buffer = self._buffers.setdefault(key, [])
+        self.events_count += 1
+        if len(buffer) >= DIGEST_MAX_BUFFERED_EVENTS:
+            self.dropped_count += 1
+            self._dropped_unlogged[key] = self._dropped_unlogged.get(key, 0) + 1
+        else:
+            buffer.append(text)
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = asyncio.create_task(self._run(key), name=f"LogDigest-{chat_id}")
+
+    async def _run(self, key: Tuple[int, Optional[int]]) -> None:
+        while self._buffers.get(key):
+            await asyncio.sleep(self.window)
+            await self._wait_delivered(key)
+            try:
+                await self._flush(key)
+            except Exception as e:
+                logging.error(f"LogChannelDigest: failed to send digest to {key[0]}: {e}", exc_info=True)
+
+    async def _wait_delivered(self, key: Tuple[int, Optional[int]]) -> None:
+        if not self._in_flight.get(key):
+            return
+        try:
+            await asyncio.wait_for(self._delivered[key].wait(), timeout=DIGEST_DELIVERY_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logging.warning(f"LogChannelDigest: no delivery report for chat {key[0]}, sending next digest")
+            self._in_flight[key] = 0
+
+    def _on_outcome(self, key: Tuple[int, Optional[int]], outcome: str) -> None:
+        self._in_flight[key] = max(0, self._in_flight.get(key, 0) - 1)
+        if not self._in_flight[key]:
+            self._delivered[key].set()
+
+    async def _flush(self, key: Tuple[int, Optional[int]]) -> None:
+        events = self._buffers.pop(key, [])
+        if not events:
+            return
+        messages, packed = pack_digest(events, self.max_messages)
+        if packed < len(events):
+            # Older than anything added since the pop, so they go first
+            self._buffers[key] = events[packed:] + self._buffers.get(key, [])
+        self.digests_count += 1
+        self.messages_count += len(messages)
+        dropped = self._dropped_unlogged.pop(key, 0)
+        if dropped:
+            logging.warning(
+                f"LogChannelDigest: buffer for chat {key[0]} was full, {dropped} events dropped")
+
+        chat_id, thread_id = key
+        kwargs: Dict[str, Any] = {"parse_mode": "HTML", "disable_web_page_preview": True}
+        if thread_id:
+            kwargs["message_thread_id"] = thread_id
+
+        queue_manager = get_queue_manager()
+        if queue_manager is None:
+            for text in messages:
+                await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            return
+
+        tracking_key = f"log_digest:{chat_id}:{thread_id or 0}"
+        queue_manager.add_outcome_listener(
+            tracking_key, lambda _chat_id, outcome: self._on_outcome(key, outcome))
+        self._delivered.setdefault(key, asyncio.Event()).clear()
+        self._in_flight[key] = self._in_flight.get(key, 0) + len(messages)
+        for text in messages:
+            await queue_manager.send_message(
+                chat_id, priority=PRIORITY_TRANSACTIONAL, tracking_key=tracking_key,
+                text=text, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered_events": sum(len(events) for events in self._buffers.values()),
+            "events": self.events_count,
+            "digests": self.digests_count,
+            "messages": self.messages_count,
+            "dropped_events": self.dropped_count,
+        }
+
+    async def close(self) -> None:
+        """Send whatever is buffered right away, over as many digests as it takes."""
+        for task in self._tasks.values():
+            task.cancel()
+        for key in list(self._buffers):
+            try:
+                while self._buffers.get(key):
+                    await self._flush(key)
+            except Exception as e:
+                logging.error(f"LogChannelDigest: failed to flush on close: {e}")
+        logging.info(f"LogChannelDigest closed. Stats: {self.get_stats()}")
+
+
+# Global digest instance
+_log_digest: Optional[LogChannelDigest] = None
+
+
+def init_log_digest(bot: Bot, window: float, max_messages: int) -> LogChannelDigest:
+    """Initialize global log channel digest"""
+    global _log_digest
+    _log_digest = LogChannelDigest(bot, window=window, max_messages=max_messages)
+    return _log_digest
+
+
+def get_log_digest() -> Optional[LogChannelDigest]:
+    """Get global log channel digest instance"""
+    return _log_digest
@@ -1,10 +1,59 @@
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import Dict, Any, Callable, Awaitable, Optional
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+import time
+from typing import Dict, Any, Callable, Awaitable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from collections import deque
 from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from sqlalchemy.orm import sessionmaker
+
+from bot.utils.metrics import get_metrics
+from bot.utils.rate_limit import TokenBucket, SlidingWindowCounter
+from config.settings import Settings
+from db.dal import user_dal
+
+# Concurrent sends per queue; ~rate x Bot API round trip, with headroom
+DEFAULT_QUEUE_WORKERS = 8
+
+# Max waiting messages per queue and what add_message does when it's full
+DEFAULT_QUEUE_MAX_SIZE = 100000
+OVERFLOW_WAIT = "wait"      # await until there is room (backpressure)
+OVERFLOW_REJECT = "reject"  # raise QueueFullError
+
+# Transient failures (network, 5xx) are retried with exponential backoff
+MAX_SEND_RETRIES = 5
+RETRY_BACKOFF_BASE_SECONDS = 1.0
+RETRY_BACKOFF_MAX_SECONDS = 60.0
+
+# Blocked chats are written to the DB in batches at most this often
+BLOCKED_CHATS_FLUSH_DELAY_SECONDS = 5.0
+
+# Priority classes, highest first. Lanes share the rate budget by weight:
+# while all three have work, 8 of every 13 sends are transactional.
+PRIORITY_TRANSACTIONAL = 0  # payments, subscription changes, admin alerts
+PRIORITY_INTERACTIVE = 1    # default for everything else
+PRIORITY_BULK = 2           # broadcasts
+PRIORITY_NAMES = ("transactional", "interactive", "bulk")
+PRIORITY_WEIGHTS = (8, 4, 1)
+
+# Telegram Bot API limits
+TELEGRAM_GLOBAL_MESSAGES_PER_SECOND = 30
+TELEGRAM_PRIVATE_CHAT_MESSAGES_PER_SECOND = 1
+TELEGRAM_GROUP_CHAT_MESSAGES_PER_SECOND = 20 / 60
+
+
+class QueueFullError(Exception):
+    """Raised by add_message when the queue is full and the policy is 'reject'"""
 
 
 @dataclass
@@ -14,64 +63,443 @@ class QueuedMessage:
     method_name: str  # 'send_message', 'edit_message_text', etc.
     kwargs: Dict[str, Any]
     callback: Optional[Callable[[Any], Awaitable[None]]] = None  # Optional callback for result
+    attempts: int = 0  # Failed transient attempts so far
+    outbox_id: Optional[int] = None  # Row id when backed by the durable queue
+    priority: int = PRIORITY_INTERACTIVE
+    enqueued_at: float = field(default_factory=time.monotonic)
+    send_started_at: Optional[float] = None  # Start of the last send attempt
+    tracking_key: Optional[str] = None  # Outcome is reported to listeners of this key
+
+    @property
+    def order_key(self) -> Tuple[int, int]:
+        """Messages sharing this key are delivered in order"""
+        return self.chat_id, self.priority
 
 
 class MessageQueue:
-    """Message queue with rate limiting for Telegram API"""
-    
-    def __init__(self, messages_per_second: float, burst_size: int = 5):
+    """Message queue with rate limiting for Telegram API
+
+    A message is sent only when three token buckets allow it at once: the
+    queue's own lane limit, the per-chat limit of the target chat and the
+    optional bot-wide bucket shared by all queues. All timing uses the
+    monotonic clock.
+
+    Ready messages sit in one lane per priority class; workers pick the next
+    lane by smooth weighted round robin over ``PRIORITY_WEIGHTS``, so a
+    broadcast can't starve payment messages and vice versa.
+
+    Up to ``max_workers`` sends are in flight at a time so throughput is not
+    capped at one request per round trip. Messages to the same chat and of
+    the same priority are still sent strictly one after another, in the
+    order they were queued: while such a message is ready or in flight,
+    newer ones wait in the backlog for its ``order_key``.
+
+    Workers only take messages whose chat bucket has a token. A message
+    for a chat that is still cooling down is parked in a heap keyed by the
+    time its bucket refills and goes back to its lane then, so a few busy
+    chats can't hold every worker while other chats are ready. Workers
+    still wait on the shared lane and global buckets.
+
+    Failures are classified: a RetryAfter pauses the whole queue for the
+    requested time and puts the message back at the head; network and 5xx
+    errors are retried with exponential backoff up to ``MAX_SEND_RETRIES``;
+    "forbidden" errors (bot blocked, account deleted) are reported through
+    ``on_chat_blocked`` and dropped. The chat keeps its place while a message
+    waits for a retry, so per-chat order survives retries too.
+
+    At most ``max_size`` messages wait at once. Beyond that ``add_message``
+    either waits for room or raises ``QueueFullError``, depending on
+    ``overflow_policy``; transactional messages are always admitted.
+    Queue wait and send latency go to the metrics registry per lane.
+    """
+
+    _CHAT_BUCKET_PRUNE_EVERY = 1000
+
+    def __init__(self, messages_per_second: float, burst_size: int = 5,
+                 per_chat_rate: Optional[float] = None, per_chat_burst: int = 1,
+                 global_bucket: Optional[TokenBucket] = None, max_workers: int = 1,
+                 on_chat_blocked: Optional[Callable[[int], None]] = None,
+                 name: str = "queue", max_size: Optional[int] = None,
+                 overflow_policy: str = OVERFLOW_WAIT,
+                 on_message_outcome: Optional[Callable[[QueuedMessage, str], None]] = None):
+        self.name = name
         self.messages_per_second = messages_per_second
         self.burst_size = burst_size
-        self.queue: deque[QueuedMessage] = deque()
-        self.last_send_times: deque[datetime] = deque()
-        self.is_processing = False
-        self.delay_between_messages = 1.0 / messages_per_second
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_workers = max(1, max_workers)
+        # Ready messages per priority lane: at most one per order_key
+        self.lanes: Tuple[deque[QueuedMessage], ...] = tuple(deque() for _ in PRIORITY_WEIGHTS)
+        self._lane_credit = [0] * len(PRIORITY_WEIGHTS)
+        # order_key -> messages queued behind its ready/in-flight message.
+        # A key is present while it has a message ready or in flight.
+        self._chat_backlog: Dict[Tuple[int, int], deque[QueuedMessage]] = {}
+        self._backlog_size = 0
+        # (ready_at, seq, message) for messages whose chat bucket is empty
+        self._parked: List[Tuple[float, int, QueuedMessage]] = []
+        self._park_seq = itertools.count()
+        self._unpark_handle: Optional[asyncio.TimerHandle] = None
+        self._unpark_at = 0.0
+        self._workers: Set[asyncio.Task] = set()
+        self.in_flight = 0
+
+        self.lane_bucket = TokenBucket(messages_per_second, burst_size)
+        self.global_bucket = global_bucket
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._acquired_since_prune = 0
+        self.recent_sends = SlidingWindowCounter(window_seconds=60)
+
+        self.on_chat_blocked = on_chat_blocked
+        self.on_message_outcome = on_message_outcome
+        self.paused_until = 0.0
+        self._retry_waiting = 0
+        self.retry_after_count = 0
+        self.retried_count = 0
+        self.failed_count = 0
+        self.blocked_count = 0
+
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self._space_available = asyncio.Event()
+        self.rejected_count = 0
+        self._lane_sent = [SlidingWindowCounter(window_seconds=60) for _ in PRIORITY_WEIGHTS]
+        self._lane_errors = [SlidingWindowCounter(window_seconds=60) for _ in PRIORITY_WEIGHTS]
+
+    @property
+    def is_processing(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def ready_count(self) -> int:
+        return sum(len(lane) for lane in self.lanes)
+
+    def __len__(self) -> int:
+        """Messages waiting to be sent (ready, parked, backlogged and awaiting retry)"""
+        return self.ready_count + len(self._parked) + self._backlog_size + self._retry_waiting
+
+    def lane_sizes(self) -> Dict[str, int]:
+        """Waiting messages per priority class (ready, parked and backlogged)"""
+        sizes = [len(lane) for lane in self.lanes]
+        for _, _, message in self._parked:
+            sizes[message.priority] += 1
+        for (_, priority), backlog in self._chat_backlog.items():
+            sizes[priority] += len(backlog)
+        return dict(zip(PRIORITY_NAMES, sizes))
         
+    def _depth(self) -> int:
+        """Messages counted against max_size"""
+        return len(self)
+
+    async def _wait_for_room(self, message: QueuedMessage) -> None:
+        if self.max_size is None or message.priority == PRIORITY_TRANSACTIONAL:
+            return
+        while self._depth() >= self.max_size:
+            if self.overflow_policy == OVERFLOW_REJECT:
+                self.rejected_count += 1
+                raise QueueFullError(f"{self.name} queue is full ({self.max_size} messages)")
+            self._space_available.clear()
+            await self._space_available.wait()
+
+    def _notify_room(self) -> None:
+        if self.max_size is not None and self._depth() < self.max_size:
+            self._space_available.set()
+
     async def add_message(self, message: QueuedMessage) -> None:
-        """Add message to queue"""
-        self.queue.append(message)
-        if not self.is_processing:
-            asyncio.create_task(self._process_queue())
+        """Add message to queue, waiting for room if it is full"""
+        message.priority = min(max(message.priority, PRIORITY_TRANSACTIONAL), PRIORITY_BULK)
+        await self._wait_for_room(message)
+        self._enqueue(message)
+
+    def _enqueue(self, message: QueuedMessage) -> None:
+        key = message.order_key
+        backlog = self._chat_backlog.get(key)
+        if backlog is not None:
+            backlog.append(message)
+            self._backlog_size += 1
+            return
+        self._chat_backlog[key] = deque()
+        self.lanes[message.priority].append(message)
+        self._ensure_workers()
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < min(self.max_workers, self.ready_count):
+            task = asyncio.create_task(self._process_queue())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    def _next_message(self) -> Optional[QueuedMessage]:
+        """Smooth weighted round robin over the non-empty lanes.
+
+        Messages for chats without a token are parked on the way.
+        """
+        now = time.monotonic()
+        while True:
+            best = None
+            total_weight = 0
+            for priority, lane in enumerate(self.lanes):
+                if not lane:
+                    continue
+                weight = PRIORITY_WEIGHTS[priority]
+                total_weight += weight
+                self._lane_credit[priority] += weight
+                if best is None or self._lane_credit[priority] > self._lane_credit[best]:
+                    best = priority
+            if best is None:
+                return None
+            self._lane_credit[best] -= total_weight
+            message = self.lanes[best].popleft()
+            chat_wait = self._chat_wait(message.chat_id, now)
+            if chat_wait > 0:
+                self._park(message, now + chat_wait)
+                continue
+            self._notify_room()
+            return message
+
+    def _chat_wait(self, chat_id: int, now: float) -> float:
+        """Seconds until the chat's own bucket has a token"""
+        chat_bucket = self._get_chat_bucket(chat_id, now)
+        return chat_bucket.time_until_available(now=now) if chat_bucket is not None else 0.0
+
+    def _park(self, message: QueuedMessage, ready_at: float) -> None:
+        heapq.heappush(self._parked, (ready_at, next(self._park_seq), message))
+        self._schedule_unpark()
+
+    def _schedule_unpark(self) -> None:
+        if not self._parked:
+            return
+        ready_at = self._parked[0][0]
+        if self._unpark_handle is not None:
+            if self._unpark_at <= ready_at:
+                return
+            self._unpark_handle.cancel()
+        self._unpark_at = ready_at
+        self._unpark_handle = asyncio.get_running_loop().call_later(
+            max(0.0, ready_at - time.monotonic()), self._unpark)
+
+    def _unpark(self) -> None:
+        """Return parked messages whose chat bucket has refilled to their lanes"""
+        self._unpark_handle = None
+        now = time.monotonic()
+        while self._parked and self._parked[0][0] <= now:
+            _, _, message = heapq.heappop(self._parked)
+            self.lanes[message.priority].append(message)
+        self._schedule_unpark()
+        self._ensure_workers()
+
+    def _release_chat(self, key: Tuple[int, int]) -> None:
+        """Promote the next backlogged message for the key, or mark it idle"""
+        backlog = self._chat_backlog.get(key)
+        if backlog:
+            next_message = backlog.popleft()
+            self.lanes[next_message.priority].append(next_message)
+            self._backlog_size -= 1
+        else:
+            self._chat_backlog.pop(key, None)
     
+    def _take_ready(self, predicate: Callable[[QueuedMessage], bool]) -> List[QueuedMessage]:
+        """Remove ready and parked messages matching predicate and release their chats"""
+        taken: List[QueuedMessage] = []
+        for lane in self.lanes:
+            if not any(predicate(m) for m in lane):
+                continue
+            ready = list(lane)
+            lane.clear()
+            for message in ready:
+                if predicate(message):
+                    taken.append(message)
+                else:
+                    lane.append(message)
+        if any(predicate(entry[2]) for entry in self._parked):
+            taken.extend(entry[2] for entry in self._parked if predicate(entry[2]))
+            self._parked = [entry for entry in self._parked if not predicate(entry[2])]
+            heapq.heapify(self._parked)
+        # Not in flight, so the next message for each key (if any) may go
+        for message in taken:
+            self._release_chat(message.order_key)
+        return taken
+
+    def _take_tracked(self, tracking_key: str) -> List[QueuedMessage]:
+        """Remove waiting messages queued with tracking_key; in-flight ones are kept"""
+        taken: List[QueuedMessage] = []
+        for key, backlog in self._chat_backlog.items():
+            if any(m.tracking_key == tracking_key for m in backlog):
+                kept = deque(m for m in backlog if m.tracking_key != tracking_key)
+                taken.extend(m for m in backlog if m.tracking_key == tracking_key)
+                self._backlog_size -= len(backlog) - len(kept)
+                self._chat_backlog[key] = kept
+        taken.extend(self._take_ready(lambda m: m.tracking_key == tracking_key))
+        self._notify_room()
+        return taken
+
+    async def discard_tracked(self, tracking_key: str) -> int:
+        """Drop unsent messages of a cancelled batch. Returns how many were dropped."""
+        return len(self._take_tracked(tracking_key))
+
+    def _requeue_for_retry(self, message: QueuedMessage) -> None:
+        self._retry_waiting -= 1
+        self.lanes[message.priority].appendleft(message)
+        self._ensure_workers()
+
     async def _process_queue(self) -> None:
-        """Process messages from queue with rate limiting"""
-        if self.is_processing:
-            return
-            
-        self.is_processing = True
-        
-        try:
-            while self.queue:
-                # Check if we need to wait
-                await self._wait_if_needed()
-                
-                # Get and process next message
-                message = self.queue.popleft()
+        """Worker: send ready messages with rate limiting until none are left"""
+        while True:
+            message = self._next_message()
+            if message is None:
+                break
+            chat_done = True
+            self.in_flight += 1
+            try:
+                # Wait until the shared limits allow a send
+                if not await self._acquire_send_slot(message.chat_id):
+                    # Another message to this chat took its token meanwhile
+                    now = time.monotonic()
+                    self._park(message, now + self._chat_wait(message.chat_id, now))
+                    chat_done = False
+                    continue
+                message.send_started_at = time.monotonic()
                 try:
-                    await self._send_message(message)
-                    self.last_send_times.append(datetime.now())
-                    
-                    # Keep only recent send times (last minute)
-                    cutoff_time = datetime.now() - timedelta(seconds=60)
-                    while self.last_send_times and self.last_send_times[0] < cutoff_time:
-                        self.last_send_times.popleft()
-                        
-                except Exception as e:
-                    logging.error(f"Failed to send queued message to {message.chat_id}: {e}")
-                    
-        finally:
-            self.is_processing = False
-    
-    async def _wait_if_needed(self) -> None:
-        """Wait if we need to respect rate limits"""
-        if not self.last_send_times:
-            return
-            
-        # Calculate time since last message
-        time_since_last = (datetime.now() - self.last_send_times[-1]).total_seconds()
-        
-        if time_since_last < self.delay_between_messages:
-            wait_time = self.delay_between_messages - time_since_last
+                    result = await self._send_message(message)
+                finally:
+                    get_metrics().observe("queue_send", self._lane_label(message),
+                                          time.monotonic() - message.send_started_at)
+                self.recent_sends.add()
+                self._on_message_finished(message, "delivered")
+                if message.callback:
+                    # After the outcome is recorded: a failing callback is not a failed send
+                    await self._run_callback(message, result)
+            except TelegramRetryAfter as e:
+                # Flood control: stop the whole lane, then retry this message first
+                self.retry_after_count += 1
+                self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+                logging.warning(
+                    f"Flood control hit while sending to {message.chat_id}, "
+                    f"pausing queue for {e.retry_after}s"
+                )
+                self.lanes[message.priority].appendleft(message)
+                chat_done = False
+            except TelegramForbiddenError as e:
+                self.blocked_count += 1
+                logging.info(f"Chat {message.chat_id} is unreachable (blocked or deactivated): {e}")
+                if self.on_chat_blocked:
+                    self.on_chat_blocked(message.chat_id)
+                self._on_message_finished(message, "blocked", str(e))
+            except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError) as e:
+                message.attempts += 1
+                if message.attempts > MAX_SEND_RETRIES:
+                    self.failed_count += 1
+                    logging.error(
+                        f"Giving up on queued message to {message.chat_id} "
+                        f"after {MAX_SEND_RETRIES} retries: {e}"
+                    )
+                    self._on_message_finished(message, "failed", f"retries exhausted: {e}")
+                else:
+                    self.retried_count += 1
+                    delay = min(RETRY_BACKOFF_MAX_SECONDS,
+                                RETRY_BACKOFF_BASE_SECONDS * 2 ** (message.attempts - 1))
+                    logging.warning(
+                        f"Transient error sending to {message.chat_id}, "
+                        f"retry {message.attempts}/{MAX_SEND_RETRIES} in {delay:.0f}s: {e}"
+                    )
+                    # The worker moves on; the chat stays reserved until the retry
+                    self._retry_waiting += 1
+                    asyncio.get_running_loop().call_later(delay, self._requeue_for_retry, message)
+                    chat_done = False
+            except TelegramBadRequest as e:
+                self.failed_count += 1
+                logging.error(f"Telegram rejected queued message to {message.chat_id}: {e}")
+                self._on_message_finished(message, "failed", f"bad request: {e}")
+            except Exception as e:
+                self.failed_count += 1
+                logging.error(f"Failed to send queued message to {message.chat_id}: {e}")
+                self._on_message_finished(message, "failed", f"{type(e).__name__}: {e}")
+            finally:
+                self.in_flight -= 1
+                if chat_done:
+                    self._release_chat(message.order_key)
+
+    @staticmethod
+    async def _run_callback(message: QueuedMessage, result: Any) -> None:
+        try:
+            await message.callback(result)
+        except Exception as e:
+            logging.error(f"Result callback for message to {message.chat_id} failed: {e}", exc_info=True)
+
+    def _lane_label(self, message: QueuedMessage) -> str:
+        return f"{self.name}.{PRIORITY_NAMES[message.priority]}"
+
+    def _on_message_finished(self, message: QueuedMessage, outcome: str,
+                             error: Optional[str] = None) -> None:
+        """Called once per message when it is delivered or dropped for good.
+
+        ``outcome`` is 'delivered', 'blocked' or 'failed'.
+        """
+        metrics = get_metrics()
+        label = self._lane_label(message)
+        if message.send_started_at is not None:
+            metrics.observe("queue_wait", label, message.send_started_at - message.enqueued_at)
+        metrics.increment("queue_outcomes", f"{label}.{outcome}")
+        if outcome == "delivered":
+            self._lane_sent[message.priority].add()
+        else:
+            self._lane_errors[message.priority].add()
+        if message.tracking_key and self.on_message_outcome:
+            self.on_message_outcome(message, outcome)
+
+    def lane_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per lane: waiting messages, sends and errors over the last minute"""
+        waiting = self.lane_sizes()
+        return {
+            lane_name: {
+                "waiting": waiting[lane_name],
+                "sent_last_minute": self._lane_sent[priority].total(),
+                "errors_last_minute": self._lane_errors[priority].total(),
+            }
+            for priority, lane_name in enumerate(PRIORITY_NAMES)
+        }
+
+    def _get_chat_bucket(self, chat_id: int, now: float) -> Optional[TokenBucket]:
+        if not self.per_chat_rate:
+            return None
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.per_chat_rate, self.per_chat_burst, now=now
+            )
+        return bucket
+
+    def _prune_chat_buckets(self, now: float) -> None:
+        self._acquired_since_prune = 0
+        idle_chat_ids = [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.is_full(now)]
+        for chat_id in idle_chat_ids:
+            del self._chat_buckets[chat_id]
+
+    async def _acquire_send_slot(self, chat_id: int) -> bool:
+        """Wait until lane and global limits allow one send and take a token
+        from each bucket, the chat's included.
+
+        Returns False without waiting on or consuming anything if the chat's
+        bucket is empty by then; the caller parks the message.
+        """
+        while True:
+            now = time.monotonic()
+            buckets = [self.lane_bucket]
+            if self.global_bucket is not None:
+                buckets.append(self.global_bucket)
+
+            wait_time = max(bucket.time_until_available(now=now) for bucket in buckets)
+            wait_time = max(wait_time, self.paused_until - now)
+            if wait_time <= 0:
+                chat_bucket = self._get_chat_bucket(chat_id, now)
+                if chat_bucket is not None:
+                    if chat_bucket.time_until_available(now=now) > 0:
+                        return False
+                    buckets.append(chat_bucket)
+                for bucket in buckets:
+                    bucket.try_consume(now=now)
+                self._acquired_since_prune += 1
+                if self._acquired_since_prune >= self._CHAT_BUCKET_PRUNE_EVERY:
+                    self._prune_chat_buckets(now)
+                return True
             await asyncio.sleep(wait_time)
     
     async def _send_message(self, message: QueuedMessage) -> Any:
@@ -82,142 +510,266 @@ class MessageQueue:
 class TelegramMessageQueue(MessageQueue):
     """Telegram-specific message queue"""
     
-    def __init__(self, bot: Bot, messages_per_second: float, burst_size: int = 5):
-        super().__init__(messages_per_second, burst_size)
+    def __init__(self, bot: Bot, messages_per_second: float, burst_size: int = 5,
+                 per_chat_rate: Optional[float] = None, per_chat_burst: int = 1,
+                 global_bucket: Optional[TokenBucket] = None, max_workers: int = 1,
+                 on_chat_blocked: Optional[Callable[[int], None]] = None, **kwargs):
+        super().__init__(messages_per_second, burst_size, per_chat_rate,
+                         per_chat_burst, global_bucket, max_workers, on_chat_blocked, **kwargs)
         self.bot = bot
     
     async def _send_message(self, message: QueuedMessage) -> Any:
         """Send message using bot method"""
         method = getattr(self.bot, message.method_name)
-        result = await method(chat_id=message.chat_id, **message.kwargs)
-        
-        # Call callback if provided
-        if message.callback:
-            await message.callback(result)
-            
-        return result
+        return await method(chat_id=message.chat_id, **message.kwargs)
 
 
 class MessageQueueManager:
     """Manager for different types of message queues"""
     
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, settings: Optional[Settings] = None,
+                 async_session_factory: Optional[sessionmaker] = None):
         self.bot = bot
+        self.settings = settings
+        self.async_session_factory = async_session_factory
+        self._blocked_chat_ids: Set[int] = set()
+        self._blocked_flush_task: Optional[asyncio.Task] = None
+        self._outcome_listeners: Dict[str, Callable[[int, str], None]] = {}
+
+        # Bot-wide limit shared by all queues
+        self.global_bucket = TokenBucket(
+            TELEGRAM_GLOBAL_MESSAGES_PER_SECOND, TELEGRAM_GLOBAL_MESSAGES_PER_SECOND
+        )
         
         # Different queues for different types of chats
+        max_size = settings.MESSAGE_QUEUE_MAX_SIZE if settings else DEFAULT_QUEUE_MAX_SIZE
+        overflow_policy = (settings.MESSAGE_QUEUE_OVERFLOW_POLICY.lower()
+                           if settings else OVERFLOW_WAIT)
+
         self.group_queue = TelegramMessageQueue(
             bot=bot,
+            name="group",
+            max_size=max_size,
+            overflow_policy=overflow_policy,
+            on_message_outcome=self._dispatch_outcome,
             messages_per_second=15/60,  # 15 messages per minute for groups
-            burst_size=3
+            burst_size=3,
+            per_chat_rate=TELEGRAM_GROUP_CHAT_MESSAGES_PER_SECOND,
+            per_chat_burst=3,
+            global_bucket=self.global_bucket,
         )
         
-        self.user_queue = TelegramMessageQueue(
-            bot=bot, 
-            messages_per_second=25,  # 25 messages per second for users
-            burst_size=10
+        user_queue_options = dict(
+            bot=bot,
+            name="user",
+            max_size=max_size,
+            overflow_policy=overflow_policy,
+            on_message_outcome=self._dispatch_outcome,
+            messages_per_second=TELEGRAM_GLOBAL_MESSAGES_PER_SECOND,
+            burst_size=TELEGRAM_GLOBAL_MESSAGES_PER_SECOND,
+            per_chat_rate=TELEGRAM_PRIVATE_CHAT_MESSAGES_PER_SECOND,
+            per_chat_burst=1,
+            global_bucket=self.global_bucket,
+            max_workers=settings.MESSAGE_QUEUE_WORKERS if settings else DEFAULT_QUEUE_WORKERS,
+            on_chat_blocked=self.record_blocked_chat,
         )
+        self.backend = settings.MESSAGE_QUEUE_BACKEND.lower() if settings else "memory"
+        if self.backend == "postgres" and async_session_factory is not None:
+            from bot.utils.durable_message_queue import DurableMessageQueue
+
+            self.user_queue = DurableMessageQueue(
+                async_session_factory=async_session_factory,
+                batch_size=settings.DURABLE_QUEUE_BATCH_SIZE,
+                poll_interval=settings.DURABLE_QUEUE_POLL_INTERVAL_MS / 1000,
+                claim_timeout=settings.DURABLE_QUEUE_CLAIM_TIMEOUT_SECONDS,
+                failed_retention_days=settings.DURABLE_QUEUE_FAILED_RETENTION_DAYS,
+                **user_queue_options,
+            )
+        else:
+            self.backend = "memory"
+            self.user_queue = TelegramMessageQueue(**user_queue_options)
+
+    def start(self) -> None:
+        """Start background work; the durable backend resumes pending messages"""
+        start_queue = getattr(self.user_queue, "start", None)
+        if callable(start_queue):
+            start_queue()
     
+    def add_outcome_listener(self, tracking_key: str, listener: Callable[[int, str], None]) -> None:
+        """Call listener(chat_id, outcome) for every finished message queued with tracking_key"""
+        self._outcome_listeners[tracking_key] = listener
+
+    def remove_outcome_listener(self, tracking_key: str) -> None:
+        self._outcome_listeners.pop(tracking_key, None)
+
+    def _dispatch_outcome(self, message: QueuedMessage, outcome: str) -> None:
+        listener = self._outcome_listeners.get(message.tracking_key)
+        if listener is None:
+            return
+        try:
+            listener(message.chat_id, outcome)
+        except Exception as e:
+            logging.error(f"Outcome listener for '{message.tracking_key}' failed: {e}", exc_info=True)
+
+    async def discard_tracked(self, tracking_key: str) -> int:
+        """Drop messages queued with tracking_key that haven't been sent yet"""
+        return (await self.user_queue.discard_tracked(tracking_key)
+                + await self.group_queue.discard_tracked(tracking_key))
+
+    def record_blocked_chat(self, chat_id: int) -> None:
+        """Remember a user who blocked the bot; flushed to the DB in batches"""
+        if chat_id <= 0 or self.async_session_factory is None:
+            return
+        self._blocked_chat_ids.add(chat_id)
+        if self._blocked_flush_task is None or self._blocked_flush_task.done():
+            self._blocked_flush_task = asyncio.create_task(self._flush_blocked_chats())
+
+    async def _flush_blocked_chats(self) -> None:
+        await asyncio.sleep(BLOCKED_CHATS_FLUSH_DELAY_SECONDS)
+        await self._write_blocked_chats()
+
+    async def _write_blocked_chats(self) -> None:
+        while self._blocked_chat_ids:
+            chat_ids, self._blocked_chat_ids = self._blocked_chat_ids, set()
+            try:
+                async with self.async_session_factory() as session:
+                    marked = await user_dal.mark_users_bot_blocked(session, chat_ids)
+                    await session.commit()
+                logging.info(f"Marked {marked} users as having blocked the bot")
+            except Exception as e:
+                logging.error(f"Failed to record {len(chat_ids)} blocked chats: {e}", exc_info=True)
+
     def _is_group_chat(self, chat_id: int) -> bool:
-        """Check if chat_id belongs to a group or channel"""
-        return str(chat_id).startswith('-100')
+        """Check if chat_id belongs to a group or channel (negative IDs)"""
+        return chat_id < 0
     
-    async def send_message(self, chat_id: int, **kwargs) -> None:
+    async def send_message(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                           tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_message call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_message',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
     
-    async def edit_message_text(self, chat_id: int, **kwargs) -> None:
+    async def edit_message_text(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                                tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue an edit_message_text call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='edit_message_text',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
     
-    async def send_document(self, chat_id: int, **kwargs) -> None:
+    async def send_document(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                            tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_document call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_document',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
     
-    async def send_photo(self, chat_id: int, **kwargs) -> None:
+    async def send_photo(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                         tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_photo call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_photo',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_video(self, chat_id: int, **kwargs) -> None:
+    async def send_video(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                         tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_video call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_video',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_animation(self, chat_id: int, **kwargs) -> None:
+    async def send_animation(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                             tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_animation (GIF) call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_animation',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_audio(self, chat_id: int, **kwargs) -> None:
+    async def send_audio(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                         tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_audio call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_audio',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_voice(self, chat_id: int, **kwargs) -> None:
+    async def send_voice(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                         tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_voice call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_voice',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_sticker(self, chat_id: int, **kwargs) -> None:
+    async def send_sticker(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                           tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_sticker call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_sticker',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
 
-    async def send_video_note(self, chat_id: int, **kwargs) -> None:
+    async def send_video_note(self, chat_id: int, priority: int = PRIORITY_INTERACTIVE,
+                              tracking_key: Optional[str] = None, **kwargs) -> None:
         """Queue a send_video_note call"""
         queue = self.group_queue if self._is_group_chat(chat_id) else self.user_queue
         message = QueuedMessage(
             chat_id=chat_id,
             method_name='send_video_note',
-            kwargs=kwargs
+            kwargs=kwargs,
+            priority=priority,
+            tracking_key=tracking_key,
         )
         await queue.add_message(message)
     
@@ -225,26 +777,64 @@ class MessageQueueManager:
         """Send callback query answer immediately (not rate limited)"""
         await self.bot.answer_callback_query(callback_query_id, **kwargs)
     
+    async def close(self) -> None:
+        """Stop the durable backend and write out blocked chats still waiting for the batched flush"""
+        close_queue = getattr(self.user_queue, "close", None)
+        if callable(close_queue):
+            await close_queue()
+        if self._blocked_flush_task and not self._blocked_flush_task.done():
+            self._blocked_flush_task.cancel()
+        if self.async_session_factory is not None:
+            await self._write_blocked_chats()
+
     def get_queue_stats(self) -> Dict[str, Any]:
         """Get statistics about queues"""
         return {
-            "group_queue_size": len(self.group_queue.queue),
-            "user_queue_size": len(self.user_queue.queue),
+            "group_queue_size": len(self.group_queue),
+            "user_queue_size": len(self.user_queue),
             "group_queue_processing": self.group_queue.is_processing,
             "user_queue_processing": self.user_queue.is_processing,
-            "group_recent_sends": len(self.group_queue.last_send_times),
-            "user_recent_sends": len(self.user_queue.last_send_times)
+            "group_recent_sends": self.group_queue.recent_sends.total(),
+            "user_recent_sends": self.user_queue.recent_sends.total(),
+            "user_rate_limit": self.user_queue.messages_per_second,
+            "user_in_flight": self.user_queue.in_flight,
+            "user_workers": self.user_queue.max_workers,
+            "user_retry_after": self.user_queue.retry_after_count,
+            "user_retried": self.user_queue.retried_count,
+            "user_failed": self.user_queue.failed_count,
+            "user_blocked": self.user_queue.blocked_count,
+            "group_failed": self.group_queue.failed_count,
+            "user_lanes": self.user_queue.lane_stats(),
+            "group_lanes": self.group_queue.lane_stats(),
+            "user_rejected": self.user_queue.rejected_count,
+            "user_queue_backend": self.backend,
+            **({"durable": self.user_queue.get_stats()} if self.backend == "postgres" else {}),
         }
 
 
+async def send_transactional_message(bot: Bot, chat_id: int, text: str, **kwargs) -> None:
+    """Send a payment or subscription message ahead of any bulk traffic.
+
+    Uses the transactional lane when the queue manager is running, otherwise
+    calls the Bot API directly.
+    """
+    queue_manager = get_queue_manager()
+    if queue_manager is None:
+        await bot.send_message(chat_id, text, **kwargs)
+        return
+    await queue_manager.send_message(chat_id, priority=PRIORITY_TRANSACTIONAL, text=text, **kwargs)
+
+
 # Global queue manager instance
 _queue_manager: Optional[MessageQueueManager] = None
 
 
-def init_queue_manager(bot: Bot) -> MessageQueueManager:
+def init_queue_manager(bot: Bot, settings: Optional[Settings] = None,
+                       async_session_factory: Optional[sessionmaker] = None) -> MessageQueueManager:
     """Initialize global queue manager"""
     global _queue_manager
-    _queue_manager = MessageQueueManager(bot)
+    _queue_manager = MessageQueueManager(bot, settings=settings,
+                                         async_session_factory=async_session_factory)
     return _queue_manager
 
 
@@ -0,0 +1,136 @@
+import bisect
+import contextvars
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of latency buckets: 0.1 ms .. ~100 s, ~26% apart
+_BUCKET_BOUNDS: List[float] = [0.0001 * (1.26 ** i) for i in range(61)]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate quantiles."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index >= len(_BUCKET_BOUNDS):
+                    return self.max
+                return min(_BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        to_ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            "count": self.count,
+            "avg_ms": to_ms(self.total / self.count) if self.count else 0.0,
+            "p50_ms": to_ms(self.quantile(0.50)),
+            "p95_ms": to_ms(self.quantile(0.95)),
+            "p99_ms": to_ms(self.quantile(0.99)),
+            "max_ms": to_ms(self.max),
+        }
+
+
+class MetricsRegistry:
+    """Process-wide store of latency histograms, counters and stats providers."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe(self, group: str, name: str, seconds: float) -> None:
+        key = (group, name)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def increment(self, group: str, name: str, value: int = 1) -> None:
+        key = (group, name)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_provider(self, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable whose dict is included in every snapshot."""
+        self._providers[name] = provider
+
+    def snapshot(self) -> Dict[str, Any]:
+        histograms: Dict[str, Dict[str, Any]] = {}
+        for (group, name), histogram in sorted(self._histograms.items()):
+            histograms.setdefault(group, {})[name] = histogram.snapshot()
+
+        counters: Dict[str, Dict[str, int]] = {}
+        for (group, name), value in sorted(self._counters.items()):
+            counters.setdefault(group, {})[name] = value
+
+        stats: Dict[str, Any] = {}
+        for name, provider in self._providers.items():
+            try:
+                stats[name] = provider()
+            except Exception as e:
+                logging.warning(f"Metrics provider '{name}' failed: {e}")
+                stats[name] = {"error": str(e)}
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "latency": histograms,
+            "counters": counters,
+            "stats": stats,
+        }
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get global metrics registry"""
+    return _metrics
+
+
+# Per-update DB statement counter. A fresh one-element list is set by the
+# update timing middleware; the engine listener increments it in place.
+_db_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "db_query_counter", default=None
+)
+
+
+def start_db_query_count() -> contextvars.Token:
+    return _db_query_counter.set([0])
+
+
+def finish_db_query_count(token: contextvars.Token) -> int:
+    counter = _db_query_counter.get()
+    _db_query_counter.reset(token)
+    return counter[0] if counter else 0
+
+
+def instrument_engine(async_engine) -> None:
+    """Count every statement sent to the DB towards the current update."""
+    from sqlalchemy import event
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _db_query_counter.get()
+        if counter is not None:
+            counter[0] += 1
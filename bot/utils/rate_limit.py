@@ -0,0 +1,72 @@
+import time
+from typing import List, Optional
+
+
+class TokenBucket:
+    """Classic token bucket on a monotonic clock.
+
+    ``rate`` tokens are added per second up to ``capacity``; a full bucket
+    allows a burst of ``capacity`` events.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_consume(self, tokens: float = 1.0, now: Optional[float] = None) -> bool:
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until ``tokens`` can be consumed (0 if available now)."""
+        self._refill(time.monotonic() if now is None else now)
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return missing / self.rate
+
+    def is_full(self, now: Optional[float] = None) -> bool:
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens >= self.capacity
+
+
+class SlidingWindowCounter:
+    """Event count over the last ``window_seconds``, in one-second slots."""
+
+    __slots__ = ("window_seconds", "_slots", "_slot_seconds")
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = max(1, window_seconds)
+        self._slots: List[int] = [0] * self.window_seconds
+        self._slot_seconds: List[int] = [0] * self.window_seconds
+
+    def add(self, count: int = 1, now: Optional[float] = None) -> None:
+        second = int(time.monotonic() if now is None else now)
+        index = second % self.window_seconds
+        if self._slot_seconds[index] != second:
+            self._slot_seconds[index] = second
+            self._slots[index] = 0
+        self._slots[index] += count
+
+    def total(self, now: Optional[float] = None) -> int:
+        second = int(time.monotonic() if now is None else now)
+        oldest = second - self.window_seconds
+        return sum(
+            count for count, slot_second in zip(self._slots, self._slot_seconds)
+            if slot_second > oldest
+        )
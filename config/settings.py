@@ -103,6 +103,17 @@ class Settings(BaseSettings):
 
     PANEL_API_URL: Optional[str] = None
     PANEL_API_KEY: Optional[str] = None
+    # Shared HTTP connection pool of the panel API client
+    PANEL_HTTP_POOL_SIZE: int = Field(default=20, description="Max concurrent connections to the panel")
+    PANEL_HTTP_KEEPALIVE_SECONDS: float = Field(default=60.0, description="Idle keep-alive time of pooled connections")
+    PANEL_HTTP_DNS_CACHE_SECONDS: int = Field(default=300, description="How long resolved panel addresses are cached")
+    PANEL_USER_CACHE_TTL_SECONDS: float = Field(default=30.0, description="Lifetime of cached panel user lookups, 0 disables the cache")
+    PANEL_USER_CACHE_SIZE: int = Field(default=10000, description="Max panel user lookups kept in the cache")
+    # Paging through all panel users (sync)
+    PANEL_USERS_PAGE_SIZE: int = Field(default=100, description="Initial page size when listing panel users")
+    PANEL_USERS_PAGE_SIZE_MAX: int = Field(default=1000, description="Upper bound for the adaptive page size")
+    PANEL_USERS_FETCH_CONCURRENCY: int = Field(default=4, description="Pages of panel users fetched ahead in parallel")
+    PANEL_USERS_REQUESTS_PER_SECOND: float = Field(default=10.0, description="Rate limit for user page requests, 0 disables it")
     USER_TRAFFIC_LIMIT_GB: Optional[float] = Field(default=0.0)
     USER_TRAFFIC_STRATEGY: str = Field(default="NO_RESET")
     USER_SQUAD_UUIDS: Optional[str] = Field(
@@ -118,6 +129,49 @@ class Settings(BaseSettings):
     WEB_SERVER_PORT: int = Field(default=8080)
     LOGS_PAGE_SIZE: int = Field(default=10)
 
+    # Runtime metrics endpoint (latency histograms, queue and cache stats)
+    METRICS_ENABLED: bool = Field(default=False, description="Expose runtime metrics over HTTP")
+    METRICS_TOKEN: Optional[str] = Field(default=None, description="Required as ?token= or X-Metrics-Token header; the route is not served without it")
+
+    # Number of recent update_ids remembered to drop redelivered webhook updates
+    UPDATE_DEDUP_WINDOW_SIZE: int = Field(default=10000)
+
+    # Per-user flood control: comma-separated key=rate/burst (rate in events per second).
+    # Keys: message, callback_query, inline_query or callback:<data prefix>. Empty disables.
+    THROTTLE_RULES: Optional[str] = Field(
+        default="message=1/5,callback_query=2/8,inline_query=1/5,callback:main_action=1/4")
+
+    # Outgoing message queue: concurrent Bot API sends for the user queue
+    MESSAGE_QUEUE_WORKERS: int = Field(default=8, description="Max in-flight sends; rate limits still apply")
+    MESSAGE_QUEUE_MAX_SIZE: int = Field(default=100000, description="Max waiting messages per queue (transactional ones are always admitted)")
+    MESSAGE_QUEUE_OVERFLOW_POLICY: str = Field(default="wait", description="'wait' (backpressure) or 'reject' when the queue is full")
+    MESSAGE_QUEUE_BACKEND: str = Field(default="memory", description="'memory' or 'postgres' (durable, shared by replicas)")
+    DURABLE_QUEUE_BATCH_SIZE: int = Field(default=100, description="Rows inserted/claimed per round trip")
+    DURABLE_QUEUE_POLL_INTERVAL_MS: int = Field(default=1000, description="Max delay between DB sync rounds")
+    DURABLE_QUEUE_CLAIM_TIMEOUT_SECONDS: int = Field(default=600, description="Claims older than this are handed back (dead replica)")
+    DURABLE_QUEUE_FAILED_RETENTION_DAYS: int = Field(default=7, description="Failed outbound rows are deleted after this many days")
+
+    # Broadcast report: how often the live delivery progress message is edited
+    BROADCAST_PROGRESS_INTERVAL_SECONDS: int = Field(default=5)
+    # Broadcast jobs: recipients read per cursor round trip (also the checkpoint
+    # step) and how many messages of one job may wait in the queue at once
+    BROADCAST_RECIPIENTS_CHUNK_SIZE: int = Field(default=1000)
+    BROADCAST_MAX_QUEUED_PER_JOB: int = Field(default=2000)
+
+    # Per-user language cache (I18nMiddleware)
+    LANGUAGE_CACHE_SIZE: int = Field(default=50000, description="Max users kept in the language cache")
+    LANGUAGE_CACHE_TTL_SECONDS: int = Field(default=3600, description="Language cache entry lifetime")
+
+    # Profile sync (ProfileSyncMiddleware)
+    PROFILE_SYNC_CACHE_SIZE: int = Field(default=50000, description="Max users kept in the profile fingerprint cache")
+    PANEL_PROFILE_SYNC_INTERVAL_SECONDS: int = Field(default=60, description="Min interval between panel description updates per user")
+
+    # Background writer for action logs (ActionLoggerMiddleware)
+    ACTION_LOG_BATCH_SIZE: int = Field(default=200, description="Max log records per multi-row INSERT")
+    ACTION_LOG_FLUSH_INTERVAL_MS: int = Field(default=1000, description="Max delay before buffered log records are flushed")
+    ACTION_LOG_BUFFER_SIZE: int = Field(default=20000, description="Max buffered log records; extra records are dropped")
+    ACTION_LOG_RAW_UPDATE_SAMPLE_PERCENT: float = Field(default=1.0, description="Share of regular updates whose raw JSON is stored; errors and admin events are always stored")
+
     SUBSCRIPTION_MINI_APP_URL: Optional[str] = Field(default=None)
 
     START_COMMAND_DESCRIPTION: Optional[str] = Field(default=None)
@@ -222,6 +276,11 @@ class Settings(BaseSettings):
             return f"{base.rstrip('/')}{self.panel_webhook_path}"
         return None
 
+    @computed_field
+    @property
+    def metrics_path(self) -> str:
+        return "/metrics"
+
     @computed_field
     @property
     def cryptopay_webhook_path(self) -> str:
@@ -331,6 +390,10 @@ class Settings(BaseSettings):
     LOG_TRIAL_ACTIVATIONS: bool = Field(default=True, description="Send notifications for trial activations")
     LOG_SUSPICIOUS_ACTIVITY: bool = Field(default=True, description="Send notifications for suspicious promo attempts")
 
+    # Log channel events arriving within the window are sent as one digest
+    LOG_DIGEST_WINDOW_SECONDS: float = Field(default=5.0, description="Digest window; 0 disables coalescing")
+    LOG_DIGEST_MAX_MESSAGES: int = Field(default=5, description="Messages per digest; further events wait for the next one")
+
     model_config = SettingsConfigDict(env_file='.env',
                                       env_file_encoding='utf-8',
                                       extra='ignore',
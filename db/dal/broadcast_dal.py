@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import BroadcastJob, BroadcastOutcome
+
+OUTCOME_COUNTER_COLUMNS = {
+    "delivered": "delivered",
+    "blocked": "blocked",
+    "failed": "failed",
+    "queue_failed": "queue_failed",
+}
+
+
+async def create_broadcast_job(session: AsyncSession, job_data: Dict[str, Any]) -> BroadcastJob:
+    job = BroadcastJob(**job_data)
+    session.add(job)
+    await session.flush()
+    return job
+
+
+async def get_broadcast_job(session: AsyncSession, job_id: int) -> Optional[BroadcastJob]:
+    return await session.get(BroadcastJob, job_id)
+
+
+async def get_broadcast_jobs_by_status(
+    session: AsyncSession, statuses: Iterable[str]
+) -> List[BroadcastJob]:
+    stmt = (
+        select(BroadcastJob)
+        .where(BroadcastJob.status.in_(list(statuses)))
+        .order_by(BroadcastJob.job_id)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_recent_broadcast_jobs(session: AsyncSession, limit: int = 10) -> List[BroadcastJob]:
+    stmt = select(BroadcastJob).order_by(BroadcastJob.job_id.desc()).limit(limit)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def add_broadcast_outcomes(
+    session: AsyncSession, job_id: int, outcomes: Iterable[Tuple[int, str]]
+) -> int:
+    """Multi-row INSERT of (user_id, outcome) pairs and matching counter bumps.
+
+    A recipient already recorded for the job is ignored, so replays after a
+    retry or restart don't double count.
+    """
+    rows = [{"job_id": job_id, "user_id": user_id, "outcome": outcome}
+            for user_id, outcome in outcomes]
+    if not rows:
+        return 0
+    stmt = (
+        pg_insert(BroadcastOutcome)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["job_id", "user_id"])
+        .returning(BroadcastOutcome.outcome)
+    )
+    result = await session.execute(stmt)
+    inserted = result.scalars().all()
+
+    increments: Dict[str, int] = {}
+    for outcome in inserted:
+        column = OUTCOME_COUNTER_COLUMNS.get(outcome, "failed")
+        increments[column] = increments.get(column, 0) + 1
+    if increments:
+        await session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.job_id == job_id)
+            .values({
+                column: getattr(BroadcastJob, column) + count
+                for column, count in increments.items()
+            })
+        )
+    return len(inserted)
+
+
+async def update_broadcast_job(session: AsyncSession, job_id: int, **values: Any) -> None:
+    await session.execute(
+        update(BroadcastJob).where(BroadcastJob.job_id == job_id).values(**values)
+    )
+
+
+async def finish_broadcast_job(session: AsyncSession, job_id: int, status: str = "completed") -> None:
+    await update_broadcast_job(session, job_id, status=status,
+                               finished_at=datetime.now(timezone.utc))
@@ -1,8 +1,8 @@
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Iterable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, insert
 
 from ..models import MessageLog, User
 
@@ -74,3 +74,25 @@ async def create_message_log_no_commit(session: AsyncSession,
         f"Message log added to session: user {log_data.get('user_id')}, event {log_data.get('event_type')}"
     )
     return new_log
+
+
+async def bulk_insert_message_logs(session: AsyncSession,
+                                   records: List[Dict[str, Any]]) -> int:
+    """Insert many log rows with a single executemany (multi-row INSERT).
+
+    Does not commit. Records must only contain MessageLog column keys.
+    """
+    if not records:
+        return 0
+    await session.execute(insert(MessageLog), records)
+    return len(records)
+
+
+async def get_existing_user_ids(session: AsyncSession,
+                                user_ids: Iterable[int]) -> set:
+    ids = {uid for uid in user_ids if uid is not None}
+    if not ids:
+        return set()
+    stmt = select(User.user_id).where(User.user_id.in_(ids))
+    result = await session.execute(stmt)
+    return set(result.scalars().all())
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import and_, delete, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models import OutboundMessage
+
+
+async def enqueue_outbound_messages(session: AsyncSession,
+                                    rows: List[Dict[str, Any]]) -> None:
+    """Multi-row INSERT of chat_id/method_name/payload dicts."""
+    if not rows:
+        return
+    await session.execute(insert(OutboundMessage), rows)
+
+
+async def claim_outbound_batch(session: AsyncSession, limit: int,
+                               worker_id: str) -> List[OutboundMessage]:
+    """Claim up to ``limit`` due messages for this worker.
+
+    Higher priorities (lower numbers) are claimed first. Only the oldest
+    remaining message of each chat and priority is eligible, so messages to
+    one chat are delivered in order even across replicas. Rows locked by
+    another replica are skipped instead of waited on.
+    """
+    earlier = aliased(OutboundMessage)
+    now = datetime.now(timezone.utc)
+    stmt = (
+        select(OutboundMessage)
+        .where(
+            and_(
+                OutboundMessage.status == "pending",
+                OutboundMessage.available_at <= now,
+                ~exists().where(
+                    and_(
+                        earlier.chat_id == OutboundMessage.chat_id,
+                        earlier.priority == OutboundMessage.priority,
+                        earlier.id < OutboundMessage.id,
+                        earlier.status != "failed",
+                    )
+                ),
+            )
+        )
+        .order_by(OutboundMessage.priority, OutboundMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=OutboundMessage)
+    )
+    result = await session.execute(stmt)
+    messages = result.scalars().all()
+    if messages:
+        await session.execute(
+            update(OutboundMessage)
+            .where(OutboundMessage.id.in_([m.id for m in messages]))
+            .values(status="processing", claimed_at=now, claimed_by=worker_id)
+        )
+    return messages
+
+
+async def delete_outbound_messages(session: AsyncSession, ids: Iterable[int]) -> None:
+    ids = list(ids)
+    if ids:
+        await session.execute(delete(OutboundMessage).where(OutboundMessage.id.in_(ids)))
+
+
+async def delete_pending_outbound_by_tracking_key(session: AsyncSession,
+                                                  tracking_key: str) -> int:
+    """Delete unclaimed messages of one tracked batch (e.g. a cancelled broadcast)."""
+    result = await session.execute(
+        delete(OutboundMessage).where(
+            and_(
+                OutboundMessage.tracking_key == tracking_key,
+                OutboundMessage.status == "pending",
+            )
+        )
+    )
+    return result.rowcount
+
+
+async def mark_outbound_failed(session: AsyncSession, failures: Dict[int, str]) -> None:
+    """Mark messages failed with one UPDATE per distinct error text.
+
+    Failures of a broadcast mostly share a few errors (blocked, deactivated),
+    so this stays a handful of statements however many rows failed.
+    """
+    ids_by_error: Dict[str, List[int]] = {}
+    for message_id, error in failures.items():
+        ids_by_error.setdefault(error[:1000], []).append(message_id)
+    for error, ids in ids_by_error.items():
+        await session.execute(
+            update(OutboundMessage)
+            .where(OutboundMessage.id.in_(ids))
+            .values(status="failed", last_error=error)
+        )
+
+
+async def release_outbound_messages(session: AsyncSession, ids: Iterable[int]) -> None:
+    """Hand claimed but unsent messages back to the pool."""
+    ids = list(ids)
+    if ids:
+        await session.execute(
+            update(OutboundMessage)
+            .where(and_(OutboundMessage.id.in_(ids), OutboundMessage.status == "processing"))
+            .values(status="pending", claimed_at=None, claimed_by=None)
+        )
+
+
+async def release_stale_outbound_claims(session: AsyncSession,
+                                        claim_timeout_seconds: int) -> int:
+    """Return messages claimed by a worker that died to the pool."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=claim_timeout_seconds)
+    result = await session.execute(
+        update(OutboundMessage)
+        .where(and_(OutboundMessage.status == "processing", OutboundMessage.claimed_at < cutoff))
+        .values(status="pending", claimed_at=None, claimed_by=None)
+    )
+    return result.rowcount
+
+
+async def purge_failed_outbound_messages(session: AsyncSession, retention_days: int,
+                                         limit: int = 10000) -> int:
+    """Delete up to ``limit`` failed rows created more than ``retention_days`` ago."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    expired_ids = (
+        select(OutboundMessage.id)
+        .where(and_(OutboundMessage.status == "failed", OutboundMessage.created_at < cutoff))
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        delete(OutboundMessage).where(OutboundMessage.id.in_(expired_ids))
+    )
+    return result.rowcount
+
+
+async def count_outbound_by_status(session: AsyncSession) -> Dict[str, int]:
+    stmt = select(OutboundMessage.status, func.count()).group_by(OutboundMessage.status)
+    result = await session.execute(stmt)
+    return {status: count for status, count in result.all()}
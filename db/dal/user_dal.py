@@ -1,13 +1,13 @@
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterable, AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import update, delete, func, and_
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy import update, delete, func, and_, exists
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from ..models import User, Subscription
+from ..models import User, Subscription, BroadcastOutcome
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> Optional[User]:
@@ -152,12 +152,96 @@ async def get_banned_users(session: AsyncSession) -> List[User]:
     return result.scalars().all()
 
 
-async def get_all_active_user_ids_for_broadcast(session: AsyncSession) -> List[int]:
-    stmt = select(User.user_id).where(User.is_banned == False)
+async def get_banned_user_ids(session: AsyncSession) -> List[int]:
+    stmt = select(User.user_id).where(User.is_banned == True)
     result = await session.execute(stmt)
     return result.scalars().all()
 
 
+BROADCAST_TARGETS = ("all", "active", "inactive")
+
+
+def _broadcast_user_ids_stmt(target: str, *columns):
+    """Non-banned, reachable user IDs; 'active'/'inactive' filter by an active subscription.
+
+    ``columns`` replaces the selected user_id column, e.g. to add language_code.
+    """
+    now = datetime.now(timezone.utc)
+    conditions = [User.is_banned == False, User.bot_blocked_at.is_(None)]
+    has_active_subscription = exists().where(
+        and_(
+            Subscription.user_id == User.user_id,
+            Subscription.is_active == True,
+            Subscription.end_date > now,
+        )
+    )
+    if target == "active":
+        conditions.append(has_active_subscription)
+    elif target == "inactive":
+        conditions.append(~has_active_subscription)
+    return select(*(columns or (User.user_id,))).where(and_(*conditions))
+
+
+async def get_broadcast_recipients_page(
+    session: AsyncSession, target: str = "all", after_user_id: Optional[int] = None,
+    limit: int = 1000, skip_job_id: Optional[int] = None,
+) -> List[Tuple[int, Optional[str]]]:
+    """One keyset page of (user_id, language_code) of broadcast recipients.
+
+    Rows come in user_id order, starting after ``after_user_id``, so each page
+    is a short indexed query and no cursor or transaction stays open between
+    pages. One query serves every language variant of a broadcast: callers
+    pick the variant per row from language_code. ``skip_job_id`` leaves out
+    users that already have an outcome for that broadcast job.
+    """
+    stmt = _broadcast_user_ids_stmt(target, User.user_id, User.language_code)
+    if after_user_id is not None:
+        stmt = stmt.where(User.user_id > after_user_id)
+    if skip_job_id is not None:
+        stmt = stmt.where(~exists().where(and_(
+            BroadcastOutcome.job_id == skip_job_id,
+            BroadcastOutcome.user_id == User.user_id,
+        )))
+    result = await session.execute(stmt.order_by(User.user_id).limit(limit))
+    return [(row.user_id, row.language_code) for row in result]
+
+
+async def iter_broadcast_recipients(
+    session_factory: sessionmaker, target: str = "all", chunk_size: int = 1000,
+    after_user_id: Optional[int] = None, skip_job_id: Optional[int] = None,
+) -> AsyncIterator[List[Tuple[int, Optional[str]]]]:
+    """Stream broadcast recipients page by page, ``chunk_size`` rows at a time.
+
+    Every page is read by ``get_broadcast_recipients_page`` in its own
+    session, closed before the page is yielded, so memory stays flat and no
+    transaction is left open while the caller works through a page.
+    """
+    while True:
+        async with session_factory() as session:
+            page = await get_broadcast_recipients_page(
+                session, target, after_user_id=after_user_id,
+                limit=chunk_size, skip_job_id=skip_job_id)
+        if page:
+            yield page
+        if len(page) < chunk_size:
+            return
+        after_user_id = page[-1][0]
+
+
+async def mark_users_bot_blocked(session: AsyncSession, user_ids: Iterable[int]) -> int:
+    """Flag users that blocked the bot so broadcasts skip them."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    stmt = (
+        update(User)
+        .where(and_(User.user_id.in_(user_ids), User.bot_blocked_at.is_(None)))
+        .values(bot_blocked_at=datetime.now(timezone.utc))
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
 async def get_all_users_with_panel_uuid(session: AsyncSession) -> List[User]:
     stmt = select(User).where(User.panel_user_uuid.is_not(None))
     result = await session.execute(stmt)
@@ -228,52 +312,3 @@ async def get_enhanced_user_statistics(session: AsyncSession) -> Dict[str, Any]:
         "inactive_users": max(0, inactive_users),
         "referral_users": referral_users
     }
-
-
-async def get_user_ids_with_active_subscription(session: AsyncSession) -> List[int]:
-    """Return non-banned user IDs who have an active subscription (paid or trial)."""
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc)
-
-    stmt = (
-        select(func.distinct(Subscription.user_id))
-        .join(User, Subscription.user_id == User.user_id)
-        .where(
-            and_(
-                User.is_banned == False,
-                Subscription.is_active == True,
-                Subscription.end_date > now,
-            )
-        )
-    )
-    result = await session.execute(stmt)
-    return result.scalars().all()
-
-
-async def get_user_ids_without_active_subscription(session: AsyncSession) -> List[int]:
-    """Return non-banned user IDs who do NOT have any active subscription."""
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc)
-
-    # Subquery for users with active subscription
-    active_subs_subq = (
-        select(Subscription.user_id)
-        .where(
-            and_(
-                Subscription.is_active == True,
-                Subscription.end_date > now,
-            )
-        )
-    ).scalar_subquery()
-
-    stmt = (
-        select(User.user_id)
-        .where(
-            and_(
-                User.is_banned == False,
-                ~User.user_id.in_(active_subs_subq),
-            )
-        )
-    )
-    result = await session.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
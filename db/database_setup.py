@@ -1,12 +1,47 @@
 import logging
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session, ORMExecuteState
 
 from config.settings import Settings
 from .models import Base
 
 async_engine = None
 
+_SESSION_WRITES_KEY = "has_pending_writes"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_write_statements(orm_execute_state: ORMExecuteState):
+    # Anything that is not a plain SELECT (DML, text(), DDL) counts as a write.
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context):
+    session.info[_SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _reset_write_tracking(session: Session, *args):
+    session.info.pop(_SESSION_WRITES_KEY, None)
+
+
+def session_has_writes(session: AsyncSession) -> bool:
+    """Whether the session has anything that would need a COMMIT.
+
+    True if a non-SELECT statement ran or a flush happened since the last
+    commit/rollback, or if there are ORM changes that are not flushed yet.
+    """
+    return bool(
+        session.sync_session.info.get(_SESSION_WRITES_KEY)
+        or session.new
+        or session.dirty
+        or session.deleted
+    )
+
 
 def init_db_connection(settings: Settings) -> sessionmaker:
     global async_engine
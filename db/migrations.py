@@ -41,9 +41,27 @@ async def _migrate_add_terms_accepted(session: AsyncSession):
         raise
 
 
+async def _migrate_add_bot_blocked_at(session: AsyncSession):
+    """Add bot_blocked_at column to users table if it doesn't exist."""
+    try:
+        await session.execute(text("""
+            ALTER TABLE users
+            ADD COLUMN IF NOT EXISTS bot_blocked_at TIMESTAMP WITH TIME ZONE NULL
+        """))
+        await session.commit()
+
+        logger.info("Ensured 'bot_blocked_at' column exists in users table")
+
+    except Exception as e:
+        logger.error(f"Error adding bot_blocked_at column: {e}")
+        await session.rollback()
+        raise
+
+
 # List of all migrations with their version numbers
 MIGRATIONS = [
     ("001_add_terms_accepted", _migrate_add_terms_accepted),
+    ("002_add_bot_blocked_at", _migrate_add_bot_blocked_at),
 ]
 
 
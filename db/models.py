@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint, Text, BigInteger, JSON, Index
 from sqlalchemy.orm import relationship, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.sql import func
@@ -26,6 +26,8 @@ class User(Base):
                             nullable=True)
     balance = Column(Float, default=0.0, nullable=False, index=True)
     terms_accepted = Column(Boolean, default=False, nullable=False)
+    # Set when a send fails because the user blocked the bot or deleted the account
+    bot_blocked_at = Column(DateTime(timezone=True), nullable=True)
 
     referrer = relationship("User", remote_side=[user_id], backref="referrals")
     subscriptions = relationship("Subscription",
@@ -196,4 +198,75 @@ class PanelSyncStatus(Base):
     users_processed_from_panel = Column(Integer, default=0)
     subscriptions_synced = Column(Integer, default=0)
 
-    __table_args__ = (UniqueConstraint('id'), )
\ No newline at end of file
+    __table_args__ = (UniqueConstraint('id'), )
+
+
+class OutboundMessage(Base):
+    """Persistent outgoing Bot API call, claimed by workers with SKIP LOCKED.
+
+    Delivered rows are deleted, so any row that exists is still pending,
+    being sent, or failed for good.
+    """
+    __tablename__ = "outbound_messages"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, nullable=False)
+    method_name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    priority = Column(Integer, nullable=False, default=1)  # 0 transactional, 1 interactive, 2 bulk
+    tracking_key = Column(String, nullable=True)  # e.g. broadcast job the message belongs to
+    status = Column(String, nullable=False, default="pending")  # pending, processing, failed
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_outbound_messages_status_available", "status", "available_at", "id"),
+        Index("ix_outbound_messages_chat_id_id", "chat_id", "id"),
+    )
+
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    admin_id = Column(BigInteger, nullable=True)
+    target = Column(String, nullable=False, default="all")
+    content_type = Column(String, nullable=False, default="text")
+    text = Column(Text, nullable=True)
+    file_id = Column(String, nullable=True)
+    entities = Column(JSON, nullable=True)
+    # language_code -> {content_type, text, file_id, entities} overriding the
+    # main content for users with that language
+    variants = Column(JSON, nullable=True)
+    # running, paused, cancelled, completed, stalled
+    status = Column(String, nullable=False, default="running", index=True)
+    # Every recipient up to this id has an outcome; a resumed job continues after it
+    last_user_id = Column(BigInteger, nullable=True)
+    total_queued = Column(Integer, nullable=False, default=0)
+    queue_failed = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    blocked = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    outcomes = relationship("BroadcastOutcome",
+                            back_populates="job",
+                            cascade="all, delete-orphan")
+
+
+class BroadcastOutcome(Base):
+    """Final delivery result of one broadcast message: one row per recipient."""
+    __tablename__ = "broadcast_outcomes"
+
+    job_id = Column(Integer,
+                    ForeignKey("broadcast_jobs.job_id", ondelete="CASCADE"),
+                    primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    outcome = Column(String, nullable=False)  # delivered, blocked, failed, queue_failed
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    job = relationship("BroadcastJob", back_populates="outcomes")
@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot.services import broadcast_service
+from bot.services.broadcast_service import BroadcastService
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def commit(self):
+        pass
+
+
+class FakeQueueManager:
+    backend = "postgres"
+
+    def __init__(self):
+        self.listeners = {}
+        self.queued = []
+
+    def add_outcome_listener(self, tracking_key, listener):
+        self.listeners[tracking_key] = listener
+
+    def remove_outcome_listener(self, tracking_key):
+        self.listeners.pop(tracking_key, None)
+
+
+def make_job(**fields):
+    job = dict(job_id=7, target="all", content_type="text", text="hi", file_id=None,
+               entities=None, variants=None, last_user_id=None, total_queued=0,
+               delivered=0, blocked=0, failed=0)
+    job.update(fields)
+    return SimpleNamespace(**job)
+
+
+def test_resume_waits_for_outcomes_queued_before_restart(monkeypatch):
+    audience = [20, 30, 40, 50]
+    finished = []
+    queue_manager = FakeQueueManager()
+
+    async def recipients_page(session, target, after_user_id=None, limit=1000, skip_job_id=None):
+        return [(uid, None) for uid in audience if after_user_id is None or uid > after_user_id][:limit]
+
+    async def send_message_via_queue(manager, uid, content, **kwargs):
+        manager.queued.append(uid)
+
+    async def noop(*args, **kwargs):
+        return 0
+
+    async def finish_broadcast_job(session, job_id, status):
+        finished.append(status)
+
+    monkeypatch.setattr(broadcast_service, "get_queue_manager", lambda: queue_manager)
+    monkeypatch.setattr(broadcast_service, "send_message_via_queue", send_message_via_queue)
+    monkeypatch.setattr(broadcast_service.user_dal, "get_broadcast_recipients_page", recipients_page)
+    monkeypatch.setattr(broadcast_service.broadcast_dal, "add_broadcast_outcomes", noop)
+    monkeypatch.setattr(broadcast_service.broadcast_dal, "update_broadcast_job", noop)
+    monkeypatch.setattr(broadcast_service.broadcast_dal, "finish_broadcast_job", finish_broadcast_job)
+
+    settings = SimpleNamespace(BROADCAST_RECIPIENTS_CHUNK_SIZE=100,
+                               BROADCAST_MAX_QUEUED_PER_JOB=100,
+                               BROADCAST_PROGRESS_INTERVAL_SECONDS=1)
+
+    async def scenario():
+        service = BroadcastService(settings, FakeSession)
+        # 10 was delivered before the restart; 20 and 30 still wait in outbound_messages
+        service._spawn(make_job(last_user_id=30, total_queued=3, delivered=1))
+        run = service.get_run(7)
+        await asyncio.sleep(0.05)
+        assert queue_manager.queued == [40, 50]
+        assert run.in_queue == 4
+
+        listener = queue_manager.listeners[run.progress.tracking_key]
+        listener(20, "delivered")
+        listener(30, "blocked")
+        await asyncio.sleep(0.05)
+        assert not run.task.done()
+        assert run.in_queue == 2
+
+        listener(40, "delivered")
+        listener(50, "failed")
+        await asyncio.wait_for(run.task, timeout=2)
+        assert finished == ["completed"]
+        assert run.progress.counts == {"delivered": 3, "blocked": 1, "failed": 1}
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from bot.middlewares.throttling import ThrottlingMiddleware
+
+
+def make_update(event_type, **fields):
+    update = dict(callback_query=None, message=None, pre_checkout_query=None)
+    update.update(fields)
+    return SimpleNamespace(event_type=event_type, **update)
+
+
+def make_middleware(rules):
+    settings = SimpleNamespace(THROTTLE_RULES=rules, ADMIN_IDS=[], DEFAULT_LANGUAGE="en")
+    return ThrottlingMiddleware(settings)
+
+
+def test_pre_checkout_query_is_never_throttled():
+    middleware = make_middleware("pre_checkout_query=1/1,message=1/1")
+    update = make_update("pre_checkout_query",
+                         pre_checkout_query=SimpleNamespace(id="q1"))
+    assert middleware._resolve_rule_key(update) is None
+
+
+def test_successful_payment_is_never_throttled():
+    middleware = make_middleware("message=1/1")
+    update = make_update("message",
+                         message=SimpleNamespace(successful_payment=SimpleNamespace()))
+    assert middleware._resolve_rule_key(update) is None
+
+
+def test_configured_update_type_is_throttled():
+    middleware = make_middleware("message=1/1")
+    update = make_update("message", message=SimpleNamespace(successful_payment=None))
+    assert middleware._resolve_rule_key(update) == "message"